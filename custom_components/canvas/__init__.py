@@ -1,17 +1,26 @@
 """The Canvas LMS integration."""
 from __future__ import annotations
 
+import asyncio
 import logging
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
 from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
 
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
-
-from .api import CanvasAPI
 from .coordinator import CanvasDataUpdateCoordinator
-from .const import DOMAIN, CONF_URL, CONF_TOKEN
+from .transport import async_get_transport, async_release_transport
+from .webhook import async_register_webhook
+from .const import (
+    DOMAIN,
+    CONF_URL,
+    CONF_TOKEN,
+    CONF_MAX_CONCURRENT_REQUESTS,
+    CONF_WEBHOOK,
+    DEFAULT_MAX_CONCURRENT_REQUESTS,
+    STORAGE_VERSION,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -19,22 +28,68 @@ PLATFORMS: list[Platform] = [Platform.SENSOR, Platform.CALENDAR]
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Canvas LMS from a config entry."""
-    session = async_get_clientsession(hass)
-    api = CanvasAPI(entry.data[CONF_URL], entry.data[CONF_TOKEN], session)
-    
+    # Entries on the same Canvas host share a connection pool and request
+    # slots; entries with the same token also share one client
+    transport = async_get_transport(
+        hass,
+        entry.data[CONF_URL],
+        max_concurrent_requests=entry.options.get(
+            CONF_MAX_CONCURRENT_REQUESTS, DEFAULT_MAX_CONCURRENT_REQUESTS
+        ),
+    )
+    api = transport.get_api(entry.data[CONF_URL], entry.data[CONF_TOKEN], holder=entry.entry_id)
+    entry.async_on_unload(
+        lambda: async_release_transport(hass, entry.data[CONF_URL], entry.entry_id)
+    )
+
     coordinator = CanvasDataUpdateCoordinator(hass, api, entry)
-    await coordinator.async_config_entry_first_refresh()
+
+    # Hydrate from the last good snapshot so startup doesn't wait on Canvas;
+    # only block on a live crawl when there is nothing stored yet
+    has_snapshot = await coordinator.async_load_snapshot()
+    if not has_snapshot:
+        await coordinator.async_config_entry_first_refresh()
 
     hass.data.setdefault(DOMAIN, {})
     hass.data[DOMAIN][entry.entry_id] = coordinator
     
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
+    # Registering may store a new webhook ID in entry.data; do it before the
+    # update listener exists so that write doesn't trigger a reload
+    if entry.options.get(CONF_WEBHOOK, False):
+        async_register_webhook(hass, entry)
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+
+    if has_snapshot:
+        # Offset each entry's first refresh so entries on one host keep
+        # polling out of phase instead of all hitting Canvas together
+        entry.async_create_background_task(
+            hass,
+            _async_staggered_refresh(coordinator, transport.stagger_delay(entry.entry_id)),
+            f"{DOMAIN}_initial_refresh",
+        )
+
     return True
 
+async def _async_staggered_refresh(coordinator: CanvasDataUpdateCoordinator, delay: float) -> None:
+    """Refresh after a delay; later refreshes keep the resulting offset."""
+    if delay:
+        _LOGGER.debug("Delaying first Canvas refresh by %.0fs", delay)
+        await asyncio.sleep(delay)
+    await coordinator.async_refresh()
+
+async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload the config entry when its options change."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
         hass.data[DOMAIN].pop(entry.entry_id)
 
     return unload_ok
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the stored snapshot when a config entry is deleted."""
+    await Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}").async_remove()
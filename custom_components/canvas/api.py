@@ -1,20 +1,390 @@
 """API Client for Canvas LMS."""
 from __future__ import annotations
 
+import asyncio
+from collections import OrderedDict, deque
+from collections.abc import AsyncIterator, Awaitable, Callable, Collection, Mapping
+from contextlib import aclosing, asynccontextmanager
+from dataclasses import dataclass
+import json
 import logging
+import random
+import re
+import time
+from typing import Any
+import zlib
 import aiohttp
 import async_timeout
+from yarl import URL
+
+from .const import (
+    DEFAULT_MAX_CONCURRENT_REQUESTS,
+    DEFAULT_MAX_CONCURRENT_PAGES,
+    DEFAULT_RESPONSE_CACHE_SIZE,
+    DEFAULT_REQUEST_TTL,
+)
+from .stats_logic import ApiStats
 
 _LOGGER = logging.getLogger(__name__)
 
+# Decoder for raw response bodies; must accept bytes
+JsonLoads = Callable[[bytes], Any]
+
+def default_json_loads() -> JsonLoads:
+    """Return the fastest installed JSON decoder: orjson, then msgspec, then stdlib."""
+    try:
+        import orjson  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        pass
+    else:
+        return orjson.loads
+
+    try:
+        import msgspec  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        pass
+    else:
+        return msgspec.json.decode
+
+    return json.loads
+
+# Course data a caller can ask for, mapped to the Canvas include[] that returns it.
+# The caller's own enrollments are always returned, so they need no include.
+COURSE_INCLUDES = {
+    "grades": "total_scores",
+    "term": "term",
+    "observed_users": "observed_users",
+}
+DEFAULT_COURSE_FIELDS = ("grades", "term")
+
+def course_include_params(fields: Collection[str]) -> list[tuple[str, str]]:
+    """Map requested course fields to include[] parameters."""
+    return [("include[]", COURSE_INCLUDES[name]) for name in fields]
+
+def _wire_size(response: aiohttp.ClientResponse, body: bytes) -> int:
+    """Return the response size on the wire.
+
+    aiohttp hands back decompressed bodies, so prefer Content-Length, which
+    is the compressed size; fall back to the body for chunked responses.
+    """
+    length = response.headers.get("Content-Length", "")
+    return int(length) if length.isdigit() else len(body)
+
+def _elapsed_ms(started: float) -> float:
+    """Return milliseconds since a time.monotonic() reading."""
+    return (time.monotonic() - started) * 1000
+
+_LINK_PATTERN = re.compile(r'<([^>]*)>\s*;\s*rel="?([^",;]+)"?')
+
+def parse_link_header(header: str | None) -> dict[str, str]:
+    """Parse an RFC 5988 Link header into a {rel: url} mapping."""
+    if not header:
+        return {}
+    return {rel: url for url, rel in _LINK_PATTERN.findall(header)}
+
+def expand_page_urls(links: Mapping[str, str]) -> list[str]:
+    """Build the URLs for every remaining page, when Canvas uses numbered pages.
+
+    Returns an empty list for bookmark-style cursors or when there is no
+    "last" link, in which case the caller must walk "next" links serially.
+    """
+    next_url, last_url = links.get("next"), links.get("last")
+    if not next_url or not last_url:
+        return []
+
+    next_page = URL(next_url).query.get("page", "")
+    last_page = URL(last_url).query.get("page", "")
+    if not (next_page.isdigit() and last_page.isdigit()):
+        return []
+
+    base = URL(next_url)
+    return [
+        str(base.update_query(page=str(page)))
+        for page in range(int(next_page), int(last_page) + 1)
+    ]
+
+@dataclass
+class CachedResponse:
+    """Validators and body from a previous 200 response.
+
+    Streamed pages keep only their zlib-compressed raw body, decoded again
+    on a 304, so a full planner sweep isn't held as parsed objects between
+    refreshes.
+    """
+    data: any
+    etag: str | None = None
+    last_modified: str | None = None
+    link: str | None = None
+    body: bytes | None = None
+
+class CanvasResponseCache:
+    """Bounded LRU cache of conditional-request validators and parsed bodies."""
+
+    def __init__(self, max_entries: int = DEFAULT_RESPONSE_CACHE_SIZE) -> None:
+        """Initialize."""
+        self._max_entries = max_entries
+        self._entries: OrderedDict[str, CachedResponse] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(url: str, params: dict | list | None = None) -> str:
+        """Build the cache key for a URL and its query parameters."""
+        if not params:
+            return url
+        return str(URL(url).extend_query(params))
+
+    def get(self, key: str) -> CachedResponse | None:
+        """Return the cached response for a key and mark it recently used."""
+        cached = self._entries.get(key)
+        if cached is not None:
+            self._entries.move_to_end(key)
+        return cached
+
+    def set(self, key: str, cached: CachedResponse) -> None:
+        """Store a response, evicting the least recently used entry when full."""
+        if self._max_entries <= 0:
+            return
+        self._entries[key] = cached
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        """Return the number of cached responses."""
+        return len(self._entries)
+
+class CanvasRequestCoalescer:
+    """Share identical GETs between concurrent and closely repeated callers.
+
+    The first caller for a key runs the request; anyone asking for the same
+    key while it is in flight awaits the same future. Results are then
+    served from memory for a short TTL, so siblings in the same course or a
+    config flow racing the coordinator don't repeat the call.
+    """
+
+    def __init__(
+        self,
+        ttl: float = DEFAULT_REQUEST_TTL,
+        max_entries: int = DEFAULT_RESPONSE_CACHE_SIZE,
+    ) -> None:
+        """Initialize."""
+        self._ttl = ttl
+        self._max_entries = max_entries
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._recent: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self.shared = 0
+        self.recent_hits = 0
+
+    async def async_run(
+        self, key: str, fetch: Callable[[], Awaitable[Any]], remember: bool = True
+    ) -> Any:
+        """Return the result for key, running fetch only if nobody else is.
+
+        With remember=False the result is shared with concurrent callers
+        but not kept afterwards.
+        """
+        while True:
+            recent = self._recent.get(key)
+            if recent is not None:
+                if recent[0] > time.monotonic():
+                    self.recent_hits += 1
+                    return recent[1]
+                del self._recent[key]
+
+            future = self._inflight.get(key)
+            if future is None:
+                break
+            try:
+                result = await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # Retry if the leading caller was cancelled but this one wasn't
+                if not future.cancelled() or asyncio.current_task().cancelling():
+                    raise
+                continue
+            self.shared += 1
+            return result
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await fetch()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as err:
+            future.set_exception(err)
+            # Followers re-raise it; don't warn when there were none
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            if remember:
+                self._remember(key, result)
+            return result
+        finally:
+            del self._inflight[key]
+
+    def _remember(self, key: str, result: Any) -> None:
+        """Keep a result for the TTL, dropping the oldest entries when full."""
+        if self._ttl <= 0 or self._max_entries <= 0:
+            return
+        self._recent[key] = (time.monotonic() + self._ttl, result)
+        self._recent.move_to_end(key)
+        while len(self._recent) > self._max_entries:
+            self._recent.popitem(last=False)
+
+    def clear(self) -> None:
+        """Forget recent results so the next request goes to Canvas."""
+        self._recent.clear()
+
+class CanvasRequestScheduler:
+    """Pace requests against a Canvas token's leaky-bucket rate limit.
+
+    Canvas reports the bucket level in X-Rate-Limit-Remaining and each
+    request's cost in X-Request-Cost. The scheduler keeps a local estimate
+    that refills at the bucket's leak rate, reserves an estimated cost for
+    every request it lets through, and delays new requests once the
+    estimate falls below a low-water mark. Throttled responses push all
+    requests back with exponential backoff and full jitter.
+    """
+
+    def __init__(
+        self,
+        max_concurrent_requests: int = DEFAULT_MAX_CONCURRENT_REQUESTS,
+        leak_rate: float = 10.0,
+        bucket_capacity: float = 700.0,
+        low_water: float = 150.0,
+        max_retries: int = 3,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0,
+        semaphore: asyncio.Semaphore | None = None,
+    ) -> None:
+        """Initialize.
+
+        Pass a semaphore to share one concurrency limit between schedulers,
+        e.g. every token on the same Canvas host.
+        """
+        self._semaphore = semaphore or asyncio.Semaphore(max_concurrent_requests)
+        self._leak_rate = leak_rate
+        self._bucket_capacity = bucket_capacity
+        self._low_water = low_water
+        self.max_retries = max_retries
+        self._backoff_base = backoff_base
+        self._backoff_max = backoff_max
+        self._remaining: float | None = None
+        self._remaining_at = 0.0
+        # Canvas charges a 50-unit pre-flight penalty before the real cost is known
+        self._cost_estimate = 50.0
+        self._throttled_until = 0.0
+
+    def estimated_remaining(self, now: float | None = None) -> float | None:
+        """Return the estimated bucket level, refilled since the last report."""
+        if self._remaining is None:
+            return None
+        now = time.monotonic() if now is None else now
+        refilled = self._remaining + (now - self._remaining_at) * self._leak_rate
+        return min(self._bucket_capacity, refilled)
+
+    def delay(self, now: float | None = None) -> float:
+        """Return how long the next request should wait before being sent."""
+        now = time.monotonic() if now is None else now
+        delay = max(0.0, self._throttled_until - now)
+        remaining = self.estimated_remaining(now)
+        if remaining is not None:
+            deficit = self._low_water + self._cost_estimate - remaining
+            if deficit > 0:
+                delay = max(delay, deficit / self._leak_rate)
+        return delay
+
+    @asynccontextmanager
+    async def async_slot(self) -> AsyncIterator[None]:
+        """Wait for enough rate-limit headroom, then a concurrency slot.
+
+        The semaphore may be shared with other tokens' schedulers, so this
+        token's delay is waited out before taking a slot, and again if it
+        grew while the slot was being acquired.
+        """
+        while True:
+            if (delay := self.delay()) > 0:
+                _LOGGER.debug("Canvas rate limit low; delaying request %.1fs", delay)
+                await asyncio.sleep(delay)
+            await self._semaphore.acquire()
+            if self.delay() <= 0:
+                break
+            self._semaphore.release()
+        try:
+            self._reserve()
+            yield
+        finally:
+            self._semaphore.release()
+
+    def _reserve(self) -> None:
+        """Charge the estimated cost of a request that is about to be sent."""
+        now = time.monotonic()
+        remaining = self.estimated_remaining(now)
+        if remaining is not None:
+            self._remaining = remaining - self._cost_estimate
+            self._remaining_at = now
+
+    def update(self, headers: Mapping[str, str]) -> None:
+        """Record the bucket state reported by a Canvas response."""
+        try:
+            if (remaining := headers.get("X-Rate-Limit-Remaining")) is not None:
+                self._remaining = float(remaining)
+                self._remaining_at = time.monotonic()
+            if (cost := headers.get("X-Request-Cost")) is not None:
+                # Smooth the per-request cost so one expensive call doesn't stall everything
+                self._cost_estimate = 0.8 * self._cost_estimate + 0.2 * float(cost)
+        except ValueError:
+            _LOGGER.debug("Ignoring malformed Canvas rate-limit headers: %s", dict(headers))
+
+    def throttled(self, attempt: int, retry_after: str | None = None) -> float:
+        """Back off all requests after a throttled response; return the delay."""
+        delay = random.uniform(0, min(self._backoff_max, self._backoff_base * 2**attempt))
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, float(retry_after))
+        self._throttled_until = max(self._throttled_until, time.monotonic() + delay)
+        return delay
+
+async def _async_is_throttled(response: aiohttp.ClientResponse) -> bool:
+    """Return True if Canvas rejected a request for exceeding the rate limit."""
+    if response.status == 429:
+        return True
+    if response.status != 403:
+        return False
+    if response.headers.get("X-Rate-Limit-Remaining") in ("0", "0.0"):
+        return True
+    return "Rate Limit Exceeded" in await response.text()
+
 class CanvasAPI:
     """Canvas API Client."""
 
-    def __init__(self, url: str, token: str, session: aiohttp.ClientSession) -> None:
+    def __init__(
+        self,
+        url: str,
+        token: str,
+        session: aiohttp.ClientSession,
+        max_concurrent_requests: int = DEFAULT_MAX_CONCURRENT_REQUESTS,
+        max_concurrent_pages: int = DEFAULT_MAX_CONCURRENT_PAGES,
+        response_cache_size: int = DEFAULT_RESPONSE_CACHE_SIZE,
+        scheduler: CanvasRequestScheduler | None = None,
+        json_loads: JsonLoads | None = None,
+        request_ttl: float = DEFAULT_REQUEST_TTL,
+    ) -> None:
         """Initialize."""
         self._url = url.rstrip("/")
         self._token = token
         self._session = session
+        # Shared by every concurrent student and page fetch made with this token
+        self.scheduler = scheduler or CanvasRequestScheduler(max_concurrent_requests)
+        # Caps concurrent page prefetches per host
+        self._max_concurrent_pages = max_concurrent_pages
+        self._host_semaphores: dict[str, asyncio.Semaphore] = {}
+        self.response_cache = CanvasResponseCache(response_cache_size)
+        self.coalescer = CanvasRequestCoalescer(request_ttl, response_cache_size)
+        self._json_loads = json_loads or default_json_loads()
+        self.stats = ApiStats()
 
     async def async_get_user_info(self) -> dict:
         """Get information about the current user."""
@@ -30,11 +400,21 @@ class CanvasAPI:
         params = [("include[]", "course"), ("include[]", "grades")]
         return await self._async_get_paginated(f"/api/v1/users/{user_id}/enrollments", params=params)
 
-    async def async_get_courses(self, user_id: str | None = None) -> list:
-        """Get courses for a user, including total scores and term info."""
+    async def async_get_courses(
+        self, user_id: str | None = None, fields: Collection[str] = DEFAULT_COURSE_FIELDS
+    ) -> list:
+        """Get courses for a user, with only the requested optional fields."""
         endpoint = f"/api/v1/users/{user_id}/courses" if user_id else "/api/v1/courses"
-        params = [("include[]", "total_scores"), ("include[]", "term"), ("include[]", "enrollments")]
-        return await self._async_get_paginated(endpoint, params=params)
+        return await self._async_get_paginated(endpoint, params=course_include_params(fields))
+
+    async def async_get_observer_courses(self, fields: Collection[str] = DEFAULT_COURSE_FIELDS) -> list:
+        """Get the current user's courses with every observed student's enrollments.
+
+        One crawl covers all observees; each course appears once, with a
+        StudentEnrollment (carrying user_id and scores) per observed student.
+        """
+        params = course_include_params((*fields, "observed_users"))
+        return await self._async_get_paginated("/api/v1/courses", params=params)
 
     async def async_get_assignments(self, course_id: str) -> list:
         """Get assignments for a course."""
@@ -49,71 +429,274 @@ class CanvasAPI:
         ]
         for code in context_codes:
             params.append(("context_codes[]", code))
-            
+
         return await self._async_get_paginated("/api/v1/planner/items", params=params)
 
+    async def async_iter_planner_items(
+        self,
+        student_id: str,
+        start_date: str,
+        end_date: str,
+        context_codes: list[str],
+        plannable_types: Collection[str] | None = None,
+    ) -> AsyncIterator[dict]:
+        """Yield a student's planner items as each page is decoded.
+
+        The Planner API has no type filter, so items outside plannable_types
+        are dropped here, before callers convert them.
+        """
+        params = [
+            ("observed_user_id", student_id),
+            ("start_date", start_date),
+            ("end_date", end_date),
+        ]
+        for code in context_codes:
+            params.append(("context_codes[]", code))
+
+        async with aclosing(self._async_iter_planner(params, plannable_types)) as items:
+            async for item in items:
+                yield item
+
+    async def async_iter_bulk_planner_items(
+        self,
+        student_ids: list[str],
+        start_date: str,
+        end_date: str,
+        context_codes: list[str],
+        plannable_types: Collection[str] | None = None,
+    ) -> AsyncIterator[dict]:
+        """Yield planner items for several observed students from one crawl.
+
+        Callers must check that each item names its user; instances that
+        only scope planner queries to a single observee won't.
+        """
+        params = [("observed_user_ids[]", student_id) for student_id in student_ids]
+        params += [("start_date", start_date), ("end_date", end_date)]
+        params += [("context_codes[]", code) for code in context_codes]
+
+        async with aclosing(self._async_iter_planner(params, plannable_types)) as items:
+            async for item in items:
+                yield item
+
+    async def _async_iter_planner(
+        self, params: list, plannable_types: Collection[str] | None
+    ) -> AsyncIterator[dict]:
+        """Yield planner items of the wanted types, counting the rest as dropped."""
+        async with aclosing(self._async_iter_paginated("/api/v1/planner/items", params=params)) as items:
+            async for item in items:
+                if plannable_types is None or item.get("plannable_type") in plannable_types:
+                    yield item
+                else:
+                    self.stats.dropped_items += 1
+
     async def _async_get_paginated(self, endpoint: str, params: dict | list | None = None) -> list:
         """Make a GET request and follow pagination links."""
+        results = []
+        async with aclosing(self._async_iter_pages(endpoint, params)) as pages:
+            async for page in pages:
+                if not isinstance(page, list):
+                    # Fallback for non-list responses (though usually wouldn't be paginated)
+                    return page
+                results.extend(page)
+        return results
+
+    async def _async_iter_paginated(self, endpoint: str, params: dict | list | None = None) -> AsyncIterator[dict]:
+        """Yield items from a paginated endpoint one page at a time.
+
+        Callers can filter and convert items as they arrive. At most the page
+        being consumed plus max_concurrent_pages prefetched pages are held in
+        memory, and pages are not kept decoded once consumed.
+        """
+        async with aclosing(self._async_iter_pages(endpoint, params, stream=True)) as pages:
+            async for page in pages:
+                if isinstance(page, list):
+                    for item in page:
+                        yield item
+
+    async def _async_iter_pages(
+        self, endpoint: str, params: dict | list | None = None, stream: bool = False
+    ) -> AsyncIterator[any]:
+        """Make a GET request and yield each page while following pagination links.
+
+        When the first page advertises numbered pages up to rel="last", up to
+        max_concurrent_pages pages ahead of the consumer are fetched
+        concurrently and yielded in page order. Bookmark-style cursors are
+        walked one "next" link at a time. Streamed pages are not kept
+        decoded by the response cache or the coalescer. Iterate under
+        contextlib.aclosing so a consumer that stops early cancels the
+        prefetches straight away, and close any iterator built on this one
+        the same way.
+        """
         if params is None:
             params = {}
-        
+
         # Ensure per_page is set
         if isinstance(params, dict):
             params["per_page"] = 100
         else:
             # list of tuples
             params.append(("per_page", 100))
-        
-        results = []
-        url = f"{self._url}{endpoint}"
-        
-        while url:
-            headers = {
-                "Authorization": f"Bearer {self._token}",
-                "Accept": "application/json",
-            }
-            
+
+        data, headers = await self._async_request(f"{self._url}{endpoint}", params, stream)
+        yield data
+        if not isinstance(data, list):
+            return
+        del data
+        links = parse_link_header(headers.get("Link"))
+
+        if page_urls := expand_page_urls(links):
+            pending = iter(page_urls)
+            window: deque[asyncio.Task] = deque()
+
+            def prefetch_next() -> None:
+                if (page_url := next(pending, None)) is not None:
+                    window.append(asyncio.create_task(self._async_prefetch_page(page_url, stream)))
+
+            for _ in range(max(1, self._max_concurrent_pages)):
+                prefetch_next()
             try:
-                async with async_timeout.timeout(10):
-                    response = await self._session.get(url, headers=headers, params=params)
-                    response.raise_for_status()
-                    data = await response.json()
-                    
-                    if isinstance(data, list):
-                        results.extend(data)
-                    else:
-                        # Fallback for non-list responses (though usually wouldn't be paginated)
-                        return data
-
-                    # Check Link header for next page
-                    url = None
-                    params = None # Parameters are already in the Link URL
-                    if "Link" in response.headers:
-                        links = response.headers["Link"].split(",")
-                        for link in links:
-                            if 'rel="next"' in link:
-                                # Extract URL between < and >
-                                url = link.split(";")[0].strip("< >")
-                                break
-            except Exception as err:
-                _LOGGER.error("Error fetching paginated data from Canvas: %s", err)
-                raise
+                while window:
+                    data = await window.popleft()
+                    prefetch_next()
+                    yield data
+                    del data
+            finally:
+                # The consumer may stop early or a page may fail; don't leave
+                # prefetches running or their errors unretrieved
+                for task in window:
+                    if not task.done():
+                        task.cancel()
+                    elif not task.cancelled():
+                        task.exception()
+            return
 
-        return results
+        # Parameters are already in the Link URL
+        url = links.get("next")
+        while url:
+            data, headers = await self._async_request(url, stream=stream)
+            yield data
+            del data
+            url = parse_link_header(headers.get("Link")).get("next")
+
+    async def _async_prefetch_page(self, url: str, stream: bool = False) -> list:
+        """Fetch one page of a numbered page set under the per-host cap."""
+        host = URL(url).host or ""
+        semaphore = self._host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = self._host_semaphores[host] = asyncio.Semaphore(self._max_concurrent_pages)
+
+        async with semaphore:
+            data, _ = await self._async_request(url, stream=stream)
+        return data
 
     async def _async_get(self, endpoint: str, params: dict | None = None) -> any:
         """Make a GET request."""
-        url = f"{self._url}{endpoint}"
+        data, _ = await self._async_request(f"{self._url}{endpoint}", params)
+        return data
+
+    async def _async_request(
+        self, url: str, params: dict | list | None = None, stream: bool = False
+    ) -> tuple[any, Mapping[str, str]]:
+        """Make a single GET request, returning the decoded body and headers.
+
+        Identical requests that are in flight share one result; non-streamed
+        results are also reused for a short while after they arrive.
+        """
+        cache_key = self.response_cache.key(url, params)
+        return await self.coalescer.async_run(
+            cache_key, lambda: self._async_fetch(url, params, cache_key, stream=stream), remember=not stream
+        )
+
+    async def async_post(self, endpoint: str, payload: dict) -> any:
+        """POST a JSON payload, returning the decoded body.
+
+        Goes through the same rate limiting and retries as GETs, but is
+        never cached or coalesced.
+        """
+        data, _ = await self._async_fetch(f"{self._url}{endpoint}", None, None, payload)
+        return data
+
+    async def _async_fetch(
+        self,
+        url: str,
+        params: dict | list | None,
+        cache_key: str | None,
+        payload: dict | None = None,
+        stream: bool = False,
+    ) -> tuple[any, Mapping[str, str]]:
+        """Send a request to Canvas, returning the decoded body and headers.
+
+        GETs send If-None-Match/If-Modified-Since when a previous response
+        for the same URL is cached, and reuse its body on a 304. Streamed
+        pages are cached as compressed raw bytes rather than parsed. A
+        payload makes the request a JSON POST.
+        """
         headers = {
             "Authorization": f"Bearer {self._token}",
             "Accept": "application/json",
         }
-        
-        try:
-            async with async_timeout.timeout(10):
-                response = await self._session.get(url, headers=headers, params=params)
-                response.raise_for_status()
-                return await response.json()
-        except Exception as err:
-            _LOGGER.error("Error fetching data from Canvas: %s", err)
-            raise
+        method = "GET" if payload is None else "POST"
+        cached = self.response_cache.get(cache_key) if cache_key else None
+        if cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+
+        path = URL(url).path
+        attempt = 0
+        while True:
+            throttled = False
+            async with self.scheduler.async_slot():
+                started = time.monotonic()
+                try:
+                    async with async_timeout.timeout(10), self._session.request(
+                        method, url, headers=headers, params=params, json=payload
+                    ) as response:
+                        self.scheduler.update(response.headers)
+                        if response.status == 304 and cached is not None:
+                            self.response_cache.hits += 1
+                            self.stats.record(path, _elapsed_ms(started), not_modified=True)
+                            data = cached.data if cached.body is None else self._json_loads(zlib.decompress(cached.body))
+                            return data, {"Link": cached.link} if cached.link else {}
+
+                        throttled = await _async_is_throttled(response)
+                        if not throttled or attempt >= self.scheduler.max_retries:
+                            response.raise_for_status()
+                            body = await response.read()
+                            self.stats.record(path, _elapsed_ms(started), size=_wire_size(response, body))
+                            decode_started = time.process_time()
+                            data = self._json_loads(body)
+                            self.stats.decode_seconds += time.process_time() - decode_started
+                            break
+                        self.stats.record(path, _elapsed_ms(started), error=True)
+                except Exception as err:
+                    self.stats.record(path, _elapsed_ms(started), error=True)
+                    if throttled:
+                        _LOGGER.warning("Canvas rate limit exceeded after %s retries: %s", attempt, err)
+                    else:
+                        _LOGGER.error("Error fetching data from Canvas: %s", err)
+                    raise
+
+            delay = self.scheduler.throttled(attempt, response.headers.get("Retry-After"))
+            _LOGGER.debug("Canvas throttled request to %s; retrying in %.1fs", url, delay)
+            attempt += 1
+
+        if cache_key is None:
+            return data, response.headers
+
+        self.response_cache.misses += 1
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if etag or last_modified:
+            self.response_cache.set(
+                cache_key,
+                CachedResponse(
+                    data=None if stream else data,
+                    etag=etag,
+                    last_modified=last_modified,
+                    link=response.headers.get("Link"),
+                    body=zlib.compress(body, 1) if stream else None,
+                ),
+            )
+        return data, response.headers
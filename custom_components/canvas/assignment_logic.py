@@ -1,13 +1,24 @@
 """Core logic for Canvas assignments."""
 from __future__ import annotations
 
-from dataclasses import dataclass
-from datetime import datetime, timedelta
+from array import array
+import base64
+from collections.abc import Callable
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from datetime import datetime, time, timedelta
+from functools import lru_cache
 import logging
+import re
+import sys
+import zlib
 
 _LOGGER = logging.getLogger(__name__)
 
-def clean_course_name(name: str | None) -> str:
+# Match P1-, P10-, 1st-, 1st period-, 1st and 3rd period-
+_PERIOD_PATTERN = re.compile(r'^([pP]\d+|(\d+(st|nd|rd|th)(\s+and\s+\d+(st|nd|rd|th))?\s+period))[\s-]*')
+
+def _clean_course_name(name: str | None) -> str:
     """Clean up Canvas course names by removing common prefixes and suffixes.
     
     Handles patterns like:
@@ -28,10 +39,7 @@ def clean_course_name(name: str | None) -> str:
         cleaned = cleaned[1:].strip()
         
     # 2. Handle common "Period" prefixes: P1-, P2-, 1st-, 1st period-, etc.
-    import re
-    # Match P1-, P10-, 1st-, 1st period-, 1st and 3rd period-
-    period_pattern = r'^([pP]\d+|(\d+(st|nd|rd|th)(\s+and\s+\d+(st|nd|rd|th))?\s+period))[\s-]*'
-    cleaned = re.sub(period_pattern, '', cleaned).strip()
+    cleaned = _PERIOD_PATTERN.sub('', cleaned).strip()
 
     # 3. Handle separator logic (e.g., CODE - DESCRIPTION or CODE-DESCRIPTION)
     # Check for " - " first as it's the strongest signal
@@ -51,18 +59,172 @@ def clean_course_name(name: str | None) -> str:
             
     return cleaned
 
-@dataclass
+def parse_course_name_rules(text: str | None) -> list[tuple[str, str]]:
+    """Parse user rewrite rules, one "pattern => replacement" per line.
+
+    Lines starting with # are comments. Raises ValueError on a malformed rule.
+    """
+    rules = []
+    for line in (text or "").splitlines():
+        if not line.strip() or line.lstrip().startswith("#"):
+            continue
+        pattern, arrow, replacement = (part.strip() for part in line.partition("=>"))
+        if not arrow or not pattern:
+            raise ValueError(f"Invalid course name rule: {line.strip()}")
+        try:
+            re.compile(pattern)
+        except re.error as err:
+            raise ValueError(f"Invalid course name rule: {line.strip()}") from err
+        rules.append((pattern, replacement))
+    return rules
+
+class CourseNameNormalizer:
+    """Memoized course name cleaner with optional user rewrite rules.
+
+    Course names repeat on every planner item in a course, so results are
+    kept in a bounded LRU cache and each unique name is only cleaned once.
+    User rules are regex substitutions applied after the built-in cleanup.
+    """
+
+    def __init__(self, rules: list[tuple[str, str]] | None = None, max_size: int = 512) -> None:
+        """Initialize."""
+        self._rules = [(re.compile(pattern), replacement) for pattern, replacement in rules or []]
+        self._normalize = lru_cache(maxsize=max_size)(self._uncached)
+
+    def _uncached(self, name: str | None) -> str:
+        """Clean a name and apply the user rules."""
+        cleaned = _clean_course_name(name)
+        for pattern, replacement in self._rules:
+            cleaned = pattern.sub(replacement, cleaned).strip()
+        return sys.intern(cleaned or "Unknown Course")
+
+    def __call__(self, name: str | None) -> str:
+        """Return the cleaned course name."""
+        return self._normalize(name)
+
+_DEFAULT_NORMALIZER = CourseNameNormalizer()
+
+def clean_course_name(name: str | None) -> str:
+    """Clean up a Canvas course name with the built-in rules only."""
+    return _DEFAULT_NORMALIZER(name)
+
+# Descriptions shorter than this are stored as plain UTF-8
+_PACK_MIN_LENGTH = 128
+_PACKED_RAW = b"\x00"
+_PACKED_ZLIB = b"\x01"
+
+def pack_text(text: str | None) -> bytes:
+    """Pack text into compact bytes, compressing long HTML bodies."""
+    if not text:
+        return b""
+    raw = text.encode()
+    if len(raw) >= _PACK_MIN_LENGTH:
+        compressed = zlib.compress(raw, 1)
+        if len(compressed) < len(raw):
+            return _PACKED_ZLIB + compressed
+    return _PACKED_RAW + raw
+
+def unpack_text(packed: bytes) -> str:
+    """Decode bytes written by pack_text."""
+    if not packed:
+        return ""
+    if packed[:1] == _PACKED_ZLIB:
+        return zlib.decompress(packed[1:]).decode()
+    return packed[1:].decode()
+
+@dataclass(slots=True, init=False)
 class CanvasAssignment:
-    """Representation of a Canvas Assignment."""
+    """Representation of a Canvas Assignment.
+
+    Slotted to avoid a per-instance __dict__. Parsing keeps the raw HTML
+    description; it is packed the first time the packed form is needed
+    (the snapshot save after the assignment first appears), and from then
+    on only the packed bytes are held and decoded when a calendar event
+    needs them.
+    """
     id: str
     name: str
     course_name: str
     due_at: datetime | None
-    is_submitted: bool = False
-    description: str = ""
+    is_submitted: bool
+    _description: str | None = field(repr=False, compare=False)
+    _packed: bytes | None = field(repr=False, compare=False)
+    _description_hash: int | None = field(repr=False, compare=False)
+
+    def __init__(
+        self,
+        id: str,  # pylint: disable=redefined-builtin
+        name: str,
+        course_name: str,
+        due_at: datetime | None,
+        is_submitted: bool = False,
+        description: str = "",
+    ) -> None:
+        """Initialize."""
+        self.id = id
+        self.name = name
+        # Course names repeat across every item in a course; share one string
+        self.course_name = sys.intern(course_name)
+        self.due_at = due_at
+        self.is_submitted = is_submitted
+        self._description = description or ""
+        self._packed = None
+        self._description_hash = None
 
     @classmethod
-    def from_dict(cls, data: dict) -> CanvasAssignment:
+    def from_packed(
+        cls,
+        id: str,  # pylint: disable=redefined-builtin
+        name: str,
+        course_name: str,
+        due_at: datetime | None,
+        is_submitted: bool,
+        packed_description: bytes,
+    ) -> CanvasAssignment:
+        """Create with an already packed description."""
+        assignment = cls(id, name, course_name, due_at, is_submitted)
+        assignment._description = None
+        assignment._packed = packed_description
+        return assignment
+
+    @property
+    def description(self) -> str:
+        """Return the HTML description."""
+        if self._description is not None:
+            return self._description
+        return unpack_text(self._packed)
+
+    @property
+    def packed_description(self) -> bytes:
+        """Return the packed description, packing and dropping the raw text once."""
+        if self._packed is None:
+            self._packed = pack_text(self._description)
+            self._description = None
+        return self._packed
+
+    def __eq__(self, other: object) -> bool:
+        """Compare fields and description, whichever form each side holds."""
+        if not isinstance(other, CanvasAssignment):
+            return NotImplemented
+        return (
+            (self.id, self.name, self.course_name, self.due_at, self.is_submitted)
+            == (other.id, other.name, other.course_name, other.due_at, other.is_submitted)
+            and self.description == other.description
+        )
+
+    @property
+    def description_hash(self) -> int:
+        """Return a hash of the description for change detection."""
+        if self._description_hash is None:
+            self._description_hash = hash(self.description)
+        return self._description_hash
+
+    @classmethod
+    def from_dict(
+        cls,
+        data: dict,
+        normalize_course_name: Callable[[str | None], str] = clean_course_name,
+    ) -> CanvasAssignment:
         """Create from a Planner API item dictionary."""
         # Planner API has 'plannable' for the object and 'submissions' for status
         plannable = data.get("plannable", {})
@@ -88,46 +250,149 @@ class CanvasAssignment:
         return cls(
             id=str(plannable.get("id")),
             name=plannable.get("title", "Unknown"),
-            course_name=clean_course_name(data.get("context_name")),
+            course_name=normalize_course_name(data.get("context_name")),
             due_at=due_at,
             is_submitted=is_submitted,
             description=plannable.get("description", ""),
         )
 
+    def as_storage(self) -> list:
+        """Return a compact list form for the on-disk snapshot.
+
+        The description is stored packed, as base64.
+        """
+        return [
+            self.id,
+            self.name,
+            self.course_name,
+            self.due_at.isoformat() if self.due_at else None,
+            self.is_submitted,
+            base64.b64encode(self.packed_description).decode("ascii"),
+        ]
+
+    @classmethod
+    def from_storage(cls, data: list) -> CanvasAssignment:
+        """Create from the compact list form written by as_storage."""
+        assignment_id, name, course_name, due_at, is_submitted, packed = data
+        return cls.from_packed(
+            assignment_id,
+            name,
+            course_name,
+            datetime.fromisoformat(due_at) if due_at else None,
+            is_submitted,
+            base64.b64decode(packed, validate=True),
+        )
+
+def planner_item_student(item: dict) -> str | None:
+    """Return the student a planner item belongs to, if Canvas says."""
+    user_id = item.get("observed_user_id") or item.get("user_id")
+    return str(user_id) if user_id is not None else None
+
+def planner_item_context(item: dict) -> str | None:
+    """Return a planner item's course context code."""
+    if item.get("context_code"):
+        return item["context_code"]
+    course_id = item.get("course_id")
+    return f"course_{course_id}" if course_id is not None else None
+
+class AssignmentStore:
+    """Keyed store of one student's assignments, merged from planner windows.
+
+    A full sweep replaces the whole store; incremental syncs only replace
+    the items due inside the window that was re-fetched.
+    """
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self._items: dict[str, CanvasAssignment] = {}
+        self.context_codes: frozenset[str] | None = None
+
+    def needs_full_sync(self, context_codes: list[str]) -> bool:
+        """Return True if the store was never swept or the student's courses changed."""
+        return self.context_codes != frozenset(context_codes)
+
+    def replace_all(self, assignments: list[CanvasAssignment], context_codes: list[str]) -> None:
+        """Replace the store with the result of a full sweep."""
+        self._items = {assignment.id: assignment for assignment in assignments}
+        self.context_codes = frozenset(context_codes)
+
+    def merge_window(
+        self,
+        assignments: list[CanvasAssignment],
+        window_start: datetime,
+        window_end: datetime,
+    ) -> None:
+        """Merge a re-fetched window into the store.
+
+        Stored items due inside [window_start, window_end) that Canvas no
+        longer returned are dropped; everything outside is kept as-is.
+        """
+        items = {
+            assignment_id: assignment
+            for assignment_id, assignment in self._items.items()
+            if not (assignment.due_at and window_start <= assignment.due_at < window_end)
+        }
+        items.update((assignment.id, assignment) for assignment in assignments)
+        self._items = items
+
+    @property
+    def assignments(self) -> list[CanvasAssignment]:
+        """Return all stored assignments."""
+        return list(self._items.values())
+
+class AssignmentIndex:
+    """A student's assignments sorted by due date, for bisect range queries.
+
+    Built once per refresh. Unsubmitted items are kept in their own sorted
+    list since every sensor window hides submitted work.
+    """
+
+    def __init__(self, assignments: list[CanvasAssignment]) -> None:
+        """Initialize."""
+        self.by_due = sorted((a for a in assignments if a.due_at), key=lambda a: a.due_at)
+        self._pending = [a for a in self.by_due if not a.is_submitted]
+        self._pending_due = array("d", (a.due_at.timestamp() for a in self._pending))
+
+    def pending_between(
+        self,
+        start: datetime,
+        end: datetime,
+        include_start: bool = True,
+        include_end: bool = True,
+    ) -> list[CanvasAssignment]:
+        """Return unsubmitted assignments due between start and end."""
+        bisect_start = bisect_left if include_start else bisect_right
+        bisect_end = bisect_right if include_end else bisect_left
+        low = bisect_start(self._pending_due, start.timestamp())
+        high = bisect_end(self._pending_due, end.timestamp())
+        return self._pending[low:high]
+
+    def query(self, filter_type: str, now: datetime, days: int = 7) -> list[CanvasAssignment]:
+        """Return unsubmitted assignments for a sensor window, sorted by due date."""
+        # Calendar days are taken in the time zone of `now`
+        day_start = datetime.combine(now.date(), time.min, tzinfo=now.tzinfo)
+
+        if filter_type == "today":
+            return self.pending_between(day_start, day_start + timedelta(days=1), include_end=False)
+        if filter_type == "tomorrow":
+            return self.pending_between(
+                day_start + timedelta(days=1), day_start + timedelta(days=2), include_end=False
+            )
+        if filter_type == "upcoming_week":
+            return self.pending_between(now, now + timedelta(days=days), include_start=False)
+        if filter_type == "missed":
+            return self.pending_between(now - timedelta(days=days), now)
+        return []
+
 def filter_assignments(
     assignments: list[CanvasAssignment],
     now: datetime,
     filter_type: str,
     days: int = 7
 ) -> list[CanvasAssignment]:
-    """Filter assignments based on type."""
-    local_today = now.date()
-    filtered = []
+    """Filter assignments based on type.
 
-    for assignment in assignments:
-        # Hide anything already submitted from sensors
-        if assignment.is_submitted:
-            continue
-
-        if not assignment.due_at:
-            continue
-            
-        local_due = assignment.due_at.astimezone() # Assume system local if no tz
-        local_due_date = local_due.date()
-
-        include = False
-        if filter_type == "today":
-            include = local_due_date == local_today
-        elif filter_type == "tomorrow":
-            include = local_due_date == (local_today + timedelta(days=1))
-        elif filter_type == "upcoming_week":
-            limit = now + timedelta(days=days)
-            include = now < assignment.due_at <= limit
-        elif filter_type == "missed":
-            limit = now - timedelta(days=days)
-            include = limit <= assignment.due_at <= now
-
-        if include:
-            filtered.append(assignment)
-
-    return filtered
+    Convenience wrapper for one-off queries; entities should reuse the
+    student's prebuilt AssignmentIndex instead.
+    """
+    return AssignmentIndex(assignments).query(filter_type, now, days=days)
@@ -1,20 +1,19 @@
 """Calendar platform for Canvas LMS."""
 from __future__ import annotations
 
-from datetime import datetime, timedelta
+from datetime import datetime
 import logging
 
 from homeassistant.components.calendar import CalendarEntity, CalendarEvent
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from homeassistant.util import dt as dt_util
 
-from homeassistant.helpers.device_registry import DeviceInfo
 from .const import DOMAIN
 from .coordinator import CanvasDataUpdateCoordinator
-from .calendar_logic import get_calendar_events
+from .entity import CanvasStudentEntity
+from .calendar_logic import CalendarEventIndex
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -32,7 +31,7 @@ async def async_setup_entry(
 
     async_add_entities(entities)
 
-class CanvasCalendarEntity(CoordinatorEntity[CanvasDataUpdateCoordinator], CalendarEntity):
+class CanvasCalendarEntity(CanvasStudentEntity, CalendarEntity):
     """Representation of a Canvas Assignment Calendar."""
 
     def __init__(
@@ -42,43 +41,42 @@ class CanvasCalendarEntity(CoordinatorEntity[CanvasDataUpdateCoordinator], Calen
         student_name: str,
     ) -> None:
         """Initialize the calendar."""
-        super().__init__(coordinator)
-        self._student_id = student_id
-        self._student_name = student_name
+        super().__init__(coordinator, student_id, student_name)
         self._attr_name = f"Canvas - {student_name} Assignments"
         self._attr_unique_id = f"canvas_{student_id}_calendar"
-        self._attr_device_info = DeviceInfo(
-            identifiers={(DOMAIN, student_id)},
-            name=student_name,
-            manufacturer="Canvas LMS",
-            model="Student",
-        )
-
-    @property
-    def event(self) -> CalendarEvent | None:
-        """Return the next upcoming event."""
-        now = dt_util.now()
-        events = self._get_events(now, now + timedelta(days=365))
-        return events[0] if events else None
 
-    def _get_events(self, start_date: datetime, end_date: datetime) -> list[CalendarEvent]:
-        """Get events between two dates."""
-        student_data = self.coordinator.data["student_data"].get(self._student_id)
-        if not student_data:
-            return []
+        self._index: CalendarEventIndex | None = None
+        self._index_fingerprint: int | None = None
+        self._refresh_state()
 
-        logic_events = get_calendar_events(student_data.assignments, start_date, end_date)
-        
-        return [
-            CalendarEvent(
+    def _build_index(self) -> CalendarEventIndex:
+        """Build this student's calendar index from coordinator data."""
+        student_data = self.student_data
+        return CalendarEventIndex(
+            student_data.index.by_due if student_data else [],
+            factory=lambda event: CalendarEvent(
                 summary=event.summary,
                 start=event.start,
                 end=event.end,
                 description=event.description,
                 location=event.location,
-            )
-            for event in logic_events
-        ]
+            ),
+        )
+
+    def _compute_state(self) -> int | None:
+        """Rebuild the calendar index when the student's assignments changed."""
+        student_data = self.student_data
+        fingerprint = student_data.fingerprint if student_data else None
+        # CalendarEntity schedules its own writes at event start and end
+        if self._index is None or fingerprint != self._index_fingerprint:
+            self._index = self._build_index()
+            self._index_fingerprint = fingerprint
+        return fingerprint
+
+    @property
+    def event(self) -> CalendarEvent | None:
+        """Return the next upcoming event."""
+        return self._index.next_event(dt_util.now())
 
     async def async_get_events(
         self,
@@ -87,4 +85,4 @@ class CanvasCalendarEntity(CoordinatorEntity[CanvasDataUpdateCoordinator], Calen
         end_date: datetime,
     ) -> list[CalendarEvent]:
         """Return calendar events between two dates."""
-        return self._get_events(start_date, end_date)
+        return self._index.between(start_date, end_date)
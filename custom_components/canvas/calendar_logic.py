@@ -1,8 +1,12 @@
 """Logic for Canvas calendar events."""
 from __future__ import annotations
 
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Callable
 from dataclasses import dataclass
 from datetime import datetime, timedelta
+from typing import Any
 from .assignment_logic import CanvasAssignment
 
 @dataclass
@@ -14,27 +18,66 @@ class CalendarEventData:
     description: str
     location: str = "Canvas"
 
+def event_from_assignment(assignment: CanvasAssignment) -> CalendarEventData:
+    """Build the calendar event for an assignment with a due date."""
+    return CalendarEventData(
+        summary=f"[{assignment.course_name}] {assignment.name}",
+        start=assignment.due_at,
+        end=assignment.due_at + timedelta(hours=1),
+        description=assignment.description,
+    )
+
 def get_calendar_events(
     assignments: list[CanvasAssignment],
     start_date: datetime,
     end_date: datetime
 ) -> list[CalendarEventData]:
     """Transform assignments into calendar events within a range."""
-    events = []
-    for assignment in assignments:
-        if not assignment.due_at:
-            continue
-
-        if start_date <= assignment.due_at <= end_date:
-            events.append(
-                CalendarEventData(
-                    summary=f"[{assignment.course_name}] {assignment.name}",
-                    start=assignment.due_at,
-                    end=assignment.due_at + timedelta(hours=1),
-                    description=assignment.description,
-                )
-            )
+    events = [
+        event_from_assignment(assignment)
+        for assignment in assignments
+        if assignment.due_at and start_date <= assignment.due_at <= end_date
+    ]
 
     # Sort by start date
     events.sort(key=lambda x: x.start)
     return events
+
+class CalendarEventIndex:
+    """Calendar events sorted by start time.
+
+    Built once per refresh so range queries are bisect slices and the next
+    event is a single lookup. Events are converted on first access and then
+    reused, so descriptions are only decoded for ranges that are viewed.
+    """
+
+    def __init__(
+        self,
+        assignments: list[CanvasAssignment],
+        factory: Callable[[CalendarEventData], Any] = lambda event: event,
+    ) -> None:
+        """Initialize from assignments; factory converts each event once."""
+        self._assignments = sorted((a for a in assignments if a.due_at), key=lambda a: a.due_at)
+        self._starts = array("d", (a.due_at.timestamp() for a in self._assignments))
+        self._events: list[Any | None] = [None] * len(self._assignments)
+        self._factory = factory
+
+    def _event(self, position: int) -> Any:
+        """Return the event at a position, building it on first access."""
+        event = self._events[position]
+        if event is None:
+            event = self._events[position] = self._factory(
+                event_from_assignment(self._assignments[position])
+            )
+        return event
+
+    def between(self, start_date: datetime, end_date: datetime) -> list[Any]:
+        """Return events starting between start_date and end_date (inclusive)."""
+        low = bisect_left(self._starts, start_date.timestamp())
+        high = bisect_right(self._starts, end_date.timestamp())
+        return [self._event(position) for position in range(low, high)]
+
+    def next_event(self, now: datetime) -> Any | None:
+        """Return the first event starting at or after now."""
+        position = bisect_left(self._starts, now.timestamp())
+        return self._event(position) if position < len(self._starts) else None
@@ -6,11 +6,43 @@ from typing import Any
 
 import voluptuous as vol
 from homeassistant import config_entries
+from homeassistant.core import callback
 from homeassistant.data_entry_flow import FlowResult
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
 from .api import CanvasAPI
-from .const import DOMAIN, CONF_URL, CONF_TOKEN
+from .assignment_logic import parse_course_name_rules
+from .course_filter_logic import parse_course_filter_rules
+from .const import (
+    DOMAIN,
+    CONF_URL,
+    CONF_TOKEN,
+    CONF_UPCOMING_DAYS,
+    CONF_MISSED_DAYS,
+    CONF_MAX_CONCURRENT_STUDENTS,
+    CONF_MAX_CONCURRENT_REQUESTS,
+    CONF_COURSE_NAME_RULES,
+    CONF_COURSE_FILTER_RULES,
+    CONF_STUDENTS_INTERVAL,
+    CONF_COURSES_INTERVAL,
+    CONF_PLANNER_NEAR_INTERVAL,
+    CONF_PLANNER_FAR_INTERVAL,
+    CONF_PROFILE_REFRESH,
+    CONF_BATCH_COURSES,
+    CONF_BULK_PLANNER,
+    CONF_WEBHOOK,
+    CONF_DATA_SOURCE,
+    DATA_SOURCE_GRAPHQL,
+    DATA_SOURCE_REST,
+    DEFAULT_UPCOMING_DAYS,
+    DEFAULT_MISSED_DAYS,
+    DEFAULT_MAX_CONCURRENT_STUDENTS,
+    DEFAULT_MAX_CONCURRENT_REQUESTS,
+    DEFAULT_STUDENTS_INTERVAL,
+    DEFAULT_COURSES_INTERVAL,
+    DEFAULT_PLANNER_NEAR_INTERVAL,
+    DEFAULT_PLANNER_FAR_INTERVAL,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -26,6 +58,14 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
     VERSION = 1
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+        config_entry: config_entries.ConfigEntry,
+    ) -> OptionsFlowHandler:
+        """Get the options flow for this handler."""
+        return OptionsFlowHandler()
+
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
@@ -33,6 +73,8 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         errors: dict[str, str] = {}
         if user_input is not None:
             try:
+                # A one-off check; validating on HA's shared session avoids
+                # opening a Canvas pool that no entry may ever hold
                 session = async_get_clientsession(self.hass)
                 api = CanvasAPI(user_input[CONF_URL], user_input[CONF_TOKEN], session)
                 await api.async_get_user_info()
@@ -45,3 +87,90 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         return self.async_show_form(
             step_id="user", data_schema=STEP_USER_DATA_SCHEMA, errors=errors
         )
+
+class OptionsFlowHandler(config_entries.OptionsFlow):
+    """Handle Canvas LMS options."""
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Manage the options."""
+        errors: dict[str, str] = {}
+        if user_input is not None:
+            try:
+                parse_course_name_rules(user_input.get(CONF_COURSE_NAME_RULES))
+            except ValueError:
+                errors[CONF_COURSE_NAME_RULES] = "invalid_rule"
+            try:
+                parse_course_filter_rules(user_input.get(CONF_COURSE_FILTER_RULES))
+            except ValueError:
+                errors[CONF_COURSE_FILTER_RULES] = "invalid_rule"
+            if not errors:
+                return self.async_create_entry(title="", data=user_input)
+
+        options = self.config_entry.options
+        schema = vol.Schema(
+            {
+                vol.Optional(
+                    CONF_UPCOMING_DAYS,
+                    default=options.get(CONF_UPCOMING_DAYS, DEFAULT_UPCOMING_DAYS),
+                ): vol.All(int, vol.Range(min=1, max=60)),
+                vol.Optional(
+                    CONF_MISSED_DAYS,
+                    default=options.get(CONF_MISSED_DAYS, DEFAULT_MISSED_DAYS),
+                ): vol.All(int, vol.Range(min=1, max=60)),
+                vol.Optional(
+                    CONF_MAX_CONCURRENT_STUDENTS,
+                    default=options.get(CONF_MAX_CONCURRENT_STUDENTS, DEFAULT_MAX_CONCURRENT_STUDENTS),
+                ): vol.All(int, vol.Range(min=1, max=20)),
+                vol.Optional(
+                    CONF_MAX_CONCURRENT_REQUESTS,
+                    default=options.get(CONF_MAX_CONCURRENT_REQUESTS, DEFAULT_MAX_CONCURRENT_REQUESTS),
+                ): vol.All(int, vol.Range(min=1, max=20)),
+                vol.Optional(
+                    CONF_STUDENTS_INTERVAL,
+                    default=options.get(CONF_STUDENTS_INTERVAL, DEFAULT_STUDENTS_INTERVAL),
+                ): vol.All(int, vol.Range(min=5, max=7 * 24 * 60)),
+                vol.Optional(
+                    CONF_COURSES_INTERVAL,
+                    default=options.get(CONF_COURSES_INTERVAL, DEFAULT_COURSES_INTERVAL),
+                ): vol.All(int, vol.Range(min=5, max=7 * 24 * 60)),
+                vol.Optional(
+                    CONF_PLANNER_NEAR_INTERVAL,
+                    default=options.get(CONF_PLANNER_NEAR_INTERVAL, DEFAULT_PLANNER_NEAR_INTERVAL),
+                ): vol.All(int, vol.Range(min=1, max=24 * 60)),
+                vol.Optional(
+                    CONF_PLANNER_FAR_INTERVAL,
+                    default=options.get(CONF_PLANNER_FAR_INTERVAL, DEFAULT_PLANNER_FAR_INTERVAL),
+                ): vol.All(int, vol.Range(min=5, max=7 * 24 * 60)),
+                vol.Optional(
+                    CONF_COURSE_NAME_RULES,
+                    default=options.get(CONF_COURSE_NAME_RULES, ""),
+                ): str,
+                vol.Optional(
+                    CONF_COURSE_FILTER_RULES,
+                    default=options.get(CONF_COURSE_FILTER_RULES, ""),
+                ): str,
+                vol.Optional(
+                    CONF_DATA_SOURCE,
+                    default=options.get(CONF_DATA_SOURCE, DATA_SOURCE_REST),
+                ): vol.In([DATA_SOURCE_REST, DATA_SOURCE_GRAPHQL]),
+                vol.Optional(
+                    CONF_BATCH_COURSES,
+                    default=options.get(CONF_BATCH_COURSES, False),
+                ): bool,
+                vol.Optional(
+                    CONF_BULK_PLANNER,
+                    default=options.get(CONF_BULK_PLANNER, False),
+                ): bool,
+                vol.Optional(
+                    CONF_WEBHOOK,
+                    default=options.get(CONF_WEBHOOK, False),
+                ): bool,
+                vol.Optional(
+                    CONF_PROFILE_REFRESH,
+                    default=options.get(CONF_PROFILE_REFRESH, False),
+                ): bool,
+            }
+        )
+        return self.async_show_form(step_id="init", data_schema=schema, errors=errors)
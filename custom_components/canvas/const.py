@@ -4,6 +4,7 @@ DOMAIN = "canvas"
 
 CONF_URL = "url"
 CONF_TOKEN = "token"
+CONF_WEBHOOK_ID = "webhook_id"
 
 ATTR_COURSES = "courses"
 ATTR_STUDENTS = "students"
@@ -13,8 +14,64 @@ ATTR_ASSIGNMENTS = "assignments"
 CONF_UPCOMING_DAYS = "upcoming_days"
 CONF_MISSED_DAYS = "missed_days"
 
+CONF_MAX_CONCURRENT_STUDENTS = "max_concurrent_students"
+CONF_MAX_CONCURRENT_REQUESTS = "max_concurrent_requests"
+# Extra course name rewrites, one "pattern => replacement" per line
+CONF_COURSE_NAME_RULES = "course_name_rules"
+# Extra course filter rules, evaluated before the built-in ones
+CONF_COURSE_FILTER_RULES = "course_filter_rules"
+# Per-tier refresh intervals, in minutes
+CONF_STUDENTS_INTERVAL = "students_interval"
+CONF_COURSES_INTERVAL = "courses_interval"
+CONF_PLANNER_NEAR_INTERVAL = "planner_near_interval"
+CONF_PLANNER_FAR_INTERVAL = "planner_far_interval"
+# Resolve all observees' courses from one /api/v1/courses crawl
+CONF_BATCH_COURSES = "batch_courses"
+# Sweep several observees' planners in one combined query, when Canvas supports it
+CONF_BULK_PLANNER = "bulk_planner"
+# Where courses and assignments come from
+CONF_DATA_SOURCE = "data_source"
+DATA_SOURCE_REST = "rest"
+DATA_SOURCE_GRAPHQL = "graphql"
+# Accept pushed Canvas events on an HA webhook
+CONF_WEBHOOK = "webhook"
+# Capture a cProfile of the first refresh after the entry (re)loads
+CONF_PROFILE_REFRESH = "profile_refresh"
+
 DEFAULT_UPCOMING_DAYS = 7
 DEFAULT_MISSED_DAYS = 7
+DEFAULT_MAX_CONCURRENT_STUDENTS = 4
+DEFAULT_MAX_CONCURRENT_REQUESTS = 6
+DEFAULT_MAX_CONCURRENT_PAGES = 4
+DEFAULT_RESPONSE_CACHE_SIZE = 256
+# Nodes per page of a GraphQL connection
+GRAPHQL_PAGE_SIZE = 100
+# Seconds an identical GET is answered from memory instead of Canvas
+DEFAULT_REQUEST_TTL = 30
+# Connection pool shared by every entry on one Canvas host
+TRANSPORT_MAX_CONNECTIONS = 10
+TRANSPORT_KEEPALIVE_TIMEOUT = 30
+TRANSPORT_DNS_CACHE_TTL = 300
+# Entries on the same host start refreshing at offsets spread over this window (seconds)
+REFRESH_STAGGER_WINDOW = 300
+DEFAULT_STUDENTS_INTERVAL = 24 * 60
+DEFAULT_COURSES_INTERVAL = 60
+DEFAULT_PLANNER_NEAR_INTERVAL = 15
+DEFAULT_PLANNER_FAR_INTERVAL = 12 * 60
+
+# Planner window for a full sweep, and the hot window re-fetched in between
+PLANNER_PAST_DAYS = 30
+PLANNER_FUTURE_DAYS = 365
+PLANNER_HOT_PAST_DAYS = 8
+PLANNER_HOT_FUTURE_DAYS = 15
+
+# 2: descriptions are stored packed (base64) instead of as raw HTML
+STORAGE_VERSION = 2
+# Seconds to coalesce snapshot writes after a refresh
+STORAGE_SAVE_DELAY = 10
+
+# Number of functions kept from a profiled refresh
+PROFILE_TOP_FUNCTIONS = 30
 
 STARTUP_MESSAGE = f"""
 -------------------------------------------------------------------
@@ -1,22 +1,86 @@
 """DataUpdateCoordinator for Canvas LMS."""
 from __future__ import annotations
 
+import asyncio
+import cProfile
+from contextlib import aclosing
 from datetime import timedelta
+import io
 import logging
+import pstats
+import time
+from typing import Any
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
-from homeassistant.util import dt as dt_util
 
 from .api import CanvasAPI
-from .const import DOMAIN
-from .assignment_logic import CanvasAssignment
-from .student_logic import CanvasStudentData
-from datetime import datetime, timedelta
+from .const import (
+    DOMAIN,
+    CONF_BATCH_COURSES,
+    CONF_BULK_PLANNER,
+    CONF_COURSE_FILTER_RULES,
+    CONF_COURSE_NAME_RULES,
+    CONF_COURSES_INTERVAL,
+    CONF_DATA_SOURCE,
+    CONF_MAX_CONCURRENT_STUDENTS,
+    CONF_MISSED_DAYS,
+    CONF_PLANNER_FAR_INTERVAL,
+    CONF_PLANNER_NEAR_INTERVAL,
+    CONF_PROFILE_REFRESH,
+    CONF_STUDENTS_INTERVAL,
+    CONF_UPCOMING_DAYS,
+    DEFAULT_COURSES_INTERVAL,
+    DEFAULT_MAX_CONCURRENT_STUDENTS,
+    DEFAULT_MISSED_DAYS,
+    DEFAULT_PLANNER_FAR_INTERVAL,
+    DEFAULT_PLANNER_NEAR_INTERVAL,
+    DEFAULT_STUDENTS_INTERVAL,
+    DEFAULT_UPCOMING_DAYS,
+    DATA_SOURCE_GRAPHQL,
+    PLANNER_PAST_DAYS,
+    PLANNER_FUTURE_DAYS,
+    PLANNER_HOT_PAST_DAYS,
+    PLANNER_HOT_FUTURE_DAYS,
+    PROFILE_TOP_FUNCTIONS,
+    STORAGE_VERSION,
+    STORAGE_SAVE_DELAY,
+)
+from .assignment_logic import (
+    AssignmentStore,
+    CanvasAssignment,
+    CourseNameNormalizer,
+    parse_course_name_rules,
+    planner_item_context,
+    planner_item_student,
+)
+from .course_filter_logic import CourseFilter
+from .event_logic import CanvasEvent
+from .graphql import CanvasGraphQLSource
+from .refresh_logic import (
+    RefreshSchedule,
+    TIER_COURSES,
+    TIER_PLANNER_FAR,
+    TIER_PLANNER_NEAR,
+    TIER_STUDENTS,
+)
+from .stats_logic import RefreshStats, current_refresh
+from .student_logic import (
+    CanvasStudentData,
+    build_grade_map,
+    snapshot_from_storage,
+    snapshot_to_storage,
+    split_observer_courses,
+)
+from datetime import datetime, timedelta, timezone
 
 _LOGGER = logging.getLogger(__name__)
 
+# Planner item types converted into assignments; everything else is dropped
+PLANNABLE_TYPES = frozenset({"assignment"})
+
 class CanvasDataUpdateCoordinator(DataUpdateCoordinator):
     """Class to manage fetching Canvas data."""
 
@@ -29,101 +93,434 @@ class CanvasDataUpdateCoordinator(DataUpdateCoordinator):
         """Initialize."""
         self.api = api
         self.entry = entry
-        
+        # Serves the per-student course and planner calls
+        self.source: CanvasAPI | CanvasGraphQLSource = (
+            CanvasGraphQLSource(api)
+            if entry.options.get(CONF_DATA_SOURCE) == DATA_SOURCE_GRAPHQL
+            else api
+        )
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}")
+        # Per-student assignments, kept across refreshes for incremental planner syncs
+        self._assignment_stores: dict[str, AssignmentStore] = {}
+        self.course_name_normalizer = CourseNameNormalizer(
+            parse_course_name_rules(entry.options.get(CONF_COURSE_NAME_RULES))
+        )
+        # Compiled once; verdicts are shared by every student's course list
+        self.course_filter = CourseFilter.from_options(entry.options.get(CONF_COURSE_FILTER_RULES))
+        # Per-student filtered courses, reused until the courses tier is due
+        self._courses: dict[str, list[dict]] = {}
+        self._schedule = RefreshSchedule(
+            {
+                tier: timedelta(minutes=entry.options.get(conf_key, default))
+                for tier, conf_key, default in (
+                    (TIER_STUDENTS, CONF_STUDENTS_INTERVAL, DEFAULT_STUDENTS_INTERVAL),
+                    (TIER_COURSES, CONF_COURSES_INTERVAL, DEFAULT_COURSES_INTERVAL),
+                    (TIER_PLANNER_NEAR, CONF_PLANNER_NEAR_INTERVAL, DEFAULT_PLANNER_NEAR_INTERVAL),
+                    (TIER_PLANNER_FAR, CONF_PLANNER_FAR_INTERVAL, DEFAULT_PLANNER_FAR_INTERVAL),
+                )
+            }
+        )
+
+        # Cleared if Canvas turns out not to attribute combined planner items
+        self._bulk_planner_supported = bool(entry.options.get(CONF_BULK_PLANNER, False))
+        # Set once a combined sweep has attributed items to a student
+        self._bulk_planner_confirmed = False
+        # Timings for the refresh in progress and the last one that finished
+        self._stats = RefreshStats()
+        self.last_refresh_stats: RefreshStats | None = None
+        self._profile_pending = bool(entry.options.get(CONF_PROFILE_REFRESH, False))
+        self.last_profile: str | None = None
+
         super().__init__(
             hass,
             _LOGGER,
             name=DOMAIN,
-            update_interval=timedelta(minutes=30),
+            # Tick at the fastest tier; slower tiers skip until they are due
+            update_interval=self._schedule.min_interval,
         )
 
+    async def async_load_snapshot(self) -> bool:
+        """Hydrate data from the last good snapshot on disk.
+
+        Returns True if a snapshot was loaded, so entities can be set up
+        without waiting on Canvas.
+        """
+        try:
+            stored = await self._store.async_load()
+        except Exception as err:  # pylint: disable=broad-except
+            _LOGGER.warning("Could not load stored Canvas snapshot: %s", err)
+            return False
+
+        if not stored or not stored.get("student_data"):
+            return False
+
+        try:
+            self.data = snapshot_from_storage(stored)
+        except (KeyError, TypeError, ValueError) as err:
+            _LOGGER.warning("Discarding unreadable Canvas snapshot: %s", err)
+            return False
+
+        _LOGGER.debug("Loaded Canvas snapshot with %s students", len(self.data["student_data"]))
+        return True
+
     async def _async_update_data(self) -> dict:
-        """Update data via library."""
+        """Update data, recording timings and profiling the refresh if requested."""
+        self._stats = stats = RefreshStats()
+        token = current_refresh.set(stats)
+        try:
+            if not self._profile_pending:
+                return await self._async_refresh_all()
+            self._profile_pending = False
+            return await self._async_profile(self._async_refresh_all())
+        finally:
+            current_refresh.reset(token)
+            stats.finish()
+            self.last_refresh_stats = stats
+
+    async def _async_profile(self, refresh) -> dict:
+        """Run a refresh under cProfile and keep the top functions as text.
+
+        The profiler sees everything on the event loop while the refresh is
+        awaiting, so other integrations can show up in the output.
+        """
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            return await refresh
+        finally:
+            profiler.disable()
+            output = io.StringIO()
+            pstats.Stats(profiler, stream=output).sort_stats("cumulative").print_stats(
+                PROFILE_TOP_FUNCTIONS
+            )
+            self.last_profile = output.getvalue()
+            _LOGGER.info("Captured profile of Canvas refresh:\n%s", self.last_profile)
+
+    async def _async_refresh_all(self) -> dict:
+        """Update data via library.
+
+        Each data class is refreshed on its own schedule; tiers that are not
+        due reuse the previous result and are merged into one snapshot.
+        """
+        now = time.monotonic()
+        if self.data and self.data.get("students") and not self._schedule.is_due(TIER_STUDENTS, None, now):
+            students = self.data["students"]
+        else:
+            try:
+                # 1. Get Students (Observees)
+                students = await self.api.async_get_students()
+                if not students:
+                    # If no observees, maybe the user is a student themselves?
+                    user_info = await self.api.async_get_user_info()
+                    students = [user_info] # Minimal student info
+            except Exception as exception:
+                raise UpdateFailed(f"Error communicating with API: {exception}") from exception
+            self._schedule.mark(TIER_STUDENTS, None, now)
+
+        data = {}
+        data["students"] = students
+        data["student_data"] = {}
+        _LOGGER.debug("Found %s students", len(students))
+
+        if self.entry.options.get(CONF_BATCH_COURSES, False):
+            await self._async_fetch_batched_courses(students, now)
+        if self._bulk_planner_supported:
+            await self._async_bulk_sync_planner(students, now)
+
+        # 2. Run each student's course -> planner chain concurrently, bounded
+        # so large observer accounts don't open dozens of crawls at once
+        semaphore = asyncio.Semaphore(
+            self.entry.options.get(CONF_MAX_CONCURRENT_STUDENTS, DEFAULT_MAX_CONCURRENT_STUDENTS)
+        )
+
+        async def _bounded_update(student: dict) -> CanvasStudentData:
+            async with semaphore:
+                started = time.monotonic()
+                try:
+                    return await self._async_update_student(student, now)
+                finally:
+                    self._stats.student_wall[student["id"]] = time.monotonic() - started
+
+        results = await asyncio.gather(
+            *(_bounded_update(student) for student in students),
+            return_exceptions=True,
+        )
+
+        failed = 0
+        for student, result in zip(students, results):
+            student_id = student["id"]
+            if isinstance(result, asyncio.CancelledError):
+                raise result
+            if isinstance(result, Exception):
+                failed += 1
+                _LOGGER.warning("Error refreshing Canvas data for student %s: %s", student_id, result)
+                result = self._failed_student_data(student, result)
+            data["student_data"][student_id] = result
+
+        if students and failed == len(students):
+            raise UpdateFailed(f"Error communicating with API: all {failed} students failed to refresh")
+
+        with self._stats.stage("grades"):
+            data["grades"] = build_grade_map(data["student_data"])
+        self._store.async_delay_save(lambda: snapshot_to_storage(data), STORAGE_SAVE_DELAY)
+        return data
+
+    async def _async_update_student(self, student: dict, now: float) -> CanvasStudentData:
+        """Refresh whichever of a student's courses and planner tiers are due."""
+        student_id = student["id"]
+        final_courses = self._courses.get(student_id)
+        if final_courses is None or self._schedule.is_due(TIER_COURSES, student_id, now):
+            final_courses = await self._async_fetch_courses(student_id)
+            self._courses[student_id] = final_courses
+            self._schedule.mark(TIER_COURSES, student_id, now)
+
+        context_codes = [f"course_{course['id']}" for course in final_courses]
+
+        # 3. Get Assignments/Submissions via Planner API
+        assignment_store = self._assignment_stores.setdefault(student_id, AssignmentStore())
+        if not context_codes:
+            assignment_store.replace_all([], context_codes)
+        elif assignment_store.needs_full_sync(context_codes) or self._schedule.is_due(
+            TIER_PLANNER_FAR, student_id, now
+        ):
+            await self._async_sync_planner(student_id, context_codes, assignment_store, full_sync=True)
+            self._schedule.mark(TIER_PLANNER_FAR, student_id, now)
+            self._schedule.mark(TIER_PLANNER_NEAR, student_id, now)
+        elif self._schedule.is_due(TIER_PLANNER_NEAR, student_id, now):
+            await self._async_sync_planner(student_id, context_codes, assignment_store, full_sync=False)
+            self._schedule.mark(TIER_PLANNER_NEAR, student_id, now)
+        all_assignments = assignment_store.assignments
+
+        _LOGGER.debug("Student %s: found %s total assignments via Planner", student_id, len(all_assignments))
+
+        # Wrap in student logic class
+        with self._stats.stage("index"):
+            return CanvasStudentData(
+                student_id=student_id,
+                name=student.get("name", f"Student {student_id}"),
+                courses=final_courses,
+                assignments=all_assignments
+            )
+
+    async def _async_fetch_batched_courses(self, students: list[dict], now: float) -> None:
+        """Resolve every due student's courses from one observer course crawl.
+
+        Students the batch doesn't cover (no observed enrollments returned,
+        or the request failed) are left due and fall back to their own
+        per-student fetch.
+        """
+        due = [
+            student["id"]
+            for student in students
+            if student["id"] not in self._courses or self._schedule.is_due(TIER_COURSES, student["id"], now)
+        ]
+        if not due:
+            return
+
         try:
-            data = {}
-            # 1. Get Students (Observees)
-            students = await self.api.async_get_students()
-            if not students:
-                # If no observees, maybe the user is a student themselves?
-                user_info = await self.api.async_get_user_info()
-                students = [user_info] # Minimal student info
-            
-            data["students"] = students
-            data["student_data"] = {}
-            _LOGGER.debug("Found %s students", len(students))
-
-            for student in students:
-                student_id = student["id"]
-                # 2. Get ALL Courses with Grades in 1 call
-                courses = await self.api.async_get_courses(user_id=student_id)
-                _LOGGER.debug("Found %s courses for student %s", len(courses), student_id)
-                
-                final_courses = []
-                context_codes = []
-                now = dt_util.now()
-                grace_period = timedelta(days=7)
-
-                for course in courses:
-                    if not course.get("name"):
-                        continue
-                    
-                    # 1. Filter out archived courses by name
-                    term_name = course.get("term", {}).get("name", "")
-                    if "Archive" in term_name:
-                        _LOGGER.debug("Skipping archived course by name: %s (%s)", course.get("name"), term_name)
-                        continue
-
-                    # 2. Filter out administrative/portal courses
-                    course_name = course.get("name", "")
-                    if any(word in course_name for word in ["Students", "Hub"]):
-                        _LOGGER.debug("Skipping administrative course: %s", course_name)
-                        continue
-
-                    # 3. Filter out courses that have already ended (with 7-day grace)
-                    # Check both course and term end dates
-                    end_str = course.get("end_at") or course.get("term", {}).get("end_at")
-                    if end_str:
-                        try:
-                            # Parse with Home Assistant utility for consistency
-                            end_date = dt_util.parse_datetime(end_str)
-                            if end_date and (end_date + grace_period) < now:
-                                _LOGGER.debug(
-                                    "Skipping ended course: %s (Ended: %s)", 
-                                    course.get("name"), 
-                                    end_str
-                                )
-                                continue
-                        except (ValueError, TypeError):
-                            _LOGGER.warning("Could not parse end_at for course %s", course.get("id"))
-
-                    final_courses.append(course)
-                    context_codes.append(f"course_{course['id']}")
-
-                # 3. Get ALL Assignments/Submissions via Planner API in 1 call
-                # Setting range from 30 days ago to 365 days ahead
-                start_date = (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d")
-                end_date = (datetime.now() + timedelta(days=365)).strftime("%Y-%m-%d")
-                
-                all_assignments = []
-                if context_codes:
-                    planner_items = await self.api.async_get_planner_items(
-                        student_id, start_date, end_date, context_codes
+            courses = await self.api.async_get_observer_courses()
+        except Exception as err:  # pylint: disable=broad-except
+            _LOGGER.debug("Batched course fetch failed, using per-student fetches: %s", err)
+            return
+
+        with self._stats.stage("course_filter"):
+            # Filter the shared course table once, then split it per student
+            per_student = split_observer_courses(self._filter_courses(courses), due)
+        for student_id, student_courses in per_student.items():
+            if student_courses:
+                self._courses[student_id] = student_courses
+                self._schedule.mark(TIER_COURSES, student_id, now)
+        _LOGGER.debug(
+            "Batched course fetch covered %s of %s students",
+            sum(1 for student_courses in per_student.values() if student_courses),
+            len(due),
+        )
+
+    async def _async_fetch_courses(self, student_id: str) -> list[dict]:
+        """Fetch a student's courses and drop archived, administrative and ended ones."""
+        # Get ALL Courses with Grades in 1 call
+        courses = await self.source.async_get_courses(student_id)
+        _LOGGER.debug("Found %s courses for student %s", len(courses), student_id)
+
+        with self._stats.stage("course_filter"):
+            return self._filter_courses(courses)
+
+    def _filter_courses(self, courses: list[dict]) -> list[dict]:
+        """Keep the courses the filter pipeline allows."""
+        now = datetime.now(timezone.utc)
+        return [course for course in courses if self.course_filter(course, now)]
+
+    def _planner_window(self, full_sync: bool) -> tuple[datetime, datetime]:
+        """Return the planner window for a full sweep or an incremental sync."""
+        now = datetime.now().astimezone()
+        if full_sync:
+            return now - timedelta(days=PLANNER_PAST_DAYS), now + timedelta(days=PLANNER_FUTURE_DAYS)
+
+        # Always cover the sensor windows so their submission state stays fresh
+        past_days = max(
+            PLANNER_HOT_PAST_DAYS,
+            self.entry.options.get(CONF_MISSED_DAYS, DEFAULT_MISSED_DAYS) + 1,
+        )
+        future_days = max(
+            PLANNER_HOT_FUTURE_DAYS,
+            self.entry.options.get(CONF_UPCOMING_DAYS, DEFAULT_UPCOMING_DAYS) + 1,
+        )
+        return now - timedelta(days=past_days), now + timedelta(days=future_days)
+
+    async def _async_bulk_sync_planner(self, students: list[dict], now: float) -> None:
+        """Run the due full planner sweeps for several students as one crawl.
+
+        Items are attributed back to students by their observed user and
+        course. If Canvas returns items without a user, the instance doesn't
+        support combined queries; bulk mode is turned off until reload and
+        every student falls back to their own crawl.
+
+        Results are only kept once at least one item was attributed to a
+        student. An empty sweep proves nothing (stock Canvas answers the
+        unscoped query from the observer's own, usually empty, planner), so
+        the students fall back to their own crawls, and bulk mode is turned
+        off unless an earlier sweep has already confirmed it works.
+        """
+        due: dict[str, tuple[Any, list[str]]] = {}
+        for student in students:
+            student_id = student["id"]
+            courses = self._courses.get(student_id)
+            if not courses:
+                continue
+            context_codes = [f"course_{course['id']}" for course in courses]
+            store = self._assignment_stores.setdefault(student_id, AssignmentStore())
+            if store.needs_full_sync(context_codes) or self._schedule.is_due(
+                TIER_PLANNER_FAR, student_id, now
+            ):
+                due[str(student_id)] = (student_id, context_codes)
+        if len(due) < 2:
+            return
+
+        start, end = self._planner_window(full_sync=True)
+        all_codes = sorted({code for _, context_codes in due.values() for code in context_codes})
+        assignments: dict[str, list[CanvasAssignment]] = {key: [] for key in due}
+        try:
+            with self._stats.stage("parse"):
+                # Closed on the early return so the page prefetches stop at once
+                async with aclosing(
+                    self.api.async_iter_bulk_planner_items(
+                        list(due),
+                        start.strftime("%Y-%m-%d"),
+                        end.strftime("%Y-%m-%d"),
+                        all_codes,
+                        plannable_types=PLANNABLE_TYPES,
                     )
-                    
-                    for item in planner_items:
-                        if item.get("plannable_type") == "assignment":
-                            all_assignments.append(CanvasAssignment.from_dict(item))
-
-                _LOGGER.debug("Student %s: found %s total assignments via Planner", student_id, len(all_assignments))
-
-                # Wrap in student logic class
-                data["student_data"][student_id] = CanvasStudentData(
-                    student_id=student_id,
-                    name=student.get("name", f"Student {student_id}"),
-                    courses=final_courses,
-                    assignments=all_assignments
+                ) as items:
+                    async for item in items:
+                        key = planner_item_student(item)
+                        if key is None:
+                            _LOGGER.debug("Canvas planner items carry no user; bulk planner mode disabled")
+                            self._bulk_planner_supported = False
+                            return
+                        if key in due and planner_item_context(item) in due[key][1]:
+                            assignments[key].append(CanvasAssignment.from_dict(item, self.course_name_normalizer))
+        except Exception as err:  # pylint: disable=broad-except
+            _LOGGER.debug("Bulk planner query failed, using per-student crawls: %s", err)
+            return
+
+        if not any(assignments.values()):
+            if not self._bulk_planner_confirmed:
+                _LOGGER.debug("Bulk planner sweep attributed no items; bulk planner mode disabled")
+                self._bulk_planner_supported = False
+            return
+        self._bulk_planner_confirmed = True
+
+        for key, (student_id, context_codes) in due.items():
+            self._assignment_stores[student_id].replace_all(assignments[key], context_codes)
+            self._schedule.mark(TIER_PLANNER_FAR, student_id, now)
+            self._schedule.mark(TIER_PLANNER_NEAR, student_id, now)
+        _LOGGER.debug("Bulk planner sweep covered %s students", len(due))
+
+    async def _async_sync_planner(
+        self,
+        student_id: str,
+        context_codes: list[str],
+        assignment_store: AssignmentStore,
+        full_sync: bool,
+    ) -> None:
+        """Refresh a student's assignments from the Planner API.
+
+        A full sweep covers 30 days back to 365 days ahead and replaces the
+        store. Otherwise only a short hot window around today is re-fetched
+        and merged in.
+        """
+        start, end = self._planner_window(full_sync)
+
+        # The GraphQL query returns every submission, so it only pays off for
+        # full sweeps; hot-window syncs use the date-bounded Planner API
+        source = self.source if full_sync else self.api
+
+        # Convert items as each page arrives so the raw payload is never held in full
+        assignments = []
+        with self._stats.stage("parse"):
+            async with aclosing(
+                source.async_iter_planner_items(
+                    student_id,
+                    start.strftime("%Y-%m-%d"),
+                    end.strftime("%Y-%m-%d"),
+                    context_codes,
+                    plannable_types=PLANNABLE_TYPES,
                 )
+            ) as items:
+                async for item in items:
+                    assignments.append(CanvasAssignment.from_dict(item, self.course_name_normalizer))
+
+        if full_sync:
+            assignment_store.replace_all(assignments, context_codes)
+        else:
+            # Date-only bounds are interpreted in the user's Canvas time zone, so
+            # only trust the window's interior when dropping items Canvas didn't return
+            assignment_store.merge_window(
+                assignments, start + timedelta(days=1), end - timedelta(days=1)
+            )
+        _LOGGER.debug(
+            "Student %s: %s planner sync returned %s assignments",
+            student_id,
+            "full" if full_sync else "incremental",
+            len(assignments),
+        )
 
-            return data
-        except Exception as exception:
-            raise UpdateFailed(f"Error communicating with API: {exception}") from exception
+    @callback
+    def async_invalidate_event(self, event: CanvasEvent) -> bool:
+        """Invalidate the slice of data a pushed event affects.
+
+        Only the affected students' tiers are made due, so the next refresh
+        re-fetches just that slice; everything else is reused. Returns True
+        if anything was invalidated.
+        """
+        if event.student_id is not None:
+            student_ids = [student_id for student_id in self._courses if str(student_id) == event.student_id]
+        else:
+            student_ids = [
+                student_id
+                for student_id, courses in self._courses.items()
+                if any(str(course["id"]) == event.course_id for course in courses)
+            ]
+        if not student_ids:
+            _LOGGER.debug("Ignoring Canvas event %s for unknown student or course", event)
+            return False
+
+        for student_id in student_ids:
+            for tier in event.tiers:
+                self._schedule.invalidate(tier, student_id)
+        # Recently answered GETs would otherwise be served again unchanged
+        self.api.coalescer.clear()
+        _LOGGER.debug("Canvas event %s invalidated %s for students %s", event.name, event.tiers, student_ids)
+        return True
+
+    def _failed_student_data(self, student: dict, err: Exception) -> CanvasStudentData:
+        """Mark a student as failed, keeping the last good data if there is any."""
+        student_id = student["id"]
+        previous = self.data["student_data"].get(student_id) if self.data else None
+        return CanvasStudentData(
+            student_id=student_id,
+            name=student.get("name", f"Student {student_id}"),
+            courses=previous.courses if previous else [],
+            assignments=previous.assignments if previous else [],
+            last_error=str(err) or type(err).__name__,
+        )
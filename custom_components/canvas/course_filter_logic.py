@@ -0,0 +1,152 @@
+"""Declarative course filtering with cached verdicts."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+import logging
+import re
+
+_LOGGER = logging.getLogger(__name__)
+
+ACTIONS = ("allow", "deny")
+FIELDS = ("name", "term", "id", "ended")
+
+# Verdict cache size; courses rarely change, so this is only a safety cap
+_MAX_VERDICTS = 2048
+
+# The integration's original filters: archived terms, administrative
+# "Students"/"Hub" courses, and courses that ended more than a week ago
+DEFAULT_COURSE_FILTER_RULES = """\
+deny term Archive
+deny name Students|Hub
+deny ended 7
+"""
+
+@dataclass(frozen=True)
+class CourseRule:
+    """One filter rule: an action and the condition that triggers it."""
+    action: str
+    field: str
+    value: str
+
+    def __str__(self) -> str:
+        """Return the rule in its text form."""
+        return f"{self.action} {self.field} {self.value}"
+
+def parse_course_filter_rules(text: str | None) -> list[CourseRule]:
+    """Parse rules, one "<allow|deny> <name|term|id|ended> <value>" per line.
+
+    name and term take a regex searched in the course or term name, id a
+    comma-separated list of course IDs, and ended a grace period in days.
+    Raises ValueError on a malformed rule.
+    """
+    rules = []
+    for line in (text or "").splitlines():
+        if not line.strip() or line.lstrip().startswith("#"):
+            continue
+        parts = line.split(None, 2)
+        if len(parts) != 3 or parts[0] not in ACTIONS or parts[1] not in FIELDS:
+            raise ValueError(f"Invalid course filter rule: {line.strip()}")
+        action, field_name, value = parts
+        value = value.strip()
+        try:
+            if field_name in ("name", "term"):
+                re.compile(value)
+            elif field_name == "ended":
+                int(value)
+            else:
+                [int(course_id) for course_id in value.split(",")]
+        except (re.error, ValueError) as err:
+            raise ValueError(f"Invalid course filter rule: {line.strip()}") from err
+        rules.append(CourseRule(action, field_name, value))
+    return rules
+
+def _parse_end(course: dict) -> datetime | None:
+    """Return the course's end date, falling back to its term's."""
+    end_str = course.get("end_at") or (course.get("term") or {}).get("end_at")
+    if not end_str:
+        return None
+    try:
+        end = datetime.fromisoformat(end_str.replace("Z", "+00:00"))
+    except (ValueError, TypeError, AttributeError):
+        _LOGGER.warning("Could not parse end_at for course %s", course.get("id"))
+        return None
+    return end if end.tzinfo else end.replace(tzinfo=timezone.utc)
+
+class CourseFilter:
+    """Ordered allow/deny rules compiled once; the first matching rule wins.
+
+    Verdicts are cached per course ID and the fields the rules read, so an
+    unchanged course (or one shared by siblings) is evaluated once. A
+    verdict that depends on an end date expires when that date passes.
+    """
+
+    def __init__(self, rules: list[CourseRule]) -> None:
+        """Initialize."""
+        self.rules = rules
+        self._compiled = []
+        for rule in rules:
+            if rule.field in ("name", "term"):
+                matcher = re.compile(rule.value)
+            elif rule.field == "id":
+                matcher = frozenset(int(course_id) for course_id in rule.value.split(","))
+            else:
+                matcher = timedelta(days=int(rule.value))
+            self._compiled.append((rule, matcher))
+        self._verdicts: dict[tuple, tuple[bool, datetime | None]] = {}
+        self.evaluations = 0
+
+    @classmethod
+    def from_options(cls, text: str | None) -> CourseFilter:
+        """Build a filter from user rules, evaluated before the defaults."""
+        return cls(parse_course_filter_rules(text) + parse_course_filter_rules(DEFAULT_COURSE_FILTER_RULES))
+
+    def __call__(self, course: dict, now: datetime) -> bool:
+        """Return True if the course should be kept."""
+        term = course.get("term") or {}
+        key = (
+            course.get("id"),
+            course.get("updated_at"),
+            course.get("name"),
+            term.get("name"),
+            course.get("end_at") or term.get("end_at"),
+        )
+        cached = self._verdicts.get(key)
+        if cached is not None and (cached[1] is None or now < cached[1]):
+            return cached[0]
+
+        keep, expires = self._evaluate(course, now)
+        if len(self._verdicts) >= _MAX_VERDICTS:
+            self._verdicts.clear()
+        self._verdicts[key] = (keep, expires)
+        return keep
+
+    def _evaluate(self, course: dict, now: datetime) -> tuple[bool, datetime | None]:
+        """Run the rules, returning the verdict and when it stops holding."""
+        self.evaluations += 1
+        name = course.get("name")
+        if not name:
+            return False, None
+
+        term_name = (course.get("term") or {}).get("name") or ""
+        expires = None
+        for rule, matcher in self._compiled:
+            if rule.field == "name":
+                matched = matcher.search(name) is not None
+            elif rule.field == "term":
+                matched = matcher.search(term_name) is not None
+            elif rule.field == "id":
+                matched = course.get("id") in matcher
+            else:
+                end = _parse_end(course)
+                if end is None:
+                    continue
+                cutoff = end + matcher
+                matched = cutoff < now
+                if not matched:
+                    # The verdict flips once the grace period runs out
+                    expires = cutoff if expires is None else min(expires, cutoff)
+            if matched:
+                _LOGGER.debug("Course %s (%s) matched rule '%s'", course.get("id"), name, rule)
+                return rule.action == "allow", expires
+        return True, expires
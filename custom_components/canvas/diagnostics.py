@@ -0,0 +1,51 @@
+"""Diagnostics support for Canvas LMS."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN, CONF_TOKEN, CONF_WEBHOOK_ID
+from .coordinator import CanvasDataUpdateCoordinator
+
+# Anyone holding the webhook ID can force refreshes
+TO_REDACT = {CONF_TOKEN, CONF_WEBHOOK_ID}
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator: CanvasDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
+    api = coordinator.api
+    stats = coordinator.last_refresh_stats
+    student_data = (coordinator.data or {}).get("student_data", {})
+
+    return {
+        "entry": {
+            "data": async_redact_data(dict(entry.data), TO_REDACT),
+            "options": dict(entry.options),
+        },
+        "refresh": stats.as_dict() if stats else None,
+        "students": {
+            str(student_id): {
+                "courses": len(data.courses),
+                "assignments": len(data.assignments),
+                "last_error": data.last_error,
+            }
+            for student_id, data in student_data.items()
+        },
+        "api": api.stats.as_dict(),
+        "response_cache": {
+            "entries": len(api.response_cache),
+            "hits": api.response_cache.hits,
+            "misses": api.response_cache.misses,
+            "shared_in_flight": api.coalescer.shared,
+            "recent_hits": api.coalescer.recent_hits,
+        },
+        "rate_limit": {
+            "estimated_remaining": api.scheduler.estimated_remaining(),
+        },
+        "profile": coordinator.last_profile,
+    }
@@ -0,0 +1,65 @@
+"""Base entity for Canvas LMS."""
+from __future__ import annotations
+
+from collections.abc import Hashable
+
+from homeassistant.core import callback
+from homeassistant.helpers.device_registry import DeviceInfo
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .const import DOMAIN
+from .coordinator import CanvasDataUpdateCoordinator
+from .student_logic import CanvasStudentData
+
+class CanvasStudentEntity(CoordinatorEntity[CanvasDataUpdateCoordinator]):
+    """Common base for entities that belong to a single student.
+
+    Subclasses recompute their cached state in _compute_state and return a
+    fingerprint of it; state is only written when the fingerprint changes.
+    """
+
+    def __init__(
+        self,
+        coordinator: CanvasDataUpdateCoordinator,
+        student_id: str,
+        student_name: str,
+    ) -> None:
+        """Initialize the entity."""
+        super().__init__(coordinator)
+        self._student_id = student_id
+        self._student_name = student_name
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, student_id)},
+            name=student_name,
+            manufacturer="Canvas LMS",
+            model="Student",
+        )
+        self._state_fingerprint: Hashable = None
+
+    @property
+    def student_data(self) -> CanvasStudentData | None:
+        """Return this entity's student data from the coordinator."""
+        return self.coordinator.data["student_data"].get(self._student_id)
+
+    @property
+    def available(self) -> bool:
+        """Return False when this student's last refresh failed."""
+        student_data = self.student_data
+        return super().available and student_data is not None and not student_data.failed
+
+    def _compute_state(self) -> Hashable:
+        """Recompute cached state from coordinator data and return its fingerprint."""
+        return None
+
+    def _refresh_state(self) -> bool:
+        """Recompute state and return True if it differs from the last write."""
+        fingerprint = (self.available, self._compute_state())
+        changed = fingerprint != self._state_fingerprint
+        self._state_fingerprint = fingerprint
+        return changed
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write state only if this entity's content changed."""
+        if self._refresh_state():
+            super()._handle_coordinator_update()
@@ -0,0 +1,76 @@
+"""Parsing of pushed Canvas events into refresh invalidations."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from .refresh_logic import TIER_COURSES, TIER_PLANNER_FAR, TIER_PLANNER_NEAR
+
+# Which tiers each event makes stale for the affected students. Grades live
+# on the course enrollments; an assignment edit may move its due date
+# outside the hot window, so it needs a full planner sweep.
+EVENT_TIERS: dict[str, tuple[str, ...]] = {
+    "submission_created": (TIER_PLANNER_NEAR,),
+    "submission_updated": (TIER_PLANNER_NEAR,),
+    "grade_change": (TIER_COURSES, TIER_PLANNER_NEAR),
+    "assignment_created": (TIER_PLANNER_FAR,),
+    "assignment_updated": (TIER_PLANNER_FAR,),
+}
+
+@dataclass(frozen=True)
+class CanvasEvent:
+    """A pushed change, reduced to the slice of data it affects."""
+    name: str
+    student_id: str | None
+    course_id: str | None
+
+    @property
+    def tiers(self) -> tuple[str, ...]:
+        """Return the refresh tiers this event invalidates."""
+        return EVENT_TIERS.get(self.name, ())
+
+def _first(*values) -> str | None:
+    """Return the first value that is set, as a string."""
+    for value in values:
+        if value not in (None, ""):
+            return str(value)
+    return None
+
+def _course_from_context(context_type: str | None, context_id) -> str | None:
+    """Return the context ID if the context is a course."""
+    if context_id is not None and (context_type or "Course").lower() == "course":
+        return str(context_id)
+    return None
+
+def parse_canvas_event(payload: dict) -> CanvasEvent | None:
+    """Parse a Canvas Live Event or a flat notification-style payload.
+
+    Live Events wrap the event as {"metadata": {...}, "body": {...}};
+    notification payloads put event_name (or type), user_id/student_id and
+    course_id at the top level. Returns None for unrelated events.
+    """
+    if not isinstance(payload, dict):
+        return None
+
+    metadata = payload.get("metadata") or {}
+    body = payload.get("body") or {}
+    name = _first(metadata.get("event_name"), payload.get("event_name"), payload.get("type"))
+    if name not in EVENT_TIERS:
+        return None
+
+    if name == "grade_change":
+        # user_id on a grade change is the grader, not the student
+        student_id = _first(body.get("student_id"), payload.get("student_id"))
+    elif name.startswith("assignment_"):
+        student_id = None
+    else:
+        student_id = _first(body.get("user_id"), payload.get("student_id"), payload.get("user_id"))
+
+    course_id = _first(
+        body.get("course_id"),
+        _course_from_context(body.get("context_type"), body.get("context_id")),
+        _course_from_context(metadata.get("context_type"), metadata.get("context_id")),
+        payload.get("course_id"),
+    )
+    if student_id is None and course_id is None:
+        return None
+    return CanvasEvent(name=name, student_id=student_id, course_id=course_id)
@@ -0,0 +1,253 @@
+"""GraphQL data source for Canvas LMS."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator, Collection
+from contextlib import aclosing
+import logging
+
+import aiohttp
+
+from .api import CanvasAPI, DEFAULT_COURSE_FIELDS
+from .const import GRAPHQL_PAGE_SIZE
+
+_LOGGER = logging.getLogger(__name__)
+
+_SUBMISSION_FIELDS = """
+fragment SubmissionFields on Submission {
+  state
+  submittedAt
+  assignment { _id name dueAt description }
+}
+"""
+
+# Courses and grades only, for course refreshes between planner sweeps
+COURSES_QUERY = """
+query CanvasStudentCourses($userId: ID!) {
+  legacyNode(_id: $userId, type: User) {
+    ... on User {
+      enrollments {
+        type
+        grades { currentScore currentGrade finalScore finalGrade }
+        course { _id name courseCode endAt term { name endAt } }
+      }
+    }
+  }
+}
+"""
+
+# The first page of each course's submissions, for full planner sweeps
+SUBMISSIONS_QUERY = """
+query CanvasStudentSubmissions($userId: ID!, $first: Int!) {
+  legacyNode(_id: $userId, type: User) {
+    ... on User {
+      enrollments {
+        course {
+          _id
+          name
+          submissionsConnection(studentIds: [$userId], first: $first) {
+            nodes { ...SubmissionFields }
+            pageInfo { hasNextPage endCursor }
+          }
+        }
+      }
+    }
+  }
+}
+""" + _SUBMISSION_FIELDS
+
+# Follow-up pages for courses with more submissions than fit in the first page
+COURSE_SUBMISSIONS_QUERY = """
+query CanvasCourseSubmissions($courseId: ID!, $userId: ID!, $first: Int!, $after: String) {
+  legacyNode(_id: $courseId, type: Course) {
+    ... on Course {
+      submissionsConnection(studentIds: [$userId], first: $first, after: $after) {
+        nodes { ...SubmissionFields }
+        pageInfo { hasNextPage endCursor }
+      }
+    }
+  }
+}
+""" + _SUBMISSION_FIELDS
+
+_SUBMITTED_STATES = ("submitted", "graded", "pending_review")
+
+class CanvasGraphQLError(Exception):
+    """Canvas answered a GraphQL query with errors or no data."""
+
+def _course_enrollments(user: dict) -> list[dict]:
+    """Return a user's enrollments that have a course, one per course."""
+    enrollments = []
+    seen = set()
+    for enrollment in user.get("enrollments") or []:
+        course = enrollment.get("course")
+        if not course or course["_id"] in seen:
+            continue
+        seen.add(course["_id"])
+        enrollments.append(enrollment)
+    return enrollments
+
+def course_from_graphql(enrollment: dict) -> dict:
+    """Convert a GraphQL enrollment into the REST course shape."""
+    course = enrollment["course"]
+    term = course.get("term") or {}
+    grades = enrollment.get("grades") or {}
+    return {
+        "id": int(course["_id"]),
+        "name": course.get("name"),
+        "course_code": course.get("courseCode"),
+        "end_at": course.get("endAt"),
+        "term": {"name": term.get("name"), "end_at": term.get("endAt")},
+        "enrollments": [
+            {
+                "type": enrollment.get("type"),
+                "computed_current_score": grades.get("currentScore"),
+                "computed_current_grade": grades.get("currentGrade"),
+                "computed_final_score": grades.get("finalScore"),
+                "computed_final_grade": grades.get("finalGrade"),
+            }
+        ],
+    }
+
+def planner_item_from_graphql(submission: dict, course: dict) -> dict:
+    """Convert a GraphQL submission into the REST planner item shape."""
+    assignment = submission["assignment"]
+    state = submission.get("state")
+    return {
+        "plannable_type": "assignment",
+        "course_id": course["id"],
+        "context_name": course.get("name"),
+        "plannable": {
+            "id": int(assignment["_id"]),
+            "title": assignment.get("name"),
+            "due_at": assignment.get("dueAt"),
+            "description": assignment.get("description") or "",
+        },
+        "submissions": {
+            "submitted": state in _SUBMITTED_STATES or bool(submission.get("submittedAt")),
+            "graded": state == "graded",
+        },
+    }
+
+class CanvasGraphQLSource:
+    """Serve courses and planner items from /api/graphql.
+
+    Offers the same course and planner calls as CanvasAPI. Course
+    refreshes run a small courses-and-grades query; planner calls run one
+    query for every submission of the student's courses, with cursor
+    pagination for long courses. That query can't be bounded by due date,
+    so callers should only use it for full sweeps and send hot-window
+    syncs to the Planner API. If GraphQL is unavailable or errors, the
+    source switches to REST until the integration reloads.
+    """
+
+    def __init__(self, api: CanvasAPI, page_size: int = GRAPHQL_PAGE_SIZE) -> None:
+        """Initialize."""
+        self._api = api
+        self._page_size = page_size
+        self.available = True
+
+    async def async_get_courses(
+        self, user_id: str, fields: Collection[str] = DEFAULT_COURSE_FIELDS
+    ) -> list:
+        """Get a student's courses with grades and term info.
+
+        The GraphQL query always returns grades and term info, so fields
+        only applies when falling back to REST.
+        """
+        if self.available:
+            try:
+                user = await self._async_query(COURSES_QUERY, {"userId": str(user_id)})
+            except (CanvasGraphQLError, aiohttp.ClientError, asyncio.TimeoutError) as err:
+                self._fall_back(err)
+            else:
+                return [course_from_graphql(enrollment) for enrollment in _course_enrollments(user)]
+        return await self._api.async_get_courses(user_id, fields=fields)
+
+    async def async_iter_planner_items(
+        self,
+        student_id: str,
+        start_date: str,
+        end_date: str,
+        context_codes: list[str],
+        plannable_types: Collection[str] | None = None,
+    ) -> AsyncIterator[dict]:
+        """Yield a student's assignments due in the window, as planner items.
+
+        Fetches every submission of the student's courses, so this is only
+        worth it for full sweeps.
+        """
+        if self.available:
+            try:
+                items = await self._async_fetch_planner_items(student_id)
+            except (CanvasGraphQLError, aiohttp.ClientError, asyncio.TimeoutError) as err:
+                self._fall_back(err)
+            else:
+                codes = set(context_codes)
+                for item in items:
+                    due_date = (item["plannable"]["due_at"] or "")[:10]
+                    if (
+                        start_date <= due_date <= end_date
+                        and f"course_{item['course_id']}" in codes
+                        and (plannable_types is None or item["plannable_type"] in plannable_types)
+                    ):
+                        yield item
+                return
+
+        async with aclosing(
+            self._api.async_iter_planner_items(
+                student_id, start_date, end_date, context_codes, plannable_types=plannable_types
+            )
+        ) as items:
+            async for item in items:
+                yield item
+
+    def _fall_back(self, err: Exception) -> None:
+        """Stop using GraphQL for the rest of this session."""
+        _LOGGER.warning("Canvas GraphQL unavailable, falling back to REST: %s", err)
+        self.available = False
+
+    async def _async_query(self, query: str, variables: dict) -> dict:
+        """Run a query and return its data."""
+        result = await self._api.async_post("/api/graphql", {"query": query, "variables": variables})
+        if not isinstance(result, dict) or result.get("errors") or not result.get("data"):
+            errors = result.get("errors") if isinstance(result, dict) else result
+            raise CanvasGraphQLError(f"GraphQL query failed: {errors}")
+        node = result["data"].get("legacyNode")
+        if node is None:
+            raise CanvasGraphQLError("GraphQL query returned no data")
+        return node
+
+    async def _async_fetch_planner_items(self, student_id: str) -> list[dict]:
+        """Return planner items for every submission of a student's courses."""
+        key = str(student_id)
+        user = await self._async_query(SUBMISSIONS_QUERY, {"userId": key, "first": self._page_size})
+        items = []
+        for enrollment in _course_enrollments(user):
+            course = {"id": int(enrollment["course"]["_id"]), "name": enrollment["course"].get("name")}
+            connection = enrollment["course"].get("submissionsConnection") or {}
+            async for submission in self._async_iter_submissions(key, course["id"], connection):
+                if submission.get("assignment"):
+                    items.append(planner_item_from_graphql(submission, course))
+        return items
+
+    async def _async_iter_submissions(
+        self, student_id: str, course_id: int, connection: dict
+    ) -> AsyncIterator[dict]:
+        """Yield a course's submissions, following the connection's cursor."""
+        while True:
+            for node in connection.get("nodes") or []:
+                yield node
+            page_info = connection.get("pageInfo") or {}
+            if not page_info.get("hasNextPage"):
+                return
+            course = await self._async_query(
+                COURSE_SUBMISSIONS_QUERY,
+                {
+                    "courseId": str(course_id),
+                    "userId": student_id,
+                    "first": self._page_size,
+                    "after": page_info.get("endCursor"),
+                },
+            )
+            connection = course.get("submissionsConnection") or {}
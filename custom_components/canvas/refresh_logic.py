@@ -0,0 +1,41 @@
+"""Tiered refresh scheduling for Canvas data classes."""
+from __future__ import annotations
+
+from collections.abc import Hashable, Mapping
+from datetime import timedelta
+
+TIER_STUDENTS = "students"
+TIER_COURSES = "courses"
+TIER_PLANNER_NEAR = "planner_near"
+TIER_PLANNER_FAR = "planner_far"
+
+class RefreshSchedule:
+    """Track when each data class was last fetched, per student.
+
+    Times are monotonic seconds. Each tier has its own interval; a tier is
+    due for a key if it has never run for that key or its interval elapsed.
+    """
+
+    def __init__(self, intervals: Mapping[str, timedelta]) -> None:
+        """Initialize."""
+        self._intervals = {tier: interval.total_seconds() for tier, interval in intervals.items()}
+        self._last_run: dict[tuple[str, Hashable], float] = {}
+
+    @property
+    def min_interval(self) -> timedelta:
+        """Return the shortest tier interval, used as the coordinator tick."""
+        return timedelta(seconds=min(self._intervals.values()))
+
+    def is_due(self, tier: str, key: Hashable, now: float) -> bool:
+        """Return True if the tier needs to be refreshed for this key."""
+        last_run = self._last_run.get((tier, key))
+        # Allow a little slack so a tier isn't pushed to the next tick by jitter
+        return last_run is None or now - last_run >= self._intervals[tier] - 5
+
+    def mark(self, tier: str, key: Hashable, now: float) -> None:
+        """Record a successful refresh of the tier for this key."""
+        self._last_run[(tier, key)] = now
+
+    def invalidate(self, tier: str, key: Hashable) -> None:
+        """Make the tier due for this key on the next tick."""
+        self._last_run.pop((tier, key), None)
@@ -5,11 +5,10 @@ from datetime import datetime, timedelta
 
 from homeassistant.components.sensor import SensorEntity
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import EntityCategory, UnitOfTime
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
-
-from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.util import dt as dt_util
 
 from .const import (
@@ -19,8 +18,9 @@ from .const import (
     CONF_UPCOMING_DAYS,
     CONF_MISSED_DAYS,
 )
+from .assignment_logic import CanvasAssignment
 from .coordinator import CanvasDataUpdateCoordinator
-from .assignment_logic import filter_assignments, clean_course_name
+from .entity import CanvasStudentEntity
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -79,9 +79,11 @@ async def async_setup_entry(
                         )
                     )
 
+    entities.append(CanvasRefreshStatsSensor(coordinator, entry.entry_id))
+
     async_add_entities(entities)
 
-class CanvasGradeSensor(CoordinatorEntity[CanvasDataUpdateCoordinator], SensorEntity):
+class CanvasGradeSensor(CanvasStudentEntity, SensorEntity):
     """Representation of a Canvas Course Grade sensor."""
 
     def __init__(
@@ -93,12 +95,10 @@ class CanvasGradeSensor(CoordinatorEntity[CanvasDataUpdateCoordinator], SensorEn
         enrollment: dict,
     ) -> None:
         """Initialize the sensor."""
-        super().__init__(coordinator)
-        self._student_id = student_id
-        self._student_name = student_name
+        super().__init__(coordinator, student_id, student_name)
         self._course_id = course["id"]
         raw_name = course.get("name", course.get("course_code", "Unknown Course"))
-        self._course_name = clean_course_name(raw_name)
+        self._course_name = coordinator.course_name_normalizer(raw_name)
         self._enrollment = enrollment
         
         self._attr_has_entity_name = True
@@ -106,53 +106,29 @@ class CanvasGradeSensor(CoordinatorEntity[CanvasDataUpdateCoordinator], SensorEn
         self._attr_unique_id = f"canvas_{student_id}_{self._course_id}_grade"
         self._attr_icon = "mdi:school"
         self._attr_native_unit_of_measurement = "%"
-        self._attr_device_info = DeviceInfo(
-            identifiers={(DOMAIN, student_id)},
-            name=student_name,
-            manufacturer="Canvas LMS",
-            model="Student",
-        )
-
-    @property
-    def native_value(self) -> str | float | None:
-        """Return the state of the sensor."""
-        # Refresh enrollment data from coordinator
-        student_data = self.coordinator.data["student_data"].get(self._student_id)
-        if not student_data:
-            return None
-            
-        for course in student_data.courses:
-            if course["id"] == self._course_id:
-                for enrollment in course.get("enrollments", []):
-                    # For total_scores include, it's computed_current_score
-                    return enrollment.get("computed_current_score") or enrollment.get("computed_current_grade")
-        
-        return None
 
-    @property
-    def extra_state_attributes(self) -> dict:
-        """Return entity specific state attributes."""
-        student_data = self.coordinator.data["student_data"].get(self._student_id)
-        if not student_data:
-            return {}
-            
-        current_enrollment = {}
-        for course in student_data.courses:
-            if course["id"] == self._course_id:
-                for enrollment in course.get("enrollments", []):
-                    current_enrollment = enrollment
-                    break
+        self._refresh_state()
 
-        return {
+    def _compute_state(self) -> tuple:
+        """Compute state and attributes from the coordinator's grade map."""
+        enrollment = self.coordinator.data.get("grades", {}).get(
+            (self._student_id, self._course_id), {}
+        )
+        # For total_scores include, it's computed_current_score
+        self._attr_native_value = (
+            enrollment.get("computed_current_score") or enrollment.get("computed_current_grade")
+        )
+        self._attr_extra_state_attributes = {
             "course_name": self._course_name,
             "student_name": self._student_name,
-            "current_score": current_enrollment.get("computed_current_score"),
-            "current_grade": current_enrollment.get("computed_current_grade"),
-            "final_score": current_enrollment.get("computed_final_score"),
-            "final_grade": current_enrollment.get("computed_final_grade"),
+            "current_score": enrollment.get("computed_current_score"),
+            "current_grade": enrollment.get("computed_current_grade"),
+            "final_score": enrollment.get("computed_final_score"),
+            "final_grade": enrollment.get("computed_final_grade"),
         }
+        return (self._attr_native_value, tuple(self._attr_extra_state_attributes.values()))
 
-class CanvasAssignmentSensor(CoordinatorEntity[CanvasDataUpdateCoordinator], SensorEntity):
+class CanvasAssignmentSensor(CanvasStudentEntity, SensorEntity):
     """Unified Representation of a Canvas Assignment sensor."""
 
     def __init__(
@@ -164,9 +140,7 @@ class CanvasAssignmentSensor(CoordinatorEntity[CanvasDataUpdateCoordinator], Sen
         days: int | None = None,
     ) -> None:
         """Initialize the sensor."""
-        super().__init__(coordinator)
-        self._student_id = student_id
-        self._student_name = student_name
+        super().__init__(coordinator, student_id, student_name)
         self._sensor_type = sensor_type
         self._days = days
         
@@ -188,57 +162,45 @@ class CanvasAssignmentSensor(CoordinatorEntity[CanvasDataUpdateCoordinator], Sen
         self._attr_name = type_names.get(sensor_type, "Assignments")
         self._attr_unique_id = f"canvas_{student_id}_assignments_{sensor_type}"
         self._attr_icon = icons.get(sensor_type, "mdi:notebook-edit")
-        self._assignments: list[dict] = []
-        self._attr_device_info = DeviceInfo(
-            identifiers={(DOMAIN, student_id)},
-            name=student_name,
-            manufacturer="Canvas LMS",
-            model="Student",
-        )
+        self._assignments: list[CanvasAssignment] = []
+        self._refresh_state()
 
     @property
     def native_value(self) -> int:
         """Return the count of assignments."""
-        self._update_list()
         return len(self._assignments)
 
-    def _update_list(self) -> None:
+    def _compute_state(self) -> tuple:
         """Filter the coordinator data for this sensor's time window."""
-        student_data = self.coordinator.data["student_data"].get(self._student_id)
+        student_data = self.student_data
         if not student_data:
             self._assignments = []
-            return
+            return ()
 
-        # Use our external logic for filtering
+        # Range lookup on the student's prebuilt due-date index
         now = dt_util.now()
-        filtered = filter_assignments(
-            student_data.assignments, 
-            now, 
-            self._sensor_type, 
-            days=self._days or 7
-        )
-
-        self._assignments = [
-            {
-                "id": a.id,
-                "name": a.name,
-                "course": a.course_name,
-                "due_at": a.due_at.isoformat() if a.due_at else None,
-            }
-            for a in filtered
-        ]
+        self._assignments = student_data.index.query(self._sensor_type, now, days=self._days or 7)
+        return tuple((a.id, a.name, a.course_name, a.due_at) for a in self._assignments)
 
     @property
     def assignment_ids(self) -> list[str]:
         """Return the list of assignment IDs."""
-        return [a["id"] for a in self._assignments]
+        return [a.id for a in self._assignments]
 
     @property
     def extra_state_attributes(self) -> dict:
         """Return entity specific state attributes."""
         attrs = {
             "student_name": self._student_name,
-            "assignments": self._assignments,
+            "assignments": [
+                {
+                    "id": a.id,
+                    "name": a.name,
+                    "course": a.course_name,
+                    "due_at": a.due_at.isoformat() if a.due_at else None,
+                }
+                for a in self._assignments
+            ],
             "assignment_ids": self.assignment_ids,
             "count": len(self._assignments),
         }
@@ -246,7 +208,7 @@ class CanvasAssignmentSensor(CoordinatorEntity[CanvasDataUpdateCoordinator], Sen
             attrs["window_days"] = self._days
         return attrs
 
-class CanvasLastMissedSensor(CoordinatorEntity[CanvasDataUpdateCoordinator], SensorEntity):
+class CanvasLastMissedSensor(CanvasStudentEntity, SensorEntity):
     """Representation of the most recently missed Canvas assignment."""
 
     def __init__(
@@ -257,9 +219,7 @@ class CanvasLastMissedSensor(CoordinatorEntity[CanvasDataUpdateCoordinator], Sen
         days: int | None = None,
     ) -> None:
         """Initialize the sensor."""
-        super().__init__(coordinator)
-        self._student_id = student_id
-        self._student_name = student_name
+        super().__init__(coordinator, student_id, student_name)
         self._days = days
         
         self._attr_has_entity_name = True
@@ -267,50 +227,36 @@ class CanvasLastMissedSensor(CoordinatorEntity[CanvasDataUpdateCoordinator], Sen
         self._attr_unique_id = f"canvas_{student_id}_last_missed"
         self._attr_icon = "mdi:calendar-alert"
         self._last_missed: dict | None = None
-        
-        self._attr_device_info = DeviceInfo(
-            identifiers={(DOMAIN, student_id)},
-            name=student_name,
-            manufacturer="Canvas LMS",
-            model="Student",
-        )
+        self._refresh_state()
 
     @property
     def native_value(self) -> str | None:
         """Return the name of the last missed assignment."""
-        self._update_state()
         return self._last_missed.get("name") if self._last_missed else None
 
-    def _update_state(self) -> None:
+    def _compute_state(self) -> tuple:
         """Update the last missed assignment from coordinator data."""
-        student_data = self.coordinator.data["student_data"].get(self._student_id)
+        student_data = self.student_data
         if not student_data:
             self._last_missed = None
-            return
+            return ()
 
         now = dt_util.now()
-        missed = filter_assignments(
-            student_data.assignments, 
-            now, 
-            "missed", 
-            days=self._days or 7
-        )
+        missed = student_data.index.query("missed", now, days=self._days or 7)
 
         if not missed:
             self._last_missed = None
-            return
+            return ()
 
-        # Sort by due_at descending to get the most recent one
-        # filter_assignments returns a list, we sort it here
-        missed.sort(key=lambda x: x.due_at, reverse=True)
-        
-        latest = missed[0]
+        # Index results are sorted by due date, so the most recent is last
+        latest = missed[-1]
         self._last_missed = {
             "id": latest.id,
             "name": latest.name,
             "course": latest.course_name,
             "due_at": latest.due_at.isoformat() if latest.due_at else None,
         }
+        return tuple(self._last_missed.values())
 
     @property
     def extra_state_attributes(self) -> dict:
@@ -323,3 +269,35 @@ class CanvasLastMissedSensor(CoordinatorEntity[CanvasDataUpdateCoordinator], Sen
         if self._days:
             attrs["window_days"] = self._days
         return attrs
+
+class CanvasRefreshStatsSensor(CoordinatorEntity[CanvasDataUpdateCoordinator], SensorEntity):
+    """Diagnostic sensor reporting how long the last refresh took and where."""
+
+    # These change on every refresh; keep them out of the recorder
+    _unrecorded_attributes = frozenset(
+        {"pages", "bytes", "stage_cpu_s", "student_wall_s", "dropped_items"}
+    )
+
+    def __init__(self, coordinator: CanvasDataUpdateCoordinator, entry_id: str) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator)
+        self._attr_name = "Canvas Refresh Duration"
+        self._attr_unique_id = f"canvas_{entry_id}_refresh_duration"
+        self._attr_icon = "mdi:timer-outline"
+        self._attr_entity_category = EntityCategory.DIAGNOSTIC
+        self._attr_native_unit_of_measurement = UnitOfTime.SECONDS
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the wall time of the last refresh."""
+        stats = self.coordinator.last_refresh_stats
+        return round(stats.duration, 2) if stats and stats.duration is not None else None
+
+    @property
+    def extra_state_attributes(self) -> dict:
+        """Return per-stage timings and the last refresh's traffic."""
+        stats = self.coordinator.last_refresh_stats
+        attrs = stats.as_dict() if stats else {}
+        attrs.pop("duration_s", None)
+        attrs["dropped_items"] = self.coordinator.api.stats.dropped_items
+        return attrs
@@ -0,0 +1,144 @@
+"""Refresh instrumentation: request histograms and per-stage timings."""
+from __future__ import annotations
+
+from bisect import bisect_left
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+import re
+import time
+
+# Upper bounds of the latency buckets, in milliseconds; the last bucket is open
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+_ID_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+def endpoint_key(path: str) -> str:
+    """Collapse numeric path segments so requests group by endpoint."""
+    return _ID_SEGMENT.sub("/:id", path)
+
+@dataclass
+class EndpointStats:
+    """Request counters and a latency histogram for one endpoint."""
+    requests: int = 0
+    not_modified: int = 0
+    errors: int = 0
+    bytes: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    buckets: list[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS_MS) + 1))
+
+    def record(self, elapsed_ms: float, size: int = 0, not_modified: bool = False, error: bool = False) -> None:
+        """Record one response (a single page) and its size on the wire."""
+        self.requests += 1
+        self.not_modified += not_modified
+        self.errors += error
+        self.bytes += size
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.buckets[bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+
+    def as_dict(self) -> dict:
+        """Return a JSON-serializable summary."""
+        labels = [f"<={bound}ms" for bound in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+        return {
+            "pages": self.requests,
+            "not_modified": self.not_modified,
+            "errors": self.errors,
+            "bytes": self.bytes,
+            "mean_ms": round(self.total_ms / self.requests, 1) if self.requests else None,
+            "max_ms": round(self.max_ms, 1),
+            "histogram": dict(zip(labels, self.buckets)),
+        }
+
+class ApiStats:
+    """Per-endpoint request statistics, kept for the lifetime of the client."""
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self.endpoints: dict[str, EndpointStats] = {}
+        self.decode_seconds = 0.0
+        # Items downloaded only to be discarded, e.g. unwanted planner types
+        self.dropped_items = 0
+
+    def record(self, path: str, elapsed_ms: float, **kwargs) -> None:
+        """Record a response for the endpoint serving path.
+
+        The response is also charged to the refresh that sent it, if any, so
+        clients shared by several entries don't mix their traffic.
+        """
+        key = endpoint_key(path)
+        stats = self.endpoints.get(key)
+        if stats is None:
+            stats = self.endpoints[key] = EndpointStats()
+        stats.record(elapsed_ms, **kwargs)
+        if (refresh := current_refresh.get()) is not None:
+            refresh.pages += 1
+            refresh.bytes += kwargs.get("size", 0)
+
+    @property
+    def total_bytes(self) -> int:
+        """Return the bytes received across all endpoints."""
+        return sum(stats.bytes for stats in self.endpoints.values())
+
+    @property
+    def total_pages(self) -> int:
+        """Return the responses received across all endpoints."""
+        return sum(stats.requests for stats in self.endpoints.values())
+
+    def as_dict(self) -> dict:
+        """Return a JSON-serializable summary."""
+        return {
+            "decode_cpu_s": round(self.decode_seconds, 4),
+            "dropped_items": self.dropped_items,
+            "endpoints": {key: stats.as_dict() for key, stats in sorted(self.endpoints.items())},
+        }
+
+class RefreshStats:
+    """Timings for one coordinator refresh.
+
+    Stage timings are CPU time (time.process_time). Most stages wrap only
+    synchronous work. The parse stage wraps whole streamed planner loops
+    to keep timing off the per-item path, so it also counts page decoding
+    and CPU used by other students while a page is awaited. Network time
+    is covered by the API's latency histograms.
+    """
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self.started = time.monotonic()
+        self.duration: float | None = None
+        self.stage_cpu: dict[str, float] = {}
+        self.student_wall: dict[str, float] = {}
+        # Traffic sent by this refresh, charged while it is current_refresh
+        self.pages = 0
+        self.bytes = 0
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Add the CPU time spent inside the block to a stage."""
+        start = time.process_time()
+        try:
+            yield
+        finally:
+            self.stage_cpu[name] = self.stage_cpu.get(name, 0.0) + time.process_time() - start
+
+    def finish(self) -> None:
+        """Record the refresh wall time."""
+        self.duration = time.monotonic() - self.started
+
+    def as_dict(self) -> dict:
+        """Return a JSON-serializable summary."""
+        return {
+            "duration_s": round(self.duration, 3) if self.duration is not None else None,
+            "pages": self.pages,
+            "bytes": self.bytes,
+            "stage_cpu_s": {name: round(seconds, 4) for name, seconds in self.stage_cpu.items()},
+            "student_wall_s": {
+                str(student_id): round(seconds, 3) for student_id, seconds in self.student_wall.items()
+            },
+        }
+
+# The refresh whose requests are being made; tasks it spawns inherit it
+current_refresh: ContextVar[RefreshStats | None] = ContextVar("canvas_current_refresh", default=None)
@@ -1,7 +1,17 @@
 """Student data container."""
 from __future__ import annotations
 from dataclasses import dataclass, field
-from .assignment_logic import CanvasAssignment
+from .assignment_logic import AssignmentIndex, CanvasAssignment
+
+# Only the course fields entities read are persisted in the snapshot
+_STORED_COURSE_KEYS = ("id", "name", "course_code", "enrollments")
+_STORED_ENROLLMENT_KEYS = (
+    "type",
+    "computed_current_score",
+    "computed_current_grade",
+    "computed_final_score",
+    "computed_final_grade",
+)
 
 @dataclass
 class CanvasStudentData:
@@ -10,3 +20,114 @@ class CanvasStudentData:
     name: str
     courses: list[dict] = field(default_factory=list)
     assignments: list[CanvasAssignment] = field(default_factory=list)
+    last_error: str | None = None
+    index: AssignmentIndex = field(init=False, repr=False, compare=False)
+    fingerprint: int = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        """Build the due-date index and content fingerprint once per refresh."""
+        self.index = AssignmentIndex(self.assignments)
+        self.fingerprint = assignments_fingerprint(self.assignments, self.last_error)
+
+    @property
+    def failed(self) -> bool:
+        """Return True if the last refresh for this student failed."""
+        return self.last_error is not None
+
+    def as_storage(self) -> dict:
+        """Return a compact, JSON-serializable form for the on-disk snapshot."""
+        return {
+            "student_id": self.student_id,
+            "name": self.name,
+            "courses": [_trim_course(course) for course in self.courses],
+            "assignments": [assignment.as_storage() for assignment in self.assignments],
+        }
+
+    @classmethod
+    def from_storage(cls, data: dict) -> CanvasStudentData:
+        """Create from the form written by as_storage."""
+        return cls(
+            student_id=data["student_id"],
+            name=data["name"],
+            courses=data.get("courses", []),
+            assignments=[CanvasAssignment.from_storage(item) for item in data.get("assignments", [])],
+        )
+
+def assignments_fingerprint(assignments: list[CanvasAssignment], last_error: str | None = None) -> int:
+    """Hash the assignment fields entities show, independent of API order."""
+    return hash((
+        last_error,
+        frozenset(
+            (a.id, a.name, a.course_name, a.due_at, a.is_submitted, a.description_hash)
+            for a in assignments
+        ),
+    ))
+
+def _trim_course(course: dict) -> dict:
+    """Drop course fields that entities never read."""
+    trimmed = {key: course[key] for key in _STORED_COURSE_KEYS if key in course}
+    trimmed["enrollments"] = [
+        {key: enrollment[key] for key in _STORED_ENROLLMENT_KEYS if key in enrollment}
+        for enrollment in course.get("enrollments", [])
+    ]
+    return trimmed
+
+_STUDENT_ENROLLMENT_TYPES = ("studentenrollment", "student")
+
+def split_observer_courses(courses: list[dict], student_ids: list) -> dict:
+    """Split an observer's course list into per-student course lists.
+
+    Courses are deduplicated by ID. Each student gets a shallow copy whose
+    enrollments are only that student's, matching /users/:id/courses, so
+    the term and name objects are shared rather than repeated.
+    """
+    wanted = {str(student_id): student_id for student_id in student_ids}
+    per_student: dict = {student_id: [] for student_id in student_ids}
+    seen = set()
+    for course in courses:
+        if course.get("id") in seen:
+            continue
+        seen.add(course.get("id"))
+        enrollments_by_student: dict = {}
+        for enrollment in course.get("enrollments", []):
+            if enrollment.get("type", "").lower() not in _STUDENT_ENROLLMENT_TYPES:
+                continue
+            student_id = wanted.get(str(enrollment.get("user_id")))
+            if student_id is not None:
+                enrollments_by_student.setdefault(student_id, []).append(enrollment)
+        for student_id, enrollments in enrollments_by_student.items():
+            per_student[student_id].append({**course, "enrollments": enrollments})
+    return per_student
+
+def build_grade_map(student_data: dict[str, CanvasStudentData]) -> dict[tuple[str, int], dict]:
+    """Map (student_id, course_id) to that course's enrollment grades."""
+    grades = {}
+    for student_id, data in student_data.items():
+        for course in data.courses:
+            enrollments = course.get("enrollments") or [{}]
+            grades[(student_id, course["id"])] = enrollments[0]
+    return grades
+
+def snapshot_to_storage(data: dict) -> dict:
+    """Serialize a coordinator snapshot for the on-disk store."""
+    return {
+        "students": [
+            {"id": student["id"], "name": student.get("name")}
+            for student in data["students"]
+        ],
+        "student_data": [
+            student_data.as_storage() for student_data in data["student_data"].values()
+        ],
+    }
+
+def snapshot_from_storage(stored: dict) -> dict:
+    """Rebuild a coordinator snapshot from the on-disk store."""
+    student_data = {
+        item.student_id: item
+        for item in (CanvasStudentData.from_storage(data) for data in stored.get("student_data", []))
+    }
+    return {
+        "students": stored.get("students", []),
+        "student_data": student_data,
+        "grades": build_grade_map(student_data),
+    }
@@ -0,0 +1,154 @@
+"""Per-host connection pools and clients shared across config entries."""
+from __future__ import annotations
+
+import asyncio
+import logging
+
+import aiohttp
+from yarl import URL
+
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.util.ssl import client_context
+
+from .api import CanvasAPI, CanvasRequestScheduler
+from .const import (
+    DOMAIN,
+    DEFAULT_MAX_CONCURRENT_REQUESTS,
+    REFRESH_STAGGER_WINDOW,
+    TRANSPORT_DNS_CACHE_TTL,
+    TRANSPORT_KEEPALIVE_TIMEOUT,
+    TRANSPORT_MAX_CONNECTIONS,
+)
+
+try:
+    from aiohttp.compression_utils import HAS_BROTLI
+except ImportError:
+    HAS_BROTLI = False
+
+_LOGGER = logging.getLogger(__name__)
+
+DATA_TRANSPORTS = f"{DOMAIN}_transports"
+
+# Canvas compresses JSON well; only advertise brotli when aiohttp can decode it
+ACCEPT_ENCODING = "gzip, deflate, br" if HAS_BROTLI else "gzip, deflate"
+
+# Fractional part of the golden ratio: successive slots land evenly spread
+# across the stagger window however many entries there end up being
+_GOLDEN_FRACTION = 0.6180339887
+
+class CanvasTransport:
+    """Connection pool, request slots and clients for one Canvas host.
+
+    Every entry on the host shares one keep-alive connection pool and one
+    concurrency limit. Canvas rate-limits per token, so each token gets its
+    own CanvasAPI (scheduler bucket, response cache and coalescer), shared
+    by all entries that use that token.
+    """
+
+    def __init__(
+        self, session: aiohttp.ClientSession, max_concurrent_requests: int = DEFAULT_MAX_CONCURRENT_REQUESTS
+    ) -> None:
+        """Initialize."""
+        self.session = session
+        self.semaphore = asyncio.Semaphore(max_concurrent_requests)
+        self._apis: dict[str, CanvasAPI] = {}
+        self._holders: dict[str, set[str]] = {}
+        # Stagger slot per holder; freed slots are reused
+        self._slots: list[str | None] = []
+        # Removes the shutdown listener that closes the pool
+        self.unsub_close: CALLBACK_TYPE | None = None
+
+    def get_api(self, url: str, token: str, holder: str, **kwargs) -> CanvasAPI:
+        """Return the shared client for a token, creating it on first use.
+
+        The first holder's kwargs shape the client; later holders of the
+        same token share it as is. Holders must release the transport.
+        """
+        api = self._apis.get(token)
+        if api is None:
+            scheduler = CanvasRequestScheduler(semaphore=self.semaphore)
+            api = self._apis[token] = CanvasAPI(url, token, self.session, scheduler=scheduler, **kwargs)
+        self._holders.setdefault(token, set()).add(holder)
+        if holder not in self._slots:
+            if None in self._slots:
+                self._slots[self._slots.index(None)] = holder
+            else:
+                self._slots.append(holder)
+        return api
+
+    def release(self, holder: str) -> None:
+        """Drop a holder, forgetting clients no entry uses any more."""
+        for token, holders in list(self._holders.items()):
+            holders.discard(holder)
+            if not holders:
+                del self._holders[token]
+                del self._apis[token]
+        if holder in self._slots:
+            self._slots[self._slots.index(holder)] = None
+
+    @property
+    def in_use(self) -> bool:
+        """Return True while any entry holds a client."""
+        return bool(self._holders)
+
+    def stagger_delay(self, holder: str, window: float = REFRESH_STAGGER_WINDOW) -> float:
+        """Return how long a holder should wait before its first refresh."""
+        if holder not in self._slots:
+            return 0.0
+        return (self._slots.index(holder) * _GOLDEN_FRACTION) % 1 * window
+
+def _host_key(url: str) -> str:
+    """Return the scheme and authority that identify a Canvas host."""
+    parsed = URL(url)
+    return f"{parsed.scheme}://{parsed.host}:{parsed.port}".lower()
+
+def _create_session() -> aiohttp.ClientSession:
+    """Create a session with a connection pool tuned for one Canvas host."""
+    connector = aiohttp.TCPConnector(
+        ssl=client_context(),
+        limit=TRANSPORT_MAX_CONNECTIONS,
+        keepalive_timeout=TRANSPORT_KEEPALIVE_TIMEOUT,
+        ttl_dns_cache=TRANSPORT_DNS_CACHE_TTL,
+        enable_cleanup_closed=True,
+    )
+    return aiohttp.ClientSession(connector=connector, headers={"Accept-Encoding": ACCEPT_ENCODING})
+
+@callback
+def async_get_transport(
+    hass: HomeAssistant, url: str, max_concurrent_requests: int = DEFAULT_MAX_CONCURRENT_REQUESTS
+) -> CanvasTransport:
+    """Return the transport for a Canvas host, creating it on first use."""
+    transports: dict[str, CanvasTransport] = hass.data.setdefault(DATA_TRANSPORTS, {})
+    key = _host_key(url)
+    transport = transports.get(key)
+    if transport is None:
+        transport = transports[key] = CanvasTransport(_create_session(), max_concurrent_requests)
+        _LOGGER.debug("Created Canvas transport for %s", key)
+
+        async def _async_close(event: Event) -> None:
+            """Close the connection pool on shutdown."""
+            await transport.session.close()
+
+        transport.unsub_close = hass.bus.async_listen_once(EVENT_HOMEASSISTANT_CLOSE, _async_close)
+    return transport
+
+@callback
+def async_release_transport(hass: HomeAssistant, url: str, holder: str) -> None:
+    """Release a holder's clients, closing the host's pool once unused.
+
+    Runs synchronously on unload, so a reloading entry never picks up a
+    pool that is about to close.
+    """
+    transports: dict[str, CanvasTransport] = hass.data.get(DATA_TRANSPORTS, {})
+    key = _host_key(url)
+    transport = transports.get(key)
+    if transport is None:
+        return
+    transport.release(holder)
+    if not transport.in_use:
+        del transports[key]
+        if transport.unsub_close is not None:
+            transport.unsub_close()
+            transport.unsub_close = None
+        hass.async_create_task(transport.session.close())
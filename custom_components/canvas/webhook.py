@@ -0,0 +1,62 @@
+"""Webhook endpoint for pushed Canvas events."""
+from __future__ import annotations
+
+import logging
+
+from aiohttp.web import Request, Response
+from homeassistant.components import webhook
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN, CONF_WEBHOOK_ID
+from .coordinator import CanvasDataUpdateCoordinator
+from .event_logic import parse_canvas_event
+
+_LOGGER = logging.getLogger(__name__)
+
+def async_register_webhook(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Register the entry's webhook, creating its ID on first use."""
+    if CONF_WEBHOOK_ID not in entry.data:
+        hass.config_entries.async_update_entry(
+            entry, data={**entry.data, CONF_WEBHOOK_ID: webhook.async_generate_id()}
+        )
+    webhook_id = entry.data[CONF_WEBHOOK_ID]
+    webhook.async_register(
+        hass, DOMAIN, "Canvas LMS", webhook_id, async_handle_webhook, allowed_methods=["POST"]
+    )
+    entry.async_on_unload(lambda: webhook.async_unregister(hass, webhook_id))
+    _LOGGER.info(
+        "Canvas events can be posted to %s", webhook.async_generate_url(hass, webhook_id)
+    )
+
+async def async_handle_webhook(
+    hass: HomeAssistant, webhook_id: str, request: Request
+) -> Response | None:
+    """Handle a pushed Canvas event, or a batch of them."""
+    try:
+        payload = await request.json()
+    except ValueError:
+        _LOGGER.debug("Ignoring Canvas webhook call without a JSON body")
+        return Response(status=400)
+
+    coordinator = next(
+        (
+            coordinator
+            for coordinator in hass.data.get(DOMAIN, {}).values()
+            if isinstance(coordinator, CanvasDataUpdateCoordinator)
+            and coordinator.entry.data.get(CONF_WEBHOOK_ID) == webhook_id
+        ),
+        None,
+    )
+    if coordinator is None:
+        return Response(status=404)
+
+    # Invalidate the whole batch first so one refresh covers it, and don't
+    # hold the sender's request open while Canvas is re-read
+    invalidated = False
+    for item in payload if isinstance(payload, list) else [payload]:
+        if (event := parse_canvas_event(item)) is not None:
+            invalidated |= coordinator.async_invalidate_event(event)
+    if invalidated:
+        hass.async_create_task(coordinator.async_request_refresh())
+    return None
@@ -0,0 +1,178 @@
+"""A synthetic Canvas server for offline benchmarks.
+
+Generates students x courses x planner items on the fly and serves them
+with numbered pagination, optional latency, Canvas rate-limit headers
+and injected errors. Data is deterministic for a given seed.
+"""
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+import random
+import time
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+@dataclass
+class FakeCanvasConfig:
+    """Shape and behaviour of the fake Canvas instance."""
+    students: int = 3
+    courses: int = 6
+    items_per_course: int = 40
+    max_per_page: int = 50
+    latency: float = 0.0
+    rate_limit: bool = True
+    bucket: float = 700.0
+    leak_rate: float = 10.0
+    request_cost: float = 1.5
+    # Fraction of requests answered with a 500, and students whose courses always fail
+    error_rate: float = 0.0
+    failing_students: set[int] = field(default_factory=set)
+    description_size: int = 600
+    seed: int = 1
+
+class FakeCanvas:
+    """aiohttp application serving the endpoints the integration uses."""
+
+    def __init__(self, config: FakeCanvasConfig | None = None) -> None:
+        self.config = config or FakeCanvasConfig()
+        self.requests = 0
+        self.errors = 0
+        self._random = random.Random(self.config.seed)
+        self._remaining = self.config.bucket
+        self._last_request = time.monotonic()
+        self._now = datetime.now(timezone.utc)
+        self.app = web.Application()
+        self.app.router.add_get("/api/v1/users/self/observees", self._observees)
+        self.app.router.add_get("/api/v1/users/self/profile", self._profile)
+        self.app.router.add_get("/api/v1/users/{user_id}/courses", self._courses)
+        self.app.router.add_get("/api/v1/courses", self._observer_courses)
+        self.app.router.add_get("/api/v1/planner/items", self._planner_items)
+        self.server: TestServer | None = None
+
+    async def __aenter__(self) -> FakeCanvas:
+        self.server = TestServer(self.app)
+        await self.server.start_server()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.server.close()
+
+    @property
+    def url(self) -> str:
+        """Base URL to hand to CanvasAPI."""
+        return str(self.server.make_url("")).rstrip("/")
+
+    # Data generation
+
+    def student_ids(self) -> list[int]:
+        return [1000 + n for n in range(self.config.students)]
+
+    def course_ids(self, student_id: int) -> list[int]:
+        # Students share some courses, as siblings in one school do
+        base = 100 + (student_id - 1000) * (self.config.courses // 2)
+        return [base + n for n in range(self.config.courses)]
+
+    def _course(self, course_id: int, student_ids: list[int]) -> dict:
+        enrollments = [
+            {
+                "type": "student",
+                "user_id": student_id,
+                "computed_current_score": 70 + course_id % 30,
+                "computed_current_grade": "B",
+                "computed_final_score": 68 + course_id % 30,
+                "computed_final_grade": "C",
+            }
+            for student_id in student_ids
+        ]
+        return {
+            "id": course_id,
+            "name": f"P{course_id % 8 + 1}-Course {course_id} H-TEACHER",
+            "course_code": f"C{course_id}",
+            "term": {"name": "2025-2026", "end_at": (self._now + timedelta(days=120)).isoformat()},
+            "enrollments": enrollments,
+        }
+
+    def _item(self, course_id: int, n: int) -> dict:
+        due = self._now + timedelta(days=n % 90 - 30, hours=course_id % 24)
+        return {
+            "plannable_type": "assignment" if n % 10 else "announcement",
+            "context_name": f"P{course_id % 8 + 1}-Course {course_id} H-TEACHER",
+            "plannable": {
+                "id": course_id * 100000 + n,
+                "title": f"Assignment {n} for course {course_id}",
+                "due_at": due.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "description": f"<p>Assignment {n}</p>" + "x" * self.config.description_size,
+            },
+            "submissions": {"submitted": n % 3 == 0, "graded": False},
+        }
+
+    # Request handling
+
+    async def _respond(self, request: web.Request, items: list) -> web.Response:
+        """Apply latency, rate limiting and errors, then serve one page of items."""
+        self.requests += 1
+        if self.config.latency:
+            await asyncio.sleep(self.config.latency)
+
+        headers = {}
+        if self.config.rate_limit:
+            now = time.monotonic()
+            refilled = self._remaining + (now - self._last_request) * self.config.leak_rate
+            self._last_request = now
+            self._remaining = max(0.0, min(self.config.bucket, refilled) - self.config.request_cost)
+            headers["X-Rate-Limit-Remaining"] = f"{self._remaining:.1f}"
+            headers["X-Request-Cost"] = f"{self.config.request_cost:.1f}"
+
+        if self.config.error_rate and self._random.random() < self.config.error_rate:
+            self.errors += 1
+            return web.json_response({"errors": [{"message": "injected"}]}, status=500, headers=headers)
+
+        per_page = min(int(request.query.get("per_page", 10)), self.config.max_per_page)
+        page = int(request.query.get("page", 1))
+        last = max(1, -(-len(items) // per_page))
+        links = []
+        if page < last:
+            links.append(f'<{request.url.update_query(page=page + 1)}>; rel="next"')
+        links.append(f'<{request.url.update_query(page=last)}>; rel="last"')
+        headers["Link"] = ",".join(links)
+        return web.json_response(items[(page - 1) * per_page : page * per_page], headers=headers)
+
+    async def _observees(self, request: web.Request) -> web.Response:
+        students = [{"id": student_id, "name": f"Student {student_id}"} for student_id in self.student_ids()]
+        return await self._respond(request, students)
+
+    async def _profile(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        return web.json_response({"id": 1, "name": "Observer"})
+
+    async def _courses(self, request: web.Request) -> web.Response:
+        student_id = int(request.match_info["user_id"])
+        if student_id in self.config.failing_students:
+            self.requests += 1
+            self.errors += 1
+            return web.json_response({"errors": [{"message": "injected"}]}, status=500)
+        return await self._respond(request, [self._course(course_id, [student_id]) for course_id in self.course_ids(student_id)])
+
+    async def _observer_courses(self, request: web.Request) -> web.Response:
+        students_by_course: dict[int, list[int]] = {}
+        for student_id in self.student_ids():
+            for course_id in self.course_ids(student_id):
+                students_by_course.setdefault(course_id, []).append(student_id)
+        courses = [self._course(course_id, student_ids) for course_id, student_ids in sorted(students_by_course.items())]
+        return await self._respond(request, courses)
+
+    async def _planner_items(self, request: web.Request) -> web.Response:
+        course_ids = [int(code.removeprefix("course_")) for code in request.query.getall("context_codes[]", [])]
+        start = request.query.get("start_date", "")
+        end = request.query.get("end_date", "9999")
+        items = [
+            item
+            for course_id in course_ids
+            for n in range(self.config.items_per_course)
+            if start <= (item := self._item(course_id, n))["plannable"]["due_at"][:10] <= end
+        ]
+        items.sort(key=lambda item: item["plannable"]["due_at"])
+        return await self._respond(request, items)
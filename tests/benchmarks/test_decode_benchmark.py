@@ -0,0 +1,71 @@
+"""Decode benchmark: stdlib json vs the fast decoders CanvasAPI picks up.
+
+Run with `uv run pytest tests/benchmarks -s` to print the numbers; set
+CANVAS_BENCHMARK_ITEMS to change how far the fixtures are scaled up.
+"""
+from __future__ import annotations
+
+import importlib
+import json
+import os
+import time
+
+import pytest
+
+from custom_components.canvas.api import default_json_loads
+
+ITEMS = int(os.getenv("CANVAS_BENCHMARK_ITEMS", "2000"))
+ROUNDS = 5
+
+def scaled_fixture(name: str, count: int) -> bytes:
+    """Repeat a fixture's items into one large page, with a long HTML body on each."""
+    with open(f"tests/fixtures/{name}") as f:
+        items = json.load(f)
+    if not isinstance(items, list):
+        items = [items]
+    description = "<p>" + "Show all work and cite sources. " * 40 + "</p>"
+    payload = [
+        {**items[i % len(items)], "id": i, "description": description}
+        for i in range(count)
+    ]
+    return json.dumps(payload).encode()
+
+def best_time(loads, body: bytes) -> float:
+    """Return the fastest of a few decode runs, in seconds."""
+    times = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        loads(body)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def available_decoders() -> dict:
+    """Return the decoders installed in this environment."""
+    decoders = {"json": json.loads}
+    for module, attr in (("orjson", "loads"), ("msgspec.json", "decode")):
+        try:
+            decoders[module] = getattr(importlib.import_module(module), attr)
+        except ImportError:
+            continue
+    return decoders
+
+@pytest.mark.parametrize("fixture", ["assignments.json", "courses.json"])
+def test_decoders_agree_and_report_speed(fixture):
+    body = scaled_fixture(fixture, ITEMS)
+    decoders = available_decoders()
+    baseline = json.loads(body)
+
+    results = {}
+    for name, loads in decoders.items():
+        assert loads(body) == baseline
+        results[name] = best_time(loads, body)
+
+    stdlib = results["json"]
+    print(
+        f"\n{fixture} x{ITEMS} ({len(body) / 1024:.0f} KiB): "
+        + ", ".join(
+            f"{name} {seconds * 1000:.1f} ms ({stdlib / seconds:.1f}x)"
+            for name, seconds in results.items()
+        )
+        + f"; default is {default_json_loads().__module__}"
+    )
@@ -0,0 +1,119 @@
+"""Memory and parse benchmark: plain dataclass assignments vs the compact representation.
+
+Run with `uv run pytest tests/benchmarks -s` to print the numbers; set
+CANVAS_BENCHMARK_ITEMS to change the number of planner items.
+"""
+from __future__ import annotations
+
+import gc
+import json
+import os
+import random
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime
+
+from custom_components.canvas.assignment_logic import CanvasAssignment, _clean_course_name
+
+ITEMS = int(os.getenv("CANVAS_BENCHMARK_ITEMS", "2000"))
+
+@dataclass
+class LegacyAssignment:
+    """The original dict-backed representation, kept for comparison."""
+    id: str
+    name: str
+    course_name: str
+    due_at: datetime | None
+    is_submitted: bool = False
+    description: str = ""
+
+    @classmethod
+    def from_dict(cls, data: dict) -> LegacyAssignment:
+        plannable = data["plannable"]
+        return cls(
+            id=str(plannable["id"]),
+            name=plannable["title"],
+            course_name=_clean_course_name(data["context_name"]),
+            due_at=datetime.fromisoformat(plannable["due_at"].replace("Z", "+00:00")),
+            is_submitted=data["submissions"]["submitted"],
+            description=plannable["description"],
+        )
+
+_WORDS = (
+    "read chapter answer questions explain reasoning cite sources lab report draft essay "
+    "complete worksheet review notes vocabulary quiz project group present graph data "
+    "analyze results summary paragraph evidence rubric submit upload photo diagram"
+).split()
+
+def _description(rng: random.Random, i: int) -> str:
+    """Return item-specific HTML, so compression isn't flattered by repetition."""
+    parts = [f"<p>{' '.join(rng.choices(_WORDS, k=rng.randint(8, 30)))}.</p>" for _ in range(rng.randint(1, 5))]
+    steps = "".join(f"<li>{' '.join(rng.choices(_WORDS, k=rng.randint(3, 12)))} ({i}.{p})</li>" for p in range(rng.randint(0, 10)))
+    return "".join(parts) + (f"<ul>{steps}</ul>" if steps else "")
+
+def planner_payload(count: int) -> str:
+    """Return a JSON planner payload with realistic course names and HTML."""
+    courses = [f"P{n}-Course {n} H-TEACHER" for n in range(1, 13)]
+    rng = random.Random(1)
+    items = [
+        {
+            "plannable_type": "assignment",
+            "context_name": courses[i % len(courses)],
+            "plannable": {
+                "id": 100000 + i,
+                "title": f"Assignment {i}",
+                "due_at": f"2026-{1 + i % 12:02d}-{1 + i % 28:02d}T23:59:00Z",
+                "description": _description(rng, i),
+            },
+            "submissions": {"submitted": i % 3 == 0},
+        }
+        for i in range(count)
+    ]
+    return json.dumps(items)
+
+def retained_bytes(payload: str, factory, settle=None) -> int:
+    """Return memory retained by the converted objects once the raw payload is gone."""
+    gc.collect()
+    tracemalloc.start()
+    raw = json.loads(payload)
+    assignments = [factory(item) for item in raw]
+    del raw
+    if settle is not None:
+        for assignment in assignments:
+            settle(assignment)
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert len(assignments) == ITEMS
+    return current
+
+def parse_seconds(payload: str, factory) -> float:
+    """Return the best time to convert every decoded item."""
+    raw = json.loads(payload)
+    times = []
+    for _ in range(5):
+        start = time.perf_counter()
+        for item in raw:
+            factory(item)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def test_compact_assignments_use_less_memory():
+    payload = planner_payload(ITEMS)
+
+    legacy = retained_bytes(payload, LegacyAssignment.from_dict)
+    parsed = retained_bytes(payload, CanvasAssignment.from_dict)
+    # After the first snapshot save, only packed descriptions are kept
+    saved = retained_bytes(payload, CanvasAssignment.from_dict, settle=lambda a: a.packed_description)
+    legacy_s = parse_seconds(payload, LegacyAssignment.from_dict)
+    compact_s = parse_seconds(payload, CanvasAssignment.from_dict)
+
+    print(
+        f"\n{ITEMS} assignments: legacy {legacy / 1024:.0f} KiB ({legacy / ITEMS:.0f} B/item), "
+        f"parsed {parsed / 1024:.0f} KiB, after save {saved / 1024:.0f} KiB "
+        f"({saved / ITEMS:.0f} B/item), {100 * (1 - saved / legacy):.0f}% smaller; "
+        f"parse legacy {legacy_s * 1000:.1f} ms, compact {compact_s * 1000:.1f} ms"
+    )
+    assert parsed <= legacy
+    assert saved < legacy
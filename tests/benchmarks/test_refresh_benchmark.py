@@ -0,0 +1,134 @@
+"""End-to-end refresh benchmark against a synthetic Canvas server.
+
+Run with `uv run pytest tests/benchmarks -s` to print the numbers. The
+data shape is set with CANVAS_BENCHMARK_STUDENTS, CANVAS_BENCHMARK_COURSES
+and CANVAS_BENCHMARK_ITEMS_PER_COURSE; CANVAS_BENCHMARK_LATENCY adds a
+per-request delay in seconds.
+"""
+from __future__ import annotations
+
+from datetime import datetime
+import os
+import time
+import tracemalloc
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import aiohttp
+import pytest
+
+from custom_components.canvas.api import CanvasAPI
+from custom_components.canvas.const import CONF_BATCH_COURSES
+from custom_components.canvas.coordinator import CanvasDataUpdateCoordinator
+from custom_components.canvas.sensor import CanvasAssignmentSensor, CanvasGradeSensor, CanvasLastMissedSensor
+from fake_canvas import FakeCanvas, FakeCanvasConfig
+
+STUDENTS = int(os.getenv("CANVAS_BENCHMARK_STUDENTS", "3"))
+COURSES = int(os.getenv("CANVAS_BENCHMARK_COURSES", "6"))
+ITEMS_PER_COURSE = int(os.getenv("CANVAS_BENCHMARK_ITEMS_PER_COURSE", "40"))
+LATENCY = float(os.getenv("CANVAS_BENCHMARK_LATENCY", "0"))
+SENSOR_READS = 20
+
+def _coordinator(api: CanvasAPI, **options) -> CanvasDataUpdateCoordinator:
+    entry = MagicMock()
+    entry.options = options
+    return CanvasDataUpdateCoordinator(MagicMock(), api, entry)
+
+def _sensors(coordinator: CanvasDataUpdateCoordinator) -> list:
+    sensors = []
+    for student_id, student_data in coordinator.data["student_data"].items():
+        sensors.extend(
+            CanvasAssignmentSensor(coordinator, student_id, student_data.name, sensor_type, days=7)
+            for sensor_type in ("today", "tomorrow", "upcoming_week", "missed")
+        )
+        sensors.append(CanvasLastMissedSensor(coordinator, student_id, student_data.name, days=7))
+        sensors.extend(
+            CanvasGradeSensor(coordinator, student_id, student_data.name, course, course["enrollments"][0])
+            for course in student_data.courses
+        )
+    return sensors
+
+@pytest.fixture(autouse=True)
+def real_dt_util(monkeypatch):
+    """Swap the mocked dt_util for the helper the sensors use."""
+    dt_util = SimpleNamespace(now=lambda: datetime.now().astimezone())
+    monkeypatch.setattr("custom_components.canvas.sensor.dt_util", dt_util)
+
+async def test_refresh_benchmark():
+    config = FakeCanvasConfig(
+        students=STUDENTS, courses=COURSES, items_per_course=ITEMS_PER_COURSE, latency=LATENCY
+    )
+
+    async with FakeCanvas(config) as canvas, aiohttp.ClientSession() as session:
+        api = CanvasAPI(canvas.url, "token", session)
+        coordinator = _coordinator(api)
+
+        tracemalloc.start()
+        started = time.perf_counter()
+        coordinator.data = await coordinator._async_update_data()
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        sensors = _sensors(coordinator)
+        started = time.perf_counter()
+        for _ in range(SENSOR_READS):
+            for sensor in sensors:
+                sensor._handle_coordinator_update()
+                sensor.native_value
+                sensor.extra_state_attributes
+        read_us = (time.perf_counter() - started) / (SENSOR_READS * len(sensors)) * 1e6
+
+    student_data = coordinator.data["student_data"]
+    assert len(student_data) == STUDENTS
+    assert all(not data.failed for data in student_data.values())
+    assert all(len(data.assignments) for data in student_data.values())
+
+    stats = coordinator.last_refresh_stats.as_dict()
+    print(
+        f"\n{STUDENTS} students x {COURSES} courses x {ITEMS_PER_COURSE} items: "
+        f"refresh {elapsed * 1000:.0f} ms over {canvas.requests} requests, "
+        f"peak {peak / 1024:.0f} KiB, {len(sensors)} sensors at {read_us:.1f} us/update+read; "
+        f"stage cpu {stats['stage_cpu_s']}"
+    )
+
+async def test_refresh_survives_injected_errors():
+    config = FakeCanvasConfig(students=3, courses=2, items_per_course=10, failing_students={1001})
+
+    async with FakeCanvas(config) as canvas, aiohttp.ClientSession() as session:
+        api = CanvasAPI(canvas.url, "token", session)
+        coordinator = _coordinator(api)
+        data = await coordinator._async_update_data()
+
+    assert data["student_data"][1001].failed
+    assert not data["student_data"][1000].failed
+    assert canvas.errors == 1
+
+async def test_paginated_planner_is_complete():
+    config = FakeCanvasConfig(students=1, courses=3, items_per_course=50, max_per_page=7, rate_limit=False)
+
+    async with FakeCanvas(config) as canvas, aiohttp.ClientSession() as session:
+        api = CanvasAPI(canvas.url, "token", session)
+        items = await api.async_get_planner_items(
+            "1000", "2000-01-01", "2999-12-31", [f"course_{course_id}" for course_id in canvas.course_ids(1000)]
+        )
+
+    assert len(items) == 150
+    assert len({item["plannable"]["id"] for item in items}) == 150
+
+async def test_batched_courses_save_requests():
+    config = FakeCanvasConfig(students=4, courses=6, items_per_course=5)
+    requests = {}
+
+    for batch in (False, True):
+        async with FakeCanvas(config) as canvas, aiohttp.ClientSession() as session:
+            coordinator = _coordinator(CanvasAPI(canvas.url, "token", session), **{CONF_BATCH_COURSES: batch})
+            data = await coordinator._async_update_data()
+            requests[batch] = canvas.requests
+            courses = {student_id: [c["id"] for c in d.courses] for student_id, d in data["student_data"].items()}
+            if batch:
+                assert courses == per_student_courses
+            per_student_courses = courses
+
+    print(f"\ncourse resolution: {requests[False]} requests per student, {requests[True]} batched")
+    assert requests[True] < requests[False]
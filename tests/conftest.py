@@ -1,3 +1,4 @@
+import ssl
 import sys
 from unittest.mock import MagicMock, AsyncMock
 
@@ -11,15 +12,41 @@ class MockDataUpdateCoordinator:
 class MockCoordinatorEntity:
     def __init__(self, coordinator):
         self.coordinator = coordinator
+        self.state_writes = 0
+    @property
+    def available(self):
+        return True
+    def _handle_coordinator_update(self):
+        self.async_write_ha_state()
+    def async_write_ha_state(self):
+        self.state_writes += 1
     def __class_getitem__(cls, _):
         return cls
 
 class MockSensorEntity:
-    pass
+    _attr_native_value = None
+    _attr_extra_state_attributes = None
+    @property
+    def native_value(self):
+        return self._attr_native_value
+    @property
+    def extra_state_attributes(self):
+        return self._attr_extra_state_attributes
 
 class MockCalendarEntity:
     pass
 
+class MockConfigFlow:
+    def __init_subclass__(cls, domain=None, **kwargs):
+        super().__init_subclass__(**kwargs)
+    def async_create_entry(self, *, title, data):
+        return {"type": "create_entry", "title": title, "data": data}
+    def async_show_form(self, *, step_id, data_schema=None, errors=None):
+        return {"type": "form", "step_id": step_id, "errors": errors}
+
+class MockOptionsFlow(MockConfigFlow):
+    pass
+
 class MockDeviceInfo:
     def __init__(self, **kwargs):
         for k, v in kwargs.items():
@@ -35,20 +62,33 @@ mock_hass.async_create_task = AsyncMock()
 
 sys.modules["homeassistant"] = MagicMock()
 sys.modules["homeassistant.config_entries"] = MagicMock()
+sys.modules["homeassistant.config_entries"].ConfigFlow = MockConfigFlow
+sys.modules["homeassistant.config_entries"].OptionsFlow = MockOptionsFlow
+sys.modules["homeassistant"].config_entries = sys.modules["homeassistant.config_entries"]
+sys.modules["homeassistant.data_entry_flow"] = MagicMock()
 sys.modules["homeassistant.const"] = MagicMock()
 sys.modules["homeassistant.core"] = MagicMock()
+sys.modules["homeassistant.core"].callback = lambda func: func
 sys.modules["homeassistant.components"] = MagicMock()
 sys.modules["homeassistant.components.sensor"] = MagicMock()
 sys.modules["homeassistant.components.sensor"].SensorEntity = MockSensorEntity
 sys.modules["homeassistant.components.calendar"] = MagicMock()
 sys.modules["homeassistant.components.calendar"].CalendarEntity = MockCalendarEntity
+sys.modules["homeassistant.components.webhook"] = sys.modules["homeassistant.components"].webhook
+sys.modules["homeassistant.components.diagnostics"] = MagicMock()
+sys.modules["homeassistant.components.diagnostics"].async_redact_data = lambda data, keys: {
+    key: "**REDACTED**" if key in keys else value for key, value in data.items()
+}
 sys.modules["homeassistant.helpers"] = MagicMock()
 mock_device_reg = MagicMock()
 mock_device_reg.DeviceInfo = MockDeviceInfo
 sys.modules["homeassistant.helpers.device_registry"] = mock_device_reg
 sys.modules["homeassistant.helpers.aiohttp_client"] = MagicMock()
 sys.modules["homeassistant.helpers.entity_platform"] = MagicMock()
+sys.modules["homeassistant.helpers.storage"] = MagicMock()
 sys.modules["homeassistant.util"] = MagicMock()
+sys.modules["homeassistant.util.ssl"] = MagicMock()
+sys.modules["homeassistant.util.ssl"].client_context = ssl.create_default_context
 
 # Specifically handle the update_coordinator module
 mock_coordinator_mod = MagicMock()
@@ -1,8 +1,11 @@
+import asyncio
+import gzip
 import json
 import os
 import pytest
 import aiohttp
-from custom_components.canvas.api import CanvasAPI
+from custom_components.canvas.api import CanvasAPI, CanvasRequestCoalescer, CanvasRequestScheduler, CanvasResponseCache, CachedResponse
+from custom_components.canvas.stats_logic import RefreshStats, current_refresh
 
 @pytest.fixture
 def mock_user_profile():
@@ -91,6 +94,70 @@ async def test_get_courses(aresponses, mock_courses):
         assert len(result) == 2
         assert result[0]["id"] == 101
 
+@pytest.mark.asyncio
+async def test_custom_json_decoder(aresponses, mock_user_profile):
+    aresponses.add(
+        "example.com",
+        "/api/v1/users/self/profile",
+        "GET",
+        aresponses.Response(text=json.dumps(mock_user_profile), status=200, content_type="application/json")
+    )
+    decoded = []
+
+    def loads(body):
+        decoded.append(body)
+        return json.loads(body)
+
+    async with aiohttp.ClientSession() as session:
+        api = CanvasAPI("https://example.com", "token", session, json_loads=loads)
+        result = await api.async_get_user_info()
+        assert result["id"] == 12345
+        assert isinstance(decoded[0], bytes)
+
+@pytest.mark.asyncio
+async def test_courses_request_only_asked_for_includes(aresponses, mock_courses):
+    queries = []
+
+    def handler(request):
+        queries.append(request.query.getall("include[]", []))
+        return aresponses.Response(text=json.dumps(mock_courses), status=200, content_type="application/json")
+
+    aresponses.add("example.com", "/api/v1/users/67890/courses", "GET", handler, repeat=2)
+
+    async with aiohttp.ClientSession() as session:
+        api = CanvasAPI("https://example.com", "token", session)
+        await api.async_get_courses("67890")
+        await api.async_get_courses("67890", fields=("term",))
+
+    assert queries == [["total_scores", "term"], ["term"]]
+
+@pytest.mark.asyncio
+async def test_planner_drops_unwanted_types(aresponses):
+    items = [
+        {"plannable_type": "assignment", "plannable": {"id": 1}},
+        {"plannable_type": "announcement", "plannable": {"id": 2}},
+        {"plannable_type": "discussion_topic", "plannable": {"id": 3}},
+    ]
+    aresponses.add(
+        "example.com",
+        "/api/v1/planner/items",
+        "GET",
+        aresponses.Response(text=json.dumps(items), status=200, content_type="application/json"),
+    )
+
+    async with aiohttp.ClientSession() as session:
+        api = CanvasAPI("https://example.com", "token", session)
+        result = [
+            item
+            async for item in api.async_iter_planner_items(
+                "1", "2026-01-01", "2026-02-01", ["course_1"], plannable_types={"assignment"}
+            )
+        ]
+
+    assert [item["plannable"]["id"] for item in result] == [1]
+    assert api.stats.dropped_items == 2
+    assert api.stats.total_bytes > 0
+
 @pytest.mark.asyncio
 async def test_api_error(aresponses):
     aresponses.add(
@@ -104,3 +171,182 @@ async def test_api_error(aresponses):
         api = CanvasAPI("https://example.com", "token", session)
         with pytest.raises(aiohttp.ClientResponseError):
             await api.async_get_user_info()
+
+@pytest.mark.asyncio
+async def test_conditional_request_reuses_cached_body(aresponses, mock_observees):
+    seen_headers = []
+
+    def handler(request):
+        seen_headers.append(request.headers.get("If-None-Match"))
+        if request.headers.get("If-None-Match") == '"v1"':
+            return aresponses.Response(status=304)
+        return aresponses.Response(
+            text=json.dumps(mock_observees),
+            status=200,
+            content_type="application/json",
+            headers={"ETag": '"v1"'},
+        )
+
+    aresponses.add("example.com", "/api/v1/users/self/observees", "GET", handler, repeat=2)
+
+    async with aiohttp.ClientSession() as session:
+        # Disable the short-lived result cache so the second call is revalidated
+        api = CanvasAPI("https://example.com", "token", session, request_ttl=0)
+        first = await api.async_get_students()
+        second = await api.async_get_students()
+
+        assert seen_headers == [None, '"v1"']
+        assert second == first
+        assert api.response_cache.hits == 1
+        assert api.response_cache.misses == 1
+
+@pytest.mark.asyncio
+async def test_identical_requests_share_one_call(aresponses, mock_observees):
+    calls = []
+
+    async def handler(request):
+        calls.append(request.path)
+        await asyncio.sleep(0.05)
+        return aresponses.Response(text=json.dumps(mock_observees), status=200, content_type="application/json")
+
+    aresponses.add("example.com", "/api/v1/users/self/observees", "GET", handler, repeat=2)
+
+    async with aiohttp.ClientSession() as session:
+        api = CanvasAPI("https://example.com", "token", session)
+        first, second = await asyncio.gather(api.async_get_students(), api.async_get_students())
+        third = await api.async_get_students()
+
+        assert len(calls) == 1
+        assert first == second == third
+        assert api.coalescer.shared == 1
+        assert api.coalescer.recent_hits == 1
+
+@pytest.mark.asyncio
+async def test_coalescer_shares_errors_and_retries_after_cancelled_leader():
+    coalescer = CanvasRequestCoalescer()
+    started = asyncio.Event()
+
+    async def fail():
+        started.set()
+        await asyncio.sleep(0.01)
+        raise aiohttp.ClientError("boom")
+
+    leader = asyncio.create_task(coalescer.async_run("k", fail))
+    await started.wait()
+    with pytest.raises(aiohttp.ClientError):
+        await coalescer.async_run("k", fail)
+    with pytest.raises(aiohttp.ClientError):
+        await leader
+
+    async def slow():
+        await asyncio.sleep(10)
+
+    started.clear()
+    leader = asyncio.create_task(coalescer.async_run("k", slow))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(coalescer.async_run("k", lambda: asyncio.sleep(0, result="fresh")))
+    await asyncio.sleep(0)
+    leader.cancel()
+    assert await follower == "fresh"
+
+def test_response_cache_evicts_least_recently_used():
+    cache = CanvasResponseCache(max_entries=2)
+    cache.set("a", CachedResponse(data=1, etag="a"))
+    cache.set("b", CachedResponse(data=2, etag="b"))
+    cache.get("a")
+    cache.set("c", CachedResponse(data=3, etag="c"))
+
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a").data == 1
+
+@pytest.mark.asyncio
+async def test_throttled_request_is_retried(aresponses, mock_user_profile):
+    aresponses.add(
+        "example.com",
+        "/api/v1/users/self/profile",
+        "GET",
+        aresponses.Response(text="403 Forbidden (Rate Limit Exceeded)", status=403)
+    )
+    aresponses.add(
+        "example.com",
+        "/api/v1/users/self/profile",
+        "GET",
+        aresponses.Response(text="Too Many Requests", status=429)
+    )
+    aresponses.add(
+        "example.com",
+        "/api/v1/users/self/profile",
+        "GET",
+        aresponses.Response(
+            text=json.dumps(mock_user_profile),
+            status=200,
+            content_type="application/json",
+            headers={"X-Rate-Limit-Remaining": "600.0", "X-Request-Cost": "1.5"},
+        )
+    )
+
+    async with aiohttp.ClientSession() as session:
+        scheduler = CanvasRequestScheduler(backoff_base=0.01)
+        api = CanvasAPI("https://example.com", "token", session, scheduler=scheduler)
+        result = await api.async_get_user_info()
+        assert result["id"] == 12345
+        assert scheduler.estimated_remaining() >= 600.0
+
+@pytest.mark.asyncio
+async def test_throttled_token_does_not_hold_shared_slots():
+    semaphore = asyncio.Semaphore(2)
+    throttled = CanvasRequestScheduler(semaphore=semaphore)
+    healthy = CanvasRequestScheduler(semaphore=semaphore)
+    throttled.throttled(0, "3")
+
+    async def request(scheduler):
+        async with scheduler.async_slot():
+            pass
+
+    waiting = [asyncio.create_task(request(throttled)) for _ in range(2)]
+    await asyncio.sleep(0)
+    # The throttled token waits without taking the host's slots
+    await asyncio.wait_for(request(healthy), timeout=0.5)
+    assert not any(task.done() for task in waiting)
+    for task in waiting:
+        task.cancel()
+    await asyncio.gather(*waiting, return_exceptions=True)
+    assert semaphore._value == 2
+
+def test_scheduler_delays_near_empty_bucket():
+    scheduler = CanvasRequestScheduler(leak_rate=10.0, low_water=150.0)
+    assert scheduler.delay() == 0
+
+    scheduler.update({"X-Rate-Limit-Remaining": "500.0"})
+    assert scheduler.delay() == 0
+
+    # Below the low-water mark the next request waits for the bucket to leak
+    scheduler.update({"X-Rate-Limit-Remaining": "100.0"})
+    assert scheduler.delay() == pytest.approx(10.0, abs=0.1)
+
+@pytest.mark.asyncio
+async def test_stats_charge_wire_bytes_to_the_current_refresh(aresponses):
+    body = json.dumps([{"id": n, "name": "Student " * 20} for n in range(50)]).encode()
+    compressed = gzip.compress(body)
+
+    def handler(request):
+        return aresponses.Response(
+            body=compressed, status=200, headers={"Content-Type": "application/json", "Content-Encoding": "gzip"}
+        )
+
+    aresponses.add("example.com", "/api/v1/users/self/observees", "GET", handler, repeat=2)
+
+    async with aiohttp.ClientSession() as session:
+        api = CanvasAPI("https://example.com", "token", session, request_ttl=0)
+        refresh = RefreshStats()
+        token = current_refresh.set(refresh)
+        try:
+            assert len(await api.async_get_students()) == 50
+        finally:
+            current_refresh.reset(token)
+        # Another entry sharing the client: not charged to this refresh
+        await api.async_get_students()
+
+    assert (refresh.pages, refresh.bytes) == (1, len(compressed))
+    assert api.stats.total_bytes == 2 * len(compressed) < 2 * len(body)
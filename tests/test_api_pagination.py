@@ -1,7 +1,9 @@
+import asyncio
+from contextlib import aclosing
 import json
 import pytest
 import aiohttp
-from custom_components.canvas.api import CanvasAPI
+from custom_components.canvas.api import CanvasAPI, parse_link_header, expand_page_urls
 
 @pytest.mark.asyncio
 async def test_get_paginated_data(aresponses):
@@ -39,3 +41,155 @@ async def test_get_paginated_data(aresponses):
         assert len(result) == 2
         assert result[0]["id"] == 1
         assert result[1]["id"] == 2
+
+def test_parse_link_header():
+    header = (
+        '<https://example.com/api/v1/items?page=2&per_page=100>; rel="next",'
+        '<https://example.com/api/v1/items?page=1&per_page=100>; rel="first",'
+        '<https://example.com/api/v1/items?page=4&per_page=100>; rel="last"'
+    )
+    links = parse_link_header(header)
+    assert links["next"].endswith("page=2&per_page=100")
+    assert links["last"].endswith("page=4&per_page=100")
+
+    pages = expand_page_urls(links)
+    assert [p.split("?")[1] for p in pages] == [
+        "page=2&per_page=100",
+        "page=3&per_page=100",
+        "page=4&per_page=100",
+    ]
+
+    # Bookmark cursors can't be expanded and must be walked serially
+    bookmark_links = parse_link_header(
+        '<https://example.com/api/v1/items?page=bookmark:abc>; rel="next",'
+        '<https://example.com/api/v1/items?page=bookmark:xyz>; rel="last"'
+    )
+    assert expand_page_urls(bookmark_links) == []
+
+@pytest.mark.asyncio
+async def test_get_paginated_prefetches_numbered_pages(aresponses):
+    last = '<https://example.com/api/v1/courses/101/assignments?page=3&per_page=100>; rel="last"'
+    aresponses.add(
+        "example.com",
+        "/api/v1/courses/101/assignments?per_page=100",
+        "GET",
+        aresponses.Response(
+            text=json.dumps([{"id": 1}]),
+            status=200,
+            content_type="application/json",
+            headers={
+                "Link": '<https://example.com/api/v1/courses/101/assignments?page=2&per_page=100>; rel="next",' + last
+            }
+        ),
+        match_querystring=True,
+    )
+    for page in (3, 2):
+        aresponses.add(
+            "example.com",
+            f"/api/v1/courses/101/assignments?page={page}&per_page=100",
+            "GET",
+            aresponses.Response(
+                text=json.dumps([{"id": page}]),
+                status=200,
+                content_type="application/json",
+            ),
+            match_querystring=True,
+        )
+
+    async with aiohttp.ClientSession() as session:
+        api = CanvasAPI("https://example.com", "token", session)
+        result = await api.async_get_assignments("101")
+
+        # Results stay in page order regardless of completion order
+        assert [item["id"] for item in result] == [1, 2, 3]
+
+@pytest.mark.asyncio
+async def test_iter_planner_items_streams_pages(aresponses):
+    aresponses.add(
+        "example.com",
+        "/api/v1/planner/items",
+        "GET",
+        aresponses.Response(
+            text=json.dumps([{"id": 1}, {"id": 2}]),
+            status=200,
+            content_type="application/json",
+            headers={"Link": '<https://example.com/api/v1/planner/items?page=bookmark:xyz>; rel="next"'}
+        )
+    )
+    aresponses.add(
+        "example.com",
+        "/api/v1/planner/items",
+        "GET",
+        aresponses.Response(text=json.dumps([{"id": 3}]), status=200, content_type="application/json")
+    )
+
+    async with aiohttp.ClientSession() as session:
+        api = CanvasAPI("https://example.com", "token", session)
+        items = [
+            item["id"]
+            async for item in api.async_iter_planner_items("1", "2026-01-01", "2026-02-01", ["course_1"])
+        ]
+        assert items == [1, 2, 3]
+
+@pytest.mark.asyncio
+async def test_iter_planner_items_bounds_prefetch_and_caches_raw_pages(aresponses):
+    requested = []
+
+    def handler(request):
+        page = int(request.query.get("page", 1))
+        requested.append(page)
+        if request.headers.get("If-None-Match") == f'"p{page}"':
+            return aresponses.Response(status=304)
+        headers = {"ETag": f'"p{page}"', "Link": '<https://example.com/api/v1/planner/items?page=6&per_page=100>; rel="last"'}
+        if page < 6:
+            headers["Link"] += f',<https://example.com/api/v1/planner/items?page={page + 1}&per_page=100>; rel="next"'
+        return aresponses.Response(text=json.dumps([{"id": page}]), status=200, content_type="application/json", headers=headers)
+
+    aresponses.add("example.com", "/api/v1/planner/items", "GET", handler, repeat=12)
+
+    async with aiohttp.ClientSession() as session:
+        api = CanvasAPI("https://example.com", "token", session, max_concurrent_pages=2)
+        items = []
+        async for item in api.async_iter_planner_items("1", "2026-01-01", "2026-02-01", ["course_1"]):
+            # Only a window of pages ahead of the consumer is fetched
+            await asyncio.sleep(0.01)
+            assert len(requested) <= item["id"] + 2
+            items.append(item["id"])
+        assert items == [1, 2, 3, 4, 5, 6]
+
+        # Streamed pages are cached as compressed bytes, not parsed, and not coalesced afterwards
+        assert len(api.response_cache) == 6
+        assert all(cached.data is None and cached.body for cached in api.response_cache._entries.values())
+        assert not api.coalescer._recent
+
+        # A revalidated page is decoded again from the cached bytes
+        again = [item["id"] async for item in api.async_iter_planner_items("1", "2026-01-01", "2026-02-01", ["course_1"])]
+        assert again == [1, 2, 3, 4, 5, 6]
+        assert api.response_cache.hits == 6
+
+@pytest.mark.asyncio
+async def test_closing_planner_iterator_cancels_prefetches(aresponses):
+    async def handler(request):
+        page = int(request.query.get("page", 1))
+        if page > 2:
+            # Later pages are still in flight when the consumer stops
+            await asyncio.sleep(5)
+        headers = {
+            "Link": '<https://example.com/api/v1/planner/items?page=2&per_page=100>; rel="next",'
+            '<https://example.com/api/v1/planner/items?page=6&per_page=100>; rel="last"'
+        }
+        return aresponses.Response(text=json.dumps([{"id": page}]), status=200, content_type="application/json", headers=headers)
+
+    aresponses.add("example.com", "/api/v1/planner/items", "GET", handler, repeat=aresponses.INFINITY)
+
+    def prefetches():
+        return [task for task in asyncio.all_tasks() if "_async_prefetch_page" in repr(task.get_coro())]
+
+    async with aiohttp.ClientSession() as session:
+        api = CanvasAPI("https://example.com", "token", session, max_concurrent_pages=2)
+        async with aclosing(api.async_iter_planner_items("1", "2026-01-01", "2026-02-01", ["course_1"])) as items:
+            async for item in items:
+                if item["id"] == 2:
+                    break
+        await asyncio.sleep(0)
+        assert all(task.done() for task in prefetches())
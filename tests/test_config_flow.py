@@ -0,0 +1,40 @@
+import json
+import pytest
+import aiohttp
+from unittest.mock import MagicMock
+from custom_components.canvas.config_flow import ConfigFlow
+from custom_components.canvas.const import CONF_TOKEN, CONF_URL
+from custom_components.canvas.transport import DATA_TRANSPORTS
+
+async def _run_flow(monkeypatch, user_input):
+    flow = ConfigFlow()
+    flow.hass = MagicMock()
+    flow.hass.data = {}
+    async with aiohttp.ClientSession() as session:
+        monkeypatch.setattr("custom_components.canvas.config_flow.async_get_clientsession", lambda hass: session)
+        result = await flow.async_step_user(user_input)
+    # Validation must not leave a Canvas connection pool behind
+    assert DATA_TRANSPORTS not in flow.hass.data
+    return result
+
+@pytest.mark.asyncio
+async def test_config_flow_creates_entry(aresponses, monkeypatch):
+    aresponses.add(
+        "example.com",
+        "/api/v1/users/self/profile",
+        "GET",
+        aresponses.Response(text=json.dumps({"id": 1, "name": "Parent"}), status=200, content_type="application/json"),
+    )
+    user_input = {CONF_URL: "https://example.com", CONF_TOKEN: "token"}
+    result = await _run_flow(monkeypatch, user_input)
+
+    assert result["type"] == "create_entry"
+    assert result["data"] == user_input
+
+@pytest.mark.asyncio
+async def test_config_flow_reports_connection_errors(aresponses, monkeypatch):
+    aresponses.add("example.com", "/api/v1/users/self/profile", "GET", aresponses.Response(status=401))
+    result = await _run_flow(monkeypatch, {CONF_URL: "https://example.com", CONF_TOKEN: "bad"})
+
+    assert result["type"] == "form"
+    assert result["errors"] == {"base": "cannot_connect"}
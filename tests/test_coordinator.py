@@ -1,10 +1,13 @@
 import json
 import re
+from types import SimpleNamespace
 import pytest
 import aiohttp
 from unittest.mock import MagicMock
 from custom_components.canvas.api import CanvasAPI
+from custom_components.canvas.const import CONF_BATCH_COURSES, CONF_BULK_PLANNER, CONF_PROFILE_REFRESH, CONF_TOKEN, CONF_URL, CONF_WEBHOOK_ID, DOMAIN
 from custom_components.canvas.coordinator import CanvasDataUpdateCoordinator
+from custom_components.canvas.diagnostics import async_get_config_entry_diagnostics
 
 @pytest.fixture
 def mock_observees():
@@ -69,6 +72,7 @@ async def test_coordinator_update_data(aresponses, mock_observees, mock_courses)
         api = CanvasAPI("https://example.com", "token", session)
         hass = MagicMock()
         entry = MagicMock()
+        entry.options = {}
         
         coordinator = CanvasDataUpdateCoordinator(hass, api, entry)
         
@@ -92,3 +96,301 @@ async def test_coordinator_update_data(aresponses, mock_observees, mock_courses)
         # Assignments for Student A via Planner
         assert len(student_data.assignments) == 1
         assert student_data.assignments[0].name == "Homework 1"
+
+        # Refresh timings and per-endpoint request stats
+        stats = coordinator.last_refresh_stats
+        assert stats.duration is not None
+        assert stats.pages == 3
+        assert stats.bytes > 0
+        assert 67890 in stats.student_wall
+        assert {"parse", "course_filter", "index", "grades"} <= set(stats.stage_cpu)
+        endpoints = api.stats.as_dict()["endpoints"]
+        assert endpoints["/api/v1/users/:id/courses"]["pages"] == 1
+        assert endpoints["/api/v1/planner/items"]["bytes"] > 0
+
+        coordinator.data = data
+        hass.data = {DOMAIN: {entry.entry_id: coordinator}}
+        entry.data = {CONF_URL: "https://example.com", CONF_TOKEN: "token", CONF_WEBHOOK_ID: "hook"}
+        diagnostics = await async_get_config_entry_diagnostics(hass, entry)
+        assert diagnostics["entry"]["data"][CONF_TOKEN] == "**REDACTED**"
+        assert diagnostics["entry"]["data"][CONF_WEBHOOK_ID] == "**REDACTED**"
+        assert diagnostics["students"]["67890"]["assignments"] == 1
+        assert diagnostics["refresh"]["student_wall_s"]["67890"] >= 0
+
+@pytest.mark.asyncio
+async def test_coordinator_profiles_one_refresh(monkeypatch):
+    entry = MagicMock()
+    entry.options = {CONF_PROFILE_REFRESH: True}
+    coordinator = CanvasDataUpdateCoordinator(MagicMock(), MagicMock(), entry)
+
+    async def refresh_all():
+        return {"students": []}
+
+    monkeypatch.setattr(coordinator, "_async_refresh_all", refresh_all)
+    await coordinator._async_update_data()
+    assert "refresh_all" in coordinator.last_profile
+
+    # Only the first refresh after loading is profiled
+    coordinator.last_profile = None
+    await coordinator._async_update_data()
+    assert coordinator.last_profile is None
+
+@pytest.mark.asyncio
+async def test_coordinator_student_failure_is_isolated(aresponses, mock_courses):
+    students = [{"id": 1, "name": "Student A"}, {"id": 2, "name": "Student B"}]
+    aresponses.add(
+        "example.com",
+        re.compile(r"/api/v1/users/self/observees.*"),
+        "GET",
+        aresponses.Response(text=json.dumps(students), status=200, content_type="application/json")
+    )
+    aresponses.add(
+        "example.com",
+        re.compile(r"/api/v1/users/1/courses.*"),
+        "GET",
+        aresponses.Response(text=json.dumps(mock_courses), status=200, content_type="application/json")
+    )
+    aresponses.add(
+        "example.com",
+        re.compile(r"/api/v1/users/2/courses.*"),
+        "GET",
+        aresponses.Response(text="Error", status=500)
+    )
+    aresponses.add(
+        "example.com",
+        re.compile(r"/api/v1/planner/items.*"),
+        "GET",
+        aresponses.Response(text="[]", status=200, content_type="application/json")
+    )
+
+    async with aiohttp.ClientSession() as session:
+        api = CanvasAPI("https://example.com", "token", session)
+        entry = MagicMock()
+        entry.options = {}
+
+        coordinator = CanvasDataUpdateCoordinator(MagicMock(), api, entry)
+        data = await coordinator._async_update_data()
+
+        # Student A still publishes; only Student B is marked failed
+        assert not data["student_data"][1].failed
+        assert len(data["student_data"][1].courses) == 2
+        assert data["student_data"][2].failed
+        assert data["student_data"][2].courses == []
+
+@pytest.mark.asyncio
+async def test_coordinator_batched_courses_fall_back_per_student(aresponses):
+    students = [{"id": 1, "name": "Student A"}, {"id": 2, "name": "Student B"}, {"id": 3, "name": "Student C"}]
+
+    def course(course_id, *user_ids):
+        return {
+            "id": course_id,
+            "name": f"Course {course_id}",
+            "term": {"name": "2026"},
+            "enrollments": [{"type": "observer", "associated_user_id": 1}]
+            + [
+                {"type": "StudentEnrollment", "user_id": user_id, "computed_current_score": 90 + user_id}
+                for user_id in user_ids
+            ],
+        }
+
+    aresponses.add(
+        "example.com",
+        re.compile(r"/api/v1/users/self/observees.*"),
+        "GET",
+        aresponses.Response(text=json.dumps(students), status=200, content_type="application/json")
+    )
+    aresponses.add(
+        "example.com",
+        re.compile(r"/api/v1/courses.*"),
+        "GET",
+        aresponses.Response(
+            text=json.dumps([course(101, 1, 2), course(102, 2), course(101, 1, 2)]),
+            status=200,
+            content_type="application/json",
+        )
+    )
+    # Student C isn't covered by the batch and is fetched on their own
+    aresponses.add(
+        "example.com",
+        re.compile(r"/api/v1/users/3/courses.*"),
+        "GET",
+        aresponses.Response(text=json.dumps([course(103, 3)]), status=200, content_type="application/json")
+    )
+    aresponses.add(
+        "example.com",
+        re.compile(r"/api/v1/planner/items.*"),
+        "GET",
+        aresponses.Response(text="[]", status=200, content_type="application/json"),
+        repeat=3,
+    )
+
+    async with aiohttp.ClientSession() as session:
+        api = CanvasAPI("https://example.com", "token", session)
+        entry = MagicMock()
+        entry.options = {CONF_BATCH_COURSES: True}
+
+        coordinator = CanvasDataUpdateCoordinator(MagicMock(), api, entry)
+        data = await coordinator._async_update_data()
+
+    assert [c["id"] for c in data["student_data"][1].courses] == [101]
+    assert [c["id"] for c in data["student_data"][2].courses] == [101, 102]
+    assert [c["id"] for c in data["student_data"][3].courses] == [103]
+    assert data["grades"][(2, 101)]["computed_current_score"] == 92
+    aresponses.assert_all_requests_matched()
+    aresponses.assert_no_unused_routes()
+
+@pytest.mark.asyncio
+async def test_coordinator_tiered_refresh(aresponses, mock_observees, mock_courses, monkeypatch):
+    planner_ranges = []
+
+    def planner_handler(request):
+        planner_ranges.append((request.query["start_date"], request.query["end_date"]))
+        return aresponses.Response(text="[]", status=200, content_type="application/json")
+
+    # Students and courses are only registered once: their tiers must not re-run
+    aresponses.add(
+        "example.com",
+        re.compile(r"/api/v1/users/self/observees.*"),
+        "GET",
+        aresponses.Response(text=json.dumps(mock_observees), status=200, content_type="application/json"),
+    )
+    aresponses.add(
+        "example.com",
+        re.compile(r"/api/v1/users/67890/courses.*"),
+        "GET",
+        aresponses.Response(text=json.dumps(mock_courses), status=200, content_type="application/json"),
+    )
+    aresponses.add("example.com", re.compile(r"/api/v1/planner/items.*"), "GET", planner_handler, repeat=2)
+
+    clock = [1000.0]
+    monkeypatch.setattr(
+        "custom_components.canvas.coordinator.time", SimpleNamespace(monotonic=lambda: clock[0])
+    )
+
+    async with aiohttp.ClientSession() as session:
+        api = CanvasAPI("https://example.com", "token", session)
+        entry = MagicMock()
+        entry.options = {}
+
+        coordinator = CanvasDataUpdateCoordinator(MagicMock(), api, entry)
+        coordinator.data = await coordinator._async_update_data()
+
+        # Nothing is due a minute later, so no requests are made at all
+        clock[0] += 60
+        coordinator.data = await coordinator._async_update_data()
+        assert len(planner_ranges) == 1
+
+        # Once the near tier is due only the hot planner window is re-fetched
+        clock[0] += 20 * 60
+        data = await coordinator._async_update_data()
+        assert len(data["student_data"][67890].courses) == 2
+
+        (full_start, full_end), (hot_start, hot_end) = planner_ranges
+        assert full_start < hot_start
+        assert hot_end < full_end
+
+def _bulk_planner_routes(aresponses, planner_handler):
+    students = [{"id": 1, "name": "Student A"}, {"id": 2, "name": "Student B"}]
+    courses = [
+        {
+            "id": course_id,
+            "name": f"Course {course_id}",
+            "enrollments": [{"type": "StudentEnrollment", "user_id": user_id}],
+        }
+        for course_id, user_id in ((101, 1), (102, 2))
+    ]
+    aresponses.add(
+        "example.com",
+        re.compile(r"/api/v1/users/self/observees.*"),
+        "GET",
+        aresponses.Response(text=json.dumps(students), status=200, content_type="application/json")
+    )
+    aresponses.add(
+        "example.com",
+        re.compile(r"/api/v1/courses.*"),
+        "GET",
+        aresponses.Response(text=json.dumps(courses), status=200, content_type="application/json")
+    )
+    aresponses.add("example.com", re.compile(r"/api/v1/planner/items.*"), "GET", planner_handler, repeat=3)
+
+def _planner_item(item_id, course_id, **extra):
+    return {
+        "plannable_type": "assignment",
+        "course_id": course_id,
+        "context_name": f"Course {course_id}",
+        "plannable": {"id": item_id, "title": f"Item {item_id}", "due_at": "2026-01-22T23:59:59Z"},
+        "submissions": {"submitted": False},
+        **extra,
+    }
+
+@pytest.mark.asyncio
+async def test_coordinator_bulk_planner_attributes_items(aresponses):
+    queries = []
+
+    def planner(request):
+        queries.append(request.query)
+        items = [_planner_item(1, 101, observed_user_id=1), _planner_item(2, 102, observed_user_id=2)]
+        return aresponses.Response(text=json.dumps(items), status=200, content_type="application/json")
+
+    _bulk_planner_routes(aresponses, planner)
+
+    async with aiohttp.ClientSession() as session:
+        entry = MagicMock()
+        entry.options = {CONF_BATCH_COURSES: True, CONF_BULK_PLANNER: True}
+        coordinator = CanvasDataUpdateCoordinator(MagicMock(), CanvasAPI("https://example.com", "token", session), entry)
+        data = await coordinator._async_update_data()
+
+    assert len(queries) == 1
+    assert queries[0].getall("observed_user_ids[]") == ["1", "2"]
+    assert [a.id for a in data["student_data"][1].assignments] == ["1"]
+    assert [a.id for a in data["student_data"][2].assignments] == ["2"]
+
+@pytest.mark.asyncio
+async def test_coordinator_bulk_planner_falls_back_when_unsupported(aresponses):
+    queries = []
+
+    def planner(request):
+        queries.append(request.query)
+        student_id = request.query.get("observed_user_id")
+        items = [_planner_item(1, 101), _planner_item(2, 102)]
+        if student_id:
+            items = [item for item in items if item["course_id"] == 100 + int(student_id)]
+        return aresponses.Response(text=json.dumps(items), status=200, content_type="application/json")
+
+    _bulk_planner_routes(aresponses, planner)
+
+    async with aiohttp.ClientSession() as session:
+        entry = MagicMock()
+        entry.options = {CONF_BATCH_COURSES: True, CONF_BULK_PLANNER: True}
+        coordinator = CanvasDataUpdateCoordinator(MagicMock(), CanvasAPI("https://example.com", "token", session), entry)
+        data = await coordinator._async_update_data()
+
+    # One probing bulk query, then a crawl per student
+    assert len(queries) == 3
+    assert not coordinator._bulk_planner_supported
+    assert [a.id for a in data["student_data"][1].assignments] == ["1"]
+    assert [a.id for a in data["student_data"][2].assignments] == ["2"]
+
+@pytest.mark.asyncio
+async def test_coordinator_bulk_planner_falls_back_on_empty_sweep(aresponses):
+    queries = []
+
+    def planner(request):
+        queries.append(request.query)
+        student_id = request.query.get("observed_user_id")
+        # Stock Canvas ignores observed_user_ids[] and returns the observer's own, empty planner
+        items = [_planner_item(100 + int(student_id), 100 + int(student_id))] if student_id else []
+        return aresponses.Response(text=json.dumps(items), status=200, content_type="application/json")
+
+    _bulk_planner_routes(aresponses, planner)
+
+    async with aiohttp.ClientSession() as session:
+        entry = MagicMock()
+        entry.options = {CONF_BATCH_COURSES: True, CONF_BULK_PLANNER: True}
+        coordinator = CanvasDataUpdateCoordinator(MagicMock(), CanvasAPI("https://example.com", "token", session), entry)
+        data = await coordinator._async_update_data()
+
+    assert len(queries) == 3
+    assert not coordinator._bulk_planner_supported
+    assert [a.id for a in data["student_data"][1].assignments] == ["101"]
+    assert [a.id for a in data["student_data"][2].assignments] == ["102"]
@@ -0,0 +1,161 @@
+import json
+import re
+from types import SimpleNamespace
+import pytest
+import aiohttp
+from unittest.mock import MagicMock
+from custom_components.canvas.api import CanvasAPI
+from custom_components.canvas.const import CONF_DATA_SOURCE, DATA_SOURCE_GRAPHQL
+from custom_components.canvas.coordinator import CanvasDataUpdateCoordinator
+
+def _submission(assignment_id, due_at, state="unsubmitted"):
+    return {
+        "state": state,
+        "submittedAt": None,
+        "assignment": {"_id": str(assignment_id), "name": f"Item {assignment_id}", "dueAt": due_at, "description": "<p>Do it</p>"},
+    }
+
+def _student_response():
+    return {
+        "data": {
+            "legacyNode": {
+                "enrollments": [
+                    {
+                        "type": "StudentEnrollment",
+                        "grades": {"currentScore": 91.5, "currentGrade": "A-", "finalScore": 90.0, "finalGrade": "A-"},
+                        "course": {
+                            "_id": "101",
+                            "name": "Math 101",
+                            "courseCode": "MATH101",
+                            "endAt": None,
+                            "term": {"name": "2026", "endAt": None},
+                            "submissionsConnection": {
+                                "nodes": [_submission(1, "2026-01-20T23:59:59Z", "graded")],
+                                "pageInfo": {"hasNextPage": True, "endCursor": "c1"},
+                            },
+                        },
+                    }
+                ]
+            }
+        }
+    }
+
+def _operation(body):
+    return re.search(r"query (\w+)", body["query"]).group(1)
+
+def _coordinator(api):
+    entry = MagicMock()
+    entry.options = {CONF_DATA_SOURCE: DATA_SOURCE_GRAPHQL}
+    return CanvasDataUpdateCoordinator(MagicMock(), api, entry)
+
+def _observees(aresponses):
+    aresponses.add(
+        "example.com",
+        re.compile(r"/api/v1/users/self/observees.*"),
+        "GET",
+        aresponses.Response(text=json.dumps([{"id": 67890, "name": "Student A"}]), status=200, content_type="application/json")
+    )
+
+@pytest.mark.asyncio
+async def test_graphql_source_feeds_coordinator(aresponses, monkeypatch):
+    monkeypatch.setattr("custom_components.canvas.coordinator.PLANNER_PAST_DAYS", 100000)
+    queries = []
+
+    async def graphql(request):
+        body = await request.json()
+        queries.append(body)
+        if "courseId" in body["variables"]:
+            page = {"legacyNode": {"submissionsConnection": {
+                "nodes": [_submission(2, "2026-01-25T23:59:59Z"), _submission(3, None)],
+                "pageInfo": {"hasNextPage": False, "endCursor": None},
+            }}}
+            return aresponses.Response(text=json.dumps({"data": page}), status=200, content_type="application/json")
+        return aresponses.Response(text=json.dumps(_student_response()), status=200, content_type="application/json")
+
+    _observees(aresponses)
+    aresponses.add("example.com", "/api/graphql", "POST", graphql, repeat=3)
+
+    async with aiohttp.ClientSession() as session:
+        coordinator = _coordinator(CanvasAPI("https://example.com", "token", session))
+        data = await coordinator._async_update_data()
+
+    # Courses without submissions, then the planner sweep's submissions and their next page
+    assert [_operation(q) for q in queries] == [
+        "CanvasStudentCourses", "CanvasStudentSubmissions", "CanvasCourseSubmissions"
+    ]
+    assert "submissionsConnection" not in queries[0]["query"]
+    assert queries[2]["variables"]["after"] == "c1"
+    student = data["student_data"][67890]
+    assert [c["id"] for c in student.courses] == [101]
+    assert data["grades"][(67890, 101)]["computed_current_score"] == 91.5
+    assignments = {a.id: a for a in student.assignments}
+    assert set(assignments) == {"1", "2"}
+    assert assignments["1"].is_submitted
+    assert not assignments["2"].is_submitted
+    assert assignments["2"].course_name == "Math 101"
+
+@pytest.mark.asyncio
+async def test_graphql_falls_back_to_rest(aresponses):
+    _observees(aresponses)
+    aresponses.add("example.com", "/api/graphql", "POST", aresponses.Response(text="Not Found", status=404))
+    aresponses.add(
+        "example.com",
+        re.compile(r"/api/v1/users/67890/courses.*"),
+        "GET",
+        aresponses.Response(text=json.dumps([{"id": 101, "name": "Math 101"}]), status=200, content_type="application/json")
+    )
+    aresponses.add(
+        "example.com",
+        re.compile(r"/api/v1/planner/items.*"),
+        "GET",
+        aresponses.Response(text="[]", status=200, content_type="application/json")
+    )
+
+    async with aiohttp.ClientSession() as session:
+        coordinator = _coordinator(CanvasAPI("https://example.com", "token", session))
+        data = await coordinator._async_update_data()
+
+    assert not coordinator.source.available
+    assert [c["id"] for c in data["student_data"][67890].courses] == [101]
+    assert not data["student_data"][67890].failed
+
+@pytest.mark.asyncio
+async def test_graphql_hot_window_syncs_use_rest_planner(aresponses, monkeypatch):
+    response = _student_response()
+    response["data"]["legacyNode"]["enrollments"][0]["course"]["submissionsConnection"]["pageInfo"]["hasNextPage"] = False
+    graphql_calls = []
+    planner_calls = []
+
+    async def graphql(request):
+        graphql_calls.append(_operation(await request.json()))
+        return aresponses.Response(text=json.dumps(response), status=200, content_type="application/json")
+
+    def planner(request):
+        planner_calls.append(request.query)
+        return aresponses.Response(text="[]", status=200, content_type="application/json")
+
+    _observees(aresponses)
+    aresponses.add("example.com", "/api/graphql", "POST", graphql, repeat=aresponses.INFINITY)
+    aresponses.add("example.com", re.compile(r"/api/v1/planner/items.*"), "GET", planner, repeat=aresponses.INFINITY)
+
+    clock = [1000.0]
+    monkeypatch.setattr(
+        "custom_components.canvas.coordinator.time", SimpleNamespace(monotonic=lambda: clock[0])
+    )
+
+    async with aiohttp.ClientSession() as session:
+        coordinator = _coordinator(CanvasAPI("https://example.com", "token", session))
+        coordinator.data = await coordinator._async_update_data()
+        # Only the near tier is due: no new GraphQL query, one bounded planner crawl
+        clock[0] += 20 * 60
+        await coordinator._async_update_data()
+        assert graphql_calls == ["CanvasStudentCourses", "CanvasStudentSubmissions"]
+        assert len(planner_calls) == 1
+        assert planner_calls[0]["observed_user_id"] == "67890"
+
+        # Courses are due again but the far sweep isn't: grades only, no submissions
+        clock[0] += 45 * 60
+        await coordinator._async_update_data()
+
+    assert graphql_calls == ["CanvasStudentCourses", "CanvasStudentSubmissions", "CanvasStudentCourses"]
+    assert len(planner_calls) == 2
@@ -1,7 +1,24 @@
+import json
 import pytest
 from datetime import datetime, timedelta, timezone
-from custom_components.canvas.assignment_logic import CanvasAssignment, filter_assignments, clean_course_name
-from custom_components.canvas.calendar_logic import get_calendar_events
+from custom_components.canvas.assignment_logic import (
+    AssignmentStore,
+    CanvasAssignment,
+    CourseNameNormalizer,
+    clean_course_name,
+    filter_assignments,
+    parse_course_name_rules,
+)
+from custom_components.canvas.calendar_logic import CalendarEventIndex, get_calendar_events
+from custom_components.canvas.course_filter_logic import CourseFilter, parse_course_filter_rules
+from custom_components.canvas.refresh_logic import RefreshSchedule, TIER_PLANNER_NEAR, TIER_STUDENTS
+from custom_components.canvas.stats_logic import ApiStats, endpoint_key
+from custom_components.canvas.student_logic import (
+    CanvasStudentData,
+    snapshot_from_storage,
+    snapshot_to_storage,
+    split_observer_courses,
+)
 
 def test_assignment_parsing():
     data = {
@@ -81,3 +98,234 @@ def test_course_name_cleaning():
     
     # Complex but descriptive
     assert clean_course_name("Introduction to Psychology - Sec 01") == "Introduction to Psychology - Sec 01"
+
+def test_snapshot_storage_round_trip():
+    due = datetime(2026, 1, 22, 10, 0, 0, tzinfo=timezone.utc)
+    student = CanvasStudentData(
+        student_id=67890,
+        name="Student A",
+        courses=[{
+            "id": 101,
+            "name": "Math 101",
+            "term": {"name": "Fall"},
+            "enrollments": [{"type": "StudentEnrollment", "computed_current_score": 95.5, "grades": {}}],
+        }],
+        assignments=[CanvasAssignment("1", "HW 1", "Math", due, is_submitted=True, description="<p>Hi</p>")],
+    )
+    data = {"students": [{"id": 67890, "name": "Student A"}], "student_data": {67890: student}}
+
+    # The stored form must survive a JSON round trip (as written by Store)
+    stored = json.loads(json.dumps(snapshot_to_storage(data)))
+    restored = snapshot_from_storage(stored)
+
+    # Descriptions are written packed rather than as raw HTML
+    assert "<p>" not in json.dumps(stored)
+
+    restored_student = restored["student_data"][67890]
+    assert restored_student.name == "Student A"
+    assert restored_student.assignments == student.assignments
+    assert restored_student.fingerprint == student.fingerprint
+    assert restored_student.courses == [{
+        "id": 101,
+        "name": "Math 101",
+        "enrollments": [{"type": "StudentEnrollment", "computed_current_score": 95.5}],
+    }]
+
+def test_assignment_store_merges_hot_window():
+    now = datetime(2026, 1, 22, 10, 0, 0, tzinfo=timezone.utc)
+    store = AssignmentStore()
+    assert store.needs_full_sync(["course_1"])
+
+    store.replace_all([
+        CanvasAssignment("1", "Old", "Math", now - timedelta(days=20)),
+        CanvasAssignment("2", "Deleted", "Math", now + timedelta(days=1)),
+        CanvasAssignment("3", "Far", "Math", now + timedelta(days=100)),
+    ], ["course_1"])
+    assert not store.needs_full_sync(["course_1"])
+    assert store.needs_full_sync(["course_1", "course_2"])
+
+    store.merge_window(
+        [CanvasAssignment("4", "New", "Math", now + timedelta(days=2), is_submitted=True)],
+        now - timedelta(days=7),
+        now + timedelta(days=14),
+    )
+    assert sorted(a.name for a in store.assignments) == ["Far", "New", "Old"]
+
+def test_refresh_schedule_tiers():
+    schedule = RefreshSchedule({
+        TIER_STUDENTS: timedelta(days=1),
+        TIER_PLANNER_NEAR: timedelta(minutes=10),
+    })
+    assert schedule.min_interval == timedelta(minutes=10)
+    assert schedule.is_due(TIER_PLANNER_NEAR, 1, now=0)
+
+    schedule.mark(TIER_STUDENTS, None, now=0)
+    schedule.mark(TIER_PLANNER_NEAR, 1, now=0)
+    assert not schedule.is_due(TIER_PLANNER_NEAR, 1, now=60)
+    assert schedule.is_due(TIER_PLANNER_NEAR, 2, now=60)
+    assert schedule.is_due(TIER_PLANNER_NEAR, 1, now=600)
+    assert not schedule.is_due(TIER_STUDENTS, None, now=600)
+
+def test_assignment_index_windows():
+    now = datetime(2026, 1, 22, 10, 0, 0, tzinfo=timezone.utc)
+    assignments = [
+        CanvasAssignment("1", "Missed", "Math", now - timedelta(days=2)),
+        CanvasAssignment("2", "Missed Older", "Math", now - timedelta(days=5)),
+        CanvasAssignment("3", "Too Old", "Math", now - timedelta(days=9)),
+        CanvasAssignment("4", "Later Today", "Math", now + timedelta(hours=3)),
+        CanvasAssignment("5", "Tomorrow", "Math", now + timedelta(days=1)),
+        CanvasAssignment("6", "Submitted", "Math", now + timedelta(days=1), is_submitted=True),
+        CanvasAssignment("7", "No Date", "Math", None),
+    ]
+    index = CanvasStudentData(student_id=1, name="A", assignments=assignments).index
+
+    assert [a.name for a in index.query("today", now)] == ["Later Today"]
+    assert [a.name for a in index.query("tomorrow", now)] == ["Tomorrow"]
+    assert [a.name for a in index.query("upcoming_week", now, days=7)] == ["Later Today", "Tomorrow"]
+    # Sorted by due date, so the most recent miss is last
+    assert [a.name for a in index.query("missed", now, days=7)] == ["Missed Older", "Missed"]
+    assert len(index.by_due) == 6
+
+def test_calendar_event_index():
+    now = datetime(2026, 1, 22, 10, 0, 0, tzinfo=timezone.utc)
+    assignments = [
+        CanvasAssignment("1", "Later", "Math", now + timedelta(days=3)),
+        CanvasAssignment("2", "Past", "Math", now - timedelta(days=1)),
+        CanvasAssignment("3", "Soon", "Math", now + timedelta(hours=1)),
+        CanvasAssignment("4", "Undated", "Math", None),
+    ]
+    index = CalendarEventIndex(assignments)
+
+    assert index.next_event(now).summary == "[Math] Soon"
+    assert [e.summary for e in index.between(now - timedelta(days=2), now + timedelta(days=3))] == [
+        "[Math] Past",
+        "[Math] Soon",
+        "[Math] Later",
+    ]
+    assert index.between(now + timedelta(days=4), now + timedelta(days=5)) == []
+    assert index.next_event(now + timedelta(days=4)) is None
+
+def test_assignment_description_is_packed_lazily():
+    html = "<p>" + "Show all work. " * 50 + "</p>"
+    assignment = CanvasAssignment("1", "HW", "Math", None, description=html)
+
+    # Parsing keeps the raw text; the first use of the packed form replaces it
+    assert assignment._packed is None
+    assert assignment.description == html
+    description_hash = assignment.description_hash
+    assert len(assignment.packed_description) < len(html)
+    assert assignment._description is None
+    assert assignment.description == html
+    assert assignment.description_hash == description_hash
+    assert assignment == CanvasAssignment("1", "HW", "Math", None, description=html)
+    assert assignment != CanvasAssignment("1", "HW", "Math", None, description="<p>Changed</p>")
+    assert CanvasAssignment("2", "HW", "Math", None).description == ""
+    assert not hasattr(assignment, "__dict__")
+
+def test_course_name_normalizer_rules():
+    rules = parse_course_name_rules("-[A-Z]+$ => \n\n(?i)^social studies => Soc. Studies")
+    normalizer = CourseNameNormalizer(rules)
+
+    assert normalizer("P1-Spanish 2 H-PASSAGLIA") == "Spanish 2 H"
+    assert normalizer("P2-Social Studies 6") == "Soc. Studies 6"
+    assert normalizer(None) == "Unknown Course"
+    # Repeated names come back as the same cached object
+    assert normalizer("P1-Spanish 2 H-PASSAGLIA") is normalizer("P1-Spanish 2 H-PASSAGLIA")
+
+    # Comments are skipped; anything else that isn't a rule is a typo
+    assert parse_course_name_rules("# strip teachers\n-[A-Z]+$ => ") == [("-[A-Z]+$", "")]
+    for text in ("([unclosed => x", "-[A-Z]+$ -> ", " => x"):
+        with pytest.raises(ValueError):
+            parse_course_name_rules(text)
+
+def test_student_fingerprint_ignores_order():
+    due = datetime(2026, 2, 1, 23, 59, tzinfo=timezone.utc)
+    first = CanvasAssignment(id="1", name="A", course_name="Math", due_at=due)
+    second = CanvasAssignment(id="2", name="B", course_name="Math", due_at=due)
+
+    original = CanvasStudentData(student_id="1", name="S", assignments=[first, second])
+    reordered = CanvasStudentData(student_id="1", name="S", assignments=[second, first])
+    submitted = CanvasStudentData(
+        student_id="1",
+        name="S",
+        assignments=[first, CanvasAssignment(id="2", name="B", course_name="Math", due_at=due, is_submitted=True)],
+    )
+
+    assert original.fingerprint == reordered.fingerprint
+    assert original.fingerprint != submitted.fingerprint
+
+def test_endpoint_stats_histogram():
+    stats = ApiStats()
+    stats.record("/api/v1/users/67890/courses", 40, size=100)
+    stats.record("/api/v1/users/12345/courses", 300, size=50)
+    stats.record("/api/v1/users/12345/courses", 20000, error=True)
+
+    summary = stats.as_dict()["endpoints"]["/api/v1/users/:id/courses"]
+    assert summary["pages"] == 3
+    assert summary["bytes"] == 150
+    assert summary["errors"] == 1
+    assert summary["histogram"]["<=50ms"] == 1
+    assert summary["histogram"]["<=500ms"] == 1
+    assert summary["histogram"][">10000ms"] == 1
+    assert endpoint_key("/api/v1/planner/items") == "/api/v1/planner/items"
+
+def test_split_observer_courses_dedupes_and_shares_course_fields():
+    term = {"name": "2026"}
+    course = {
+        "id": 101,
+        "name": "Math",
+        "term": term,
+        "enrollments": [
+            {"type": "observer", "associated_user_id": 1},
+            {"type": "StudentEnrollment", "user_id": 1, "computed_current_score": 91},
+            {"type": "StudentEnrollment", "user_id": 2, "computed_current_score": 82},
+            {"type": "StudentEnrollment", "user_id": 9, "computed_current_score": 70},
+        ],
+    }
+
+    per_student = split_observer_courses([course, dict(course)], ["1", "2", "3"])
+
+    assert [c["enrollments"][0]["computed_current_score"] for c in per_student["1"]] == [91]
+    assert [c["enrollments"][0]["computed_current_score"] for c in per_student["2"]] == [82]
+    assert per_student["3"] == []
+    assert per_student["1"][0]["term"] is per_student["2"][0]["term"] is term
+
+def test_course_filter_defaults_and_user_rules():
+    now = datetime(2026, 3, 1, tzinfo=timezone.utc)
+    courses = {
+        "archived": {"id": 1, "name": "Math", "term": {"name": "2024 Archive"}},
+        "hub": {"id": 2, "name": "Students Hub"},
+        "ended": {"id": 3, "name": "Art", "end_at": "2026-02-01T00:00:00Z"},
+        "grace": {"id": 4, "name": "Music", "term": {"name": "T1", "end_at": "2026-02-25T00:00:00Z"}},
+        "current": {"id": 5, "name": "Science"},
+        "unnamed": {"id": 6, "name": None},
+    }
+
+    default = CourseFilter.from_options(None)
+    assert [key for key, course in courses.items() if default(course, now)] == ["grace", "current"]
+
+    custom = CourseFilter.from_options("allow id 2\ndeny name ^Sci")
+    assert [key for key, course in courses.items() if custom(course, now)] == ["hub", "grace"]
+
+def test_course_filter_caches_verdicts_until_grace_ends():
+    course_filter = CourseFilter.from_options(None)
+    course = {"id": 4, "name": "Music", "end_at": "2026-02-25T00:00:00Z"}
+    now = datetime(2026, 3, 1, tzinfo=timezone.utc)
+
+    assert course_filter(course, now)
+    # A sibling's copy of the same course reuses the verdict
+    assert course_filter(dict(course), now)
+    assert course_filter.evaluations == 1
+
+    # The grace period ends on March 4th; the cached verdict expires with it
+    assert not course_filter(course, now + timedelta(days=4))
+    assert course_filter.evaluations == 2
+
+    # A changed course is re-evaluated
+    assert course_filter({**course, "end_at": "2026-06-01T00:00:00Z"}, now + timedelta(days=4))
+    assert course_filter.evaluations == 3
+
+@pytest.mark.parametrize("text", ["deny color red", "block name X", "deny ended soon", "deny name (", "allow id x"])
+def test_parse_course_filter_rules_rejects_bad_rules(text):
+    with pytest.raises(ValueError):
+        parse_course_filter_rules(text)
@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+from custom_components.canvas.assignment_logic import CanvasAssignment
+from custom_components.canvas.sensor import CanvasAssignmentSensor, CanvasGradeSensor, CanvasRefreshStatsSensor
+from custom_components.canvas.stats_logic import RefreshStats
+from custom_components.canvas.student_logic import CanvasStudentData, build_grade_map
+
+def _coordinator(score):
+    course = {
+        "id": 101,
+        "name": "Math 101",
+        "enrollments": [{"type": "StudentEnrollment", "computed_current_score": score, "computed_current_grade": "A"}],
+    }
+    student_data = {67890: CanvasStudentData(student_id=67890, name="Student A", courses=[course])}
+    coordinator = MagicMock()
+    coordinator.data = {"student_data": student_data, "grades": build_grade_map(student_data)}
+    return coordinator, course
+
+def test_grade_sensor_reads_grade_map():
+    coordinator, course = _coordinator(95.5)
+    sensor = CanvasGradeSensor(coordinator, 67890, "Student A", course, course["enrollments"][0])
+
+    assert sensor._attr_native_value == 95.5
+    assert sensor._attr_extra_state_attributes["current_grade"] == "A"
+
+    # Values are recomputed once per coordinator update, not per property read
+    sensor.coordinator.data = _coordinator(80.0)[0].data
+    assert sensor._attr_native_value == 95.5
+    sensor._handle_coordinator_update()
+    assert sensor._attr_native_value == 80.0
+    assert sensor.state_writes == 1
+
+def test_grade_sensor_skips_unchanged_state():
+    coordinator, course = _coordinator(95.5)
+    sensor = CanvasGradeSensor(coordinator, 67890, "Student A", course, course["enrollments"][0])
+
+    sensor.coordinator.data = _coordinator(95.5)[0].data
+    sensor._handle_coordinator_update()
+    assert sensor.state_writes == 0
+
+def test_assignment_sensor_writes_only_when_window_changes(monkeypatch):
+    now = datetime(2026, 2, 1, 12, 0, tzinfo=timezone.utc)
+    monkeypatch.setattr("custom_components.canvas.sensor.dt_util", SimpleNamespace(now=lambda: now))
+
+    def data(*assignments):
+        student_data = {67890: CanvasStudentData(student_id=67890, name="Student A", assignments=list(assignments))}
+        return {"student_data": student_data, "grades": {}}
+
+    due = now + timedelta(hours=3)
+    homework = CanvasAssignment(id="1", name="Homework", course_name="Math", due_at=due)
+    later = CanvasAssignment(id="2", name="Essay", course_name="English", due_at=now + timedelta(days=20))
+    coordinator = MagicMock()
+    coordinator.data = data(homework)
+    sensor = CanvasAssignmentSensor(coordinator, 67890, "Student A", "today")
+    assert sensor.native_value == 1
+
+    # An assignment outside the window does not change this sensor
+    coordinator.data = data(homework, later)
+    sensor._handle_coordinator_update()
+    assert sensor.state_writes == 0
+
+    coordinator.data = data(CanvasAssignment(id="1", name="Homework", course_name="Math", due_at=due, is_submitted=True))
+    sensor._handle_coordinator_update()
+    assert sensor.state_writes == 1
+    assert sensor.native_value == 0
+
+def test_refresh_stats_attributes_are_not_recorded():
+    coordinator = MagicMock()
+    coordinator.last_refresh_stats = RefreshStats()
+    coordinator.last_refresh_stats.finish()
+    coordinator.api.stats.dropped_items = 3
+    sensor = CanvasRefreshStatsSensor(coordinator, "entry")
+
+    assert set(sensor.extra_state_attributes) <= sensor._unrecorded_attributes
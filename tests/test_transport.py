@@ -0,0 +1,89 @@
+import json
+import pytest
+from unittest.mock import MagicMock
+from custom_components.canvas.transport import (
+    ACCEPT_ENCODING,
+    DATA_TRANSPORTS,
+    async_get_transport,
+    async_release_transport,
+)
+
+def _hass():
+    hass = MagicMock()
+    hass.data = {}
+    closing = []
+    hass.async_create_task = closing.append
+    return hass, closing
+
+@pytest.mark.asyncio
+async def test_transport_shares_pool_per_host_and_client_per_token():
+    hass, closing = _hass()
+    transport = async_get_transport(hass, "https://school.instructure.com")
+    transport_unsub = hass.bus.async_listen_once.return_value
+    assert async_get_transport(hass, "https://SCHOOL.instructure.com/") is transport
+    assert async_get_transport(hass, "https://other.instructure.com") is not transport
+
+    parent_a = transport.get_api("https://school.instructure.com", "token-a", holder="entry-1")
+    assert transport.get_api("https://school.instructure.com", "token-a", holder="entry-2") is parent_a
+    parent_b = transport.get_api("https://school.instructure.com", "token-b", holder="entry-3")
+    assert parent_b is not parent_a
+
+    # One connection pool and one concurrency limit, but a rate-limit bucket per token
+    assert parent_a._session is parent_b._session is transport.session
+    assert parent_a.scheduler._semaphore is parent_b.scheduler._semaphore is transport.semaphore
+    assert parent_a.scheduler is not parent_b.scheduler
+
+    async_release_transport(hass, "https://school.instructure.com", "entry-1")
+    assert transport.get_api("https://school.instructure.com", "token-a", holder="entry-2") is parent_a
+    async_release_transport(hass, "https://school.instructure.com", "entry-2")
+    assert transport.get_api("https://school.instructure.com", "token-a", holder="entry-4") is not parent_a
+    assert closing == []
+
+    for holder in ("entry-3", "entry-4"):
+        async_release_transport(hass, "https://school.instructure.com", holder)
+    assert "https://school.instructure.com:443" not in hass.data[DATA_TRANSPORTS]
+    await closing.pop()
+    assert transport.session.closed
+    # The shutdown listener goes with the pool, so reloads don't pile them up
+    transport_unsub.assert_called_once_with()
+
+    # A reloading entry gets a fresh pool rather than the closed one
+    assert async_get_transport(hass, "https://school.instructure.com") is not transport
+    for transport in hass.data[DATA_TRANSPORTS].values():
+        await transport.session.close()
+
+@pytest.mark.asyncio
+async def test_transport_staggers_entries():
+    hass, _ = _hass()
+    transport = async_get_transport(hass, "https://school.instructure.com")
+    for n in range(5):
+        transport.get_api("https://school.instructure.com", f"token-{n}", holder=f"entry-{n}")
+
+    delays = sorted(transport.stagger_delay(f"entry-{n}", window=300) for n in range(5))
+    assert delays[0] == 0
+    assert all(0 <= delay < 300 for delay in delays)
+    assert min(b - a for a, b in zip(delays, delays[1:])) > 30
+    assert transport.stagger_delay("unknown") == 0
+
+    # A freed slot is handed to the next entry
+    delay = transport.stagger_delay("entry-2")
+    transport.release("entry-2")
+    transport.get_api("https://school.instructure.com", "token-5", holder="entry-5")
+    assert transport.stagger_delay("entry-5") == delay
+    await transport.session.close()
+
+@pytest.mark.asyncio
+async def test_transport_requests_compressed_responses(aresponses):
+    def handler(request):
+        assert request.headers["Accept-Encoding"] == ACCEPT_ENCODING
+        return aresponses.Response(text=json.dumps({"id": 1, "name": "Parent"}), status=200, content_type="application/json")
+
+    aresponses.add("example.com", "/api/v1/users/self/profile", "GET", handler)
+    hass, _ = _hass()
+    transport = async_get_transport(hass, "https://example.com")
+    try:
+        api = transport.get_api("https://example.com", "token", holder="entry")
+        assert (await api.async_get_user_info())["name"] == "Parent"
+    finally:
+        await transport.session.close()
+    aresponses.assert_all_requests_matched()
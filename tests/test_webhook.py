@@ -0,0 +1,114 @@
+import json
+import re
+from types import SimpleNamespace
+import pytest
+import aiohttp
+from unittest.mock import MagicMock
+from custom_components.canvas.api import CanvasAPI
+from custom_components.canvas.const import CONF_WEBHOOK_ID, DOMAIN
+from custom_components.canvas.coordinator import CanvasDataUpdateCoordinator
+from custom_components.canvas.event_logic import parse_canvas_event
+from custom_components.canvas.refresh_logic import TIER_COURSES, TIER_PLANNER_FAR, TIER_PLANNER_NEAR
+from custom_components.canvas.webhook import async_handle_webhook
+
+def _event(name):
+    with open(f"tests/fixtures/live_events/{name}.json") as f:
+        return json.load(f)
+
+class FakeRequest:
+    """Just enough of aiohttp's Request for the webhook handler."""
+
+    def __init__(self, payload):
+        self._payload = payload
+
+    async def json(self):
+        if isinstance(self._payload, str):
+            raise ValueError("not JSON")
+        return self._payload
+
+def test_parse_canvas_events():
+    submission = parse_canvas_event(_event("submission_created"))
+    assert (submission.student_id, submission.course_id) == ("67890", "101")
+    assert submission.tiers == (TIER_PLANNER_NEAR,)
+
+    # The grader's user_id must not be mistaken for the student
+    grade = parse_canvas_event(_event("grade_change"))
+    assert (grade.student_id, grade.course_id) == ("67890", "102")
+    assert grade.tiers == (TIER_COURSES, TIER_PLANNER_NEAR)
+
+    assignment = parse_canvas_event(_event("assignment_updated"))
+    assert (assignment.student_id, assignment.course_id) == (None, "102")
+    assert assignment.tiers == (TIER_PLANNER_FAR,)
+
+    assert parse_canvas_event(_event("unrelated")) is None
+    assert parse_canvas_event({"type": "grade_change"}) is None
+    assert parse_canvas_event(["not", "a", "dict"]) is None
+
+@pytest.mark.asyncio
+async def test_webhook_refetches_only_affected_slice(aresponses, monkeypatch):
+    requests = []
+
+    def handler(request):
+        requests.append(request.path)
+        if request.path == "/api/v1/users/self/observees":
+            body = [{"id": 67890, "name": "Student A"}, {"id": 67891, "name": "Student B"}]
+        elif request.path.endswith("/courses"):
+            course_id = 101 if "67890" in request.path else 201
+            body = [{"id": course_id, "name": f"Course {course_id}", "enrollments": []}, {"id": 102, "name": "Shared", "enrollments": []}]
+        else:
+            body = []
+        return aresponses.Response(text=json.dumps(body), status=200, content_type="application/json")
+
+    aresponses.add("example.com", re.compile(r"/api/v1/.*"), "GET", handler, repeat=aresponses.INFINITY)
+
+    clock = [1000.0]
+    monkeypatch.setattr(
+        "custom_components.canvas.coordinator.time", SimpleNamespace(monotonic=lambda: clock[0])
+    )
+
+    async with aiohttp.ClientSession() as session:
+        entry = MagicMock()
+        entry.options = {}
+        entry.data = {CONF_WEBHOOK_ID: "hook"}
+        hass = MagicMock()
+        coordinator = CanvasDataUpdateCoordinator(hass, CanvasAPI("https://example.com", "token", session), entry)
+        hass.data = {DOMAIN: {"entry": coordinator}}
+        refreshes = []
+        hass.async_create_task = refreshes.append
+
+        async def request_refresh():
+            coordinator.data = await coordinator._async_update_data()
+
+        coordinator.async_request_refresh = request_refresh
+        await request_refresh()
+        assert len(requests) == 5
+
+        async def post(payload):
+            requests.clear()
+            clock[0] += 60
+            assert await async_handle_webhook(hass, "hook", FakeRequest(payload)) is None
+            # The sender gets its answer before Canvas is re-read
+            assert requests == []
+            if refreshes:
+                await refreshes.pop()
+            assert refreshes == []
+            return sorted(requests)
+
+        # A submission only re-polls that student's planner
+        assert await post(_event("submission_created")) == ["/api/v1/planner/items"]
+        # A grade change also re-reads that student's courses, where grades live
+        assert await post(_event("grade_change")) == ["/api/v1/planner/items", "/api/v1/users/67890/courses"]
+        # An edited assignment re-syncs every student taking the course
+        assert await post(_event("assignment_updated")) == ["/api/v1/planner/items", "/api/v1/planner/items"]
+        # Events that don't concern Canvas data, or unknown students, change nothing
+        assert await post(_event("unrelated")) == []
+        assert await async_handle_webhook(
+            hass, "hook", FakeRequest({"type": "submission_created", "user_id": 1})
+        ) is None
+        assert requests == [] and refreshes == []
+        # A batch is invalidated as a whole and refreshed once
+        batch = [_event("submission_created"), _event("grade_change")]
+        assert await post(batch) == ["/api/v1/planner/items", "/api/v1/users/67890/courses"]
+
+        assert (await async_handle_webhook(hass, "hook", FakeRequest("garbage"))).status == 400
+        assert (await async_handle_webhook(hass, "other", FakeRequest(_event("grade_change")))).status == 404